@@ -0,0 +1 @@
+"""Benchmarks and accuracy reports for mobi_motion_tracking."""
@@ -0,0 +1,116 @@
+"""Accuracy and speed of FastDTW against exact DTW on synthetic skeleton data.
+
+Run from the repository root with:
+
+    python -m benchmarks.fastdtw_accuracy --output fastdtw_accuracy.json
+
+Every pair is preprocessed like the main pipeline: both recordings are centered to
+the hip and the subject is normalized to the gold segment lengths. Both algorithms
+run in distance-only mode. The relative error is (fastdtw - dtw) / dtw and is never
+negative beyond floating point rounding, because FastDTW searches a subset of the
+warping paths.
+"""
+
+import argparse
+import json
+import pathlib
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from benchmarks import synthetic
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import similarity_functions
+
+
+def compare(
+    frame_counts: List[int], radii: List[int], num_pairs: int, seed: int = 0
+) -> list[dict]:
+    """Compares FastDTW with exact DTW for every frame count and radius.
+
+    Args:
+        frame_counts: Number of gold frames of each pair. The subject has 20% fewer
+            frames and a random time warp.
+        radii: FastDTW radii to evaluate.
+        num_pairs: Number of random pairs per frame count.
+        seed: Seed of the random generator.
+
+    Returns:
+        One summary dict per frame count and radius.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for num_frames in frame_counts:
+        pairs = []
+        for _ in range(num_pairs):
+            gold, subject = synthetic.skeleton_pair(
+                num_frames, int(num_frames * 0.8), rng
+            )
+            gold = preprocessing.center_joints_to_hip(gold)
+            subject = preprocessing.normalize_segments(
+                preprocessing.center_joints_to_hip(subject),
+                preprocessing.get_average_length(gold),
+            )
+            start = time.perf_counter()
+            exact = similarity_functions.dynamic_time_warping(
+                gold, subject, distance_only=True
+            ).metrics["distance"]
+            pairs.append((gold, subject, exact, time.perf_counter() - start))
+
+        for radius in radii:
+            errors, speedups = [], []
+            for gold, subject, exact, exact_seconds in pairs:
+                start = time.perf_counter()
+                approximate = similarity_functions.fast_dynamic_time_warping(
+                    gold, subject, radius=radius, distance_only=True
+                ).metrics["distance"]
+                errors.append((approximate - exact) / exact)
+                speedups.append(exact_seconds / (time.perf_counter() - start))
+            rows.append(
+                {
+                    "frames": num_frames,
+                    "radius": radius,
+                    "pairs": num_pairs,
+                    "mean_relative_error": float(np.mean(errors)),
+                    "max_relative_error": float(np.max(errors)),
+                    "median_speedup": float(np.median(speedups)),
+                }
+            )
+    return rows
+
+
+def format_table(rows: list[dict]) -> str:
+    """Formats comparison rows as a Markdown table."""
+    lines = [
+        "| Frames | Radius | Mean rel. error | Max rel. error | Speedup vs DTW |",
+        "| --- | --- | --- | --- | --- |",
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['frames']} | {row['radius']} "
+            f"| {max(row['mean_relative_error'], 0):.2%} "
+            f"| {max(row['max_relative_error'], 0):.2%} "
+            f"| {row['median_speedup']:.1f}x |"
+        )
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Runs the comparison and prints a Markdown table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--radii", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--pairs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=pathlib.Path, default=None)
+    arguments = parser.parse_args(args)
+
+    rows = compare(arguments.frames, arguments.radii, arguments.pairs, arguments.seed)
+    print(format_table(rows))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(rows, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Run time of the compiled kernels of the 'fast' extra against NumPy and the loop.
+
+Run from the repository root, with numba installed, with:
+
+    python -m benchmarks.jit_speed --output jit_speed.json
+
+Every case runs once untimed, which compiles the kernels, and then --repeats times
+with the compiled kernels and with their NumPy implementations. DTW cases also run
+the cell by cell reference engine, which is slow enough to be timed once.
+"""
+
+import argparse
+import functools
+import json
+import pathlib
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import synthetic
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import jit_kernels, similarity_functions
+
+
+def _best_time(function: Callable[[], object], repeats: int) -> float:
+    """Minimum run time of function over repeats calls, after one untimed call."""
+    function()
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def _cases(
+    gold: np.ndarray, subject: np.ndarray
+) -> Dict[str, tuple[Callable[..., object], bool]]:
+    """Benchmarked calls, and whether each also runs on the reference engine."""
+    centered = preprocessing.center_joints_to_hip(subject)
+    average_lengths = preprocessing.get_average_length(gold)
+    subject = preprocessing.normalize_segments(centered, average_lengths)
+    dtw = functools.partial(similarity_functions.dynamic_time_warping, gold, subject)
+    return {
+        "dtw": (dtw, True),
+        "dtw (distance_only)": (functools.partial(dtw, distance_only=True), True),
+        "dtw (window=100)": (functools.partial(dtw, window_size=100), True),
+        "fastdtw (radius=10)": (
+            functools.partial(
+                similarity_functions.fast_dynamic_time_warping,
+                gold,
+                subject,
+                radius=10,
+            ),
+            False,
+        ),
+        "normalize_segments": (
+            functools.partial(
+                preprocessing.normalize_segments, centered, average_lengths
+            ),
+            False,
+        ),
+    }
+
+
+def compare(num_frames: int, repeats: int, seed: int = 0) -> list[dict]:
+    """Times every case with the compiled kernels, NumPy and the reference engine.
+
+    Args:
+        num_frames: Number of gold and subject frames.
+        repeats: Number of timed runs of the compiled and NumPy versions.
+        seed: Seed of the random generator.
+
+    Returns:
+        One dict per case with the minimum run times in seconds. Cases without a
+            reference engine have reference_seconds None.
+
+    Raises:
+        RuntimeError: when numba is not installed.
+    """
+    if not jit_kernels.AVAILABLE:
+        raise RuntimeError("The compiled kernels require the 'fast' extra.")
+
+    gold, subject = synthetic.skeleton_pair(
+        num_frames, num_frames, np.random.default_rng(seed)
+    )
+    gold = preprocessing.center_joints_to_hip(gold)
+
+    rows = []
+    for name, (function, has_reference) in _cases(gold, subject).items():
+        compiled_seconds = _best_time(function, repeats)
+        jit_kernels.AVAILABLE = False
+        try:
+            numpy_seconds = _best_time(function, repeats)
+        finally:
+            jit_kernels.AVAILABLE = True
+        reference_seconds = None
+        if has_reference:
+            start = time.perf_counter()
+            function(engine="reference")
+            reference_seconds = time.perf_counter() - start
+        rows.append(
+            {
+                "frames": num_frames,
+                "case": name,
+                "reference_seconds": reference_seconds,
+                "numpy_seconds": numpy_seconds,
+                "compiled_seconds": compiled_seconds,
+            }
+        )
+    return rows
+
+
+def format_table(rows: list[dict]) -> str:
+    """Formats comparison rows as a Markdown table."""
+    lines = [
+        "| Frames | Case | Reference loop (s) | NumPy (s) | Compiled (s) "
+        "| Speedup vs loop | Speedup vs NumPy |",
+        "| --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    for row in rows:
+        reference, speedup = "-", "-"
+        if row["reference_seconds"] is not None:
+            reference = f"{row['reference_seconds']:.2f}"
+            speedup = f"{row['reference_seconds'] / row['compiled_seconds']:.0f}x"
+        lines.append(
+            f"| {row['frames']} | {row['case']} | {reference} "
+            f"| {row['numpy_seconds']:.4f} | {row['compiled_seconds']:.4f} "
+            f"| {speedup} "
+            f"| {row['numpy_seconds'] / row['compiled_seconds']:.1f}x |"
+        )
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Runs the comparison and prints a Markdown table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=pathlib.Path, default=None)
+    arguments = parser.parse_args(args)
+
+    rows = compare(arguments.frames, arguments.repeats, arguments.seed)
+    print(format_table(rows))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(rows, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Distance deviation of the float32 computation mode from float64.
+
+Run from the repository root with:
+
+    python -m benchmarks.precision --output precision.json
+
+Every pair is generated in float64 and preprocessed like the main pipeline, once as
+is and once after rounding the raw recordings to float32, as readers do with
+dtype='float32'. Both versions are compared with every algorithm, computing the
+warping paths, and the relative deviation is |float32 - float64| / float64.
+"""
+
+import argparse
+import functools
+import json
+import pathlib
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import synthetic
+from mobi_motion_tracking.core import models
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import cost_kernels, similarity_functions
+
+ALGORITHMS: Dict[str, Callable[..., models.SimilarityMetrics]] = {
+    "dtw": similarity_functions.dynamic_time_warping,
+    "dtw (window=50)": functools.partial(
+        similarity_functions.dynamic_time_warping, window_size=50
+    ),
+    "fastdtw (radius=10)": functools.partial(
+        similarity_functions.fast_dynamic_time_warping, radius=10
+    ),
+    **{
+        name: functools.partial(
+            similarity_functions.kernel_dynamic_time_warping,
+            kernel=cost_kernels.build_kernel(name, {"RHand": 2.0, "LHand": 2.0}),
+        )
+        for name in cost_kernels.KERNEL_LIST
+    },
+}
+
+
+def _preprocess(
+    gold: np.ndarray, subject: np.ndarray, dtype: type
+) -> tuple[np.ndarray, np.ndarray]:
+    """Centers both recordings and normalizes the subject to the gold lengths."""
+    gold = preprocessing.center_joints_to_hip(gold.astype(dtype))
+    subject = preprocessing.normalize_segments(
+        preprocessing.center_joints_to_hip(subject.astype(dtype)),
+        preprocessing.get_average_length(gold),
+    )
+    return gold, subject
+
+
+def compare(frame_counts: List[int], num_pairs: int, seed: int = 0) -> list[dict]:
+    """Compares float32 with float64 distances for every frame count and algorithm.
+
+    Args:
+        frame_counts: Number of gold frames of each pair. The subject has 20% fewer
+            frames and a random time warp.
+        num_pairs: Number of random pairs per frame count.
+        seed: Seed of the random generator.
+
+    Returns:
+        One summary dict per frame count and algorithm.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for num_frames in frame_counts:
+        pairs = [
+            synthetic.skeleton_pair(num_frames, int(num_frames * 0.8), rng)
+            for _ in range(num_pairs)
+        ]
+        for name, similarity_function in ALGORITHMS.items():
+            deviations, speedups, same_paths = [], [], 0
+            for gold, subject in pairs:
+                metrics = {}
+                seconds = {}
+                for dtype in (np.float64, np.float32):
+                    preprocessed = _preprocess(gold, subject, dtype)
+                    start = time.perf_counter()
+                    metrics[dtype] = similarity_function(*preprocessed)
+                    seconds[dtype] = time.perf_counter() - start
+                exact = metrics[np.float64].metrics["distance"]
+                deviations.append(
+                    abs(metrics[np.float32].metrics["distance"] - exact) / exact
+                )
+                speedups.append(seconds[np.float64] / seconds[np.float32])
+                same_paths += np.array_equal(
+                    metrics[np.float32].metrics["target_path"],
+                    metrics[np.float64].metrics["target_path"],
+                ) and np.array_equal(
+                    metrics[np.float32].metrics["experimental_path"],
+                    metrics[np.float64].metrics["experimental_path"],
+                )
+            rows.append(
+                {
+                    "frames": num_frames,
+                    "algorithm": name,
+                    "pairs": num_pairs,
+                    "mean_relative_deviation": float(np.mean(deviations)),
+                    "max_relative_deviation": float(np.max(deviations)),
+                    "same_paths": same_paths,
+                    "median_speedup": float(np.median(speedups)),
+                }
+            )
+    return rows
+
+
+def format_table(rows: list[dict]) -> str:
+    """Formats comparison rows as a Markdown table."""
+    lines = [
+        "| Frames | Algorithm | Mean rel. deviation | Max rel. deviation "
+        "| Same paths | Speedup vs float64 |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['frames']} | {row['algorithm']} "
+            f"| {row['mean_relative_deviation']:.1e} "
+            f"| {row['max_relative_deviation']:.1e} "
+            f"| {row['same_paths']}/{row['pairs']} "
+            f"| {row['median_speedup']:.1f}x |"
+        )
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Runs the comparison and prints a Markdown table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--pairs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=pathlib.Path, default=None)
+    arguments = parser.parse_args(args)
+
+    rows = compare(arguments.frames, arguments.pairs, arguments.seed)
+    print(format_table(rows))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(rows, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Run times of the reading, preprocessing and DTW stages and of whole runs.
+
+Run from the repository root with:
+
+    python -m benchmarks.speed --output speed.json
+
+Every stage is timed on synthetic workbooks at several frame counts, and
+`orchestrator.run` is timed over a folder of subject workbooks. Each case runs once
+untimed and then `--repeats` times. The results are written as JSON with sorted keys
+and a fixed case order, so two files can be diffed or compared with:
+
+    python -m benchmarks.speed --compare baseline.json speed.json
+"""
+
+import argparse
+import functools
+import importlib.metadata
+import json
+import pathlib
+import platform
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import workbook
+from mobi_motion_tracking.core import orchestrator
+from mobi_motion_tracking.io.readers import readers
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import similarity_functions
+
+SCHEMA_VERSION = 1
+
+
+def time_case(
+    name: str, params: Dict[str, Any], function: Callable[[], object], repeats: int
+) -> dict:
+    """Times a function after one untimed warm-up call.
+
+    Args:
+        name: Name of the timed stage.
+        params: Parameters identifying the case, e.g. the frame count.
+        function: Function running the case.
+        repeats: Number of timed calls.
+
+    Returns:
+        Result row with the minimum, median and mean run time in seconds.
+    """
+    function()
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return {
+        "name": name,
+        "params": params,
+        "repeats": repeats,
+        "min_seconds": min(seconds),
+        "median_seconds": statistics.median(seconds),
+        "mean_seconds": statistics.fmean(seconds),
+    }
+
+
+def stage_cases(
+    directory: pathlib.Path, frame_counts: List[int], repeats: int, seed: int
+) -> list[dict]:
+    """Times every pipeline stage on one gold and one subject recording.
+
+    Args:
+        directory: Scratch directory for the generated workbooks.
+        frame_counts: Number of gold frames of each case.
+        repeats: Number of timed calls per case.
+        seed: Seed of the random generator.
+
+    Returns:
+        One result row per stage, frame count and variant.
+    """
+    rows = []
+    for num_frames in frame_counts:
+        case_dir = directory / f"stages_{num_frames}"
+        case_dir.mkdir()
+        gold_path, (subject_path,) = workbook.write_study(
+            case_dir, 1, num_frames, seed=seed
+        )
+        params: Dict[str, Any] = {"frames": num_frames}
+
+        raw = pd.read_excel(subject_path, sheet_name="seq1", header=None)
+        rows.append(
+            time_case(
+                "data_cleaner", params, lambda: readers.data_cleaner(raw), repeats
+            )
+        )
+        reader_list: List[Literal["pandas", "fast"]] = ["pandas", "fast"]
+        for reader in reader_list:
+            rows.append(
+                time_case(
+                    "read_participant_data",
+                    {**params, "reader": reader},
+                    functools.partial(
+                        readers.read_participant_data, subject_path, 1, reader=reader
+                    ),
+                    repeats,
+                )
+            )
+
+        gold = readers.read_participant_data(gold_path, 1).data
+        subject = readers.read_participant_data(subject_path, 1).data
+        rows.append(
+            time_case(
+                "center_joints_to_hip",
+                params,
+                lambda: preprocessing.center_joints_to_hip(subject),
+                repeats,
+            )
+        )
+
+        gold = preprocessing.center_joints_to_hip(gold)
+        subject = preprocessing.center_joints_to_hip(subject)
+        average_lengths = preprocessing.get_average_length(gold)
+        rows.append(
+            time_case(
+                "normalize_segments",
+                params,
+                lambda: preprocessing.normalize_segments(subject, average_lengths),
+                repeats,
+            )
+        )
+
+        subject = preprocessing.normalize_segments(subject, average_lengths)
+        for distance_only in (False, True):
+            rows.append(
+                time_case(
+                    "dynamic_time_warping",
+                    {**params, "distance_only": distance_only},
+                    functools.partial(
+                        similarity_functions.dynamic_time_warping,
+                        gold,
+                        subject,
+                        distance_only=distance_only,
+                    ),
+                    repeats,
+                )
+            )
+    return rows
+
+
+def run_cases(
+    directory: pathlib.Path,
+    subject_counts: List[int],
+    num_frames: int,
+    workers: List[int],
+    repeats: int,
+    seed: int,
+) -> list[dict]:
+    """Times orchestrator.run over folders of subject workbooks.
+
+    Args:
+        directory: Scratch directory for the generated workbooks and the results
+            of the runs, which are written next to the subject folder so later
+            runs do not scan them.
+        subject_counts: Number of subject workbooks of each case.
+        num_frames: Number of gold frames.
+        workers: Worker counts passed to orchestrator.run.
+        repeats: Number of timed calls per case.
+        seed: Seed of the random generator.
+
+    Returns:
+        One result row per subject count and worker count.
+    """
+    rows = []
+    for num_subjects in subject_counts:
+        case_dir = directory / f"run_{num_subjects}"
+        case_dir.mkdir()
+        gold_path, _ = workbook.write_study(
+            case_dir, num_subjects, num_frames, seed=seed
+        )
+        for num_workers in workers:
+            rows.append(
+                time_case(
+                    "orchestrator.run",
+                    {
+                        "subjects": num_subjects,
+                        "frames": num_frames,
+                        "workers": num_workers,
+                    },
+                    functools.partial(
+                        orchestrator.run,
+                        case_dir / "subjects",
+                        gold_path,
+                        [1],
+                        workers=num_workers,
+                        output_dir=case_dir / "results",
+                    ),
+                    repeats,
+                )
+            )
+    return rows
+
+
+def environment() -> dict:
+    """Versions and platform the benchmark ran on."""
+    try:
+        version = importlib.metadata.version("mobi_motion_tracking")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    try:
+        numba_version = importlib.metadata.version("numba")
+    except importlib.metadata.PackageNotFoundError:
+        numba_version = None
+    return {
+        "mobi_motion_tracking": version,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": numba_version,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def _case_label(row: dict) -> str:
+    params = ", ".join(f"{name}={value}" for name, value in row["params"].items())
+    return f"{row['name']} ({params})"
+
+
+def format_table(rows: list[dict]) -> str:
+    """Formats result rows as a Markdown table."""
+    lines = ["| Case | Min (s) | Median (s) |", "| --- | --- | --- |"]
+    for row in rows:
+        lines.append(
+            f"| {_case_label(row)} "
+            f"| {row['min_seconds']:.4f} | {row['median_seconds']:.4f} |"
+        )
+    return "\n".join(lines)
+
+
+def compare(baseline: dict, current: dict) -> str:
+    """Formats the median run time ratio of every case found in both reports.
+
+    Args:
+        baseline: Report of the reference version.
+        current: Report of the version under test.
+
+    Returns:
+        Markdown table of both medians and current / baseline; ratios above 1 are
+            slowdowns.
+    """
+
+    def key(row: dict) -> str:
+        return json.dumps([row["name"], row["params"]], sort_keys=True)
+
+    baseline_rows = {key(row): row for row in baseline["results"]}
+    lines = [
+        "| Case | Baseline (s) | Current (s) | Ratio |",
+        "| --- | --- | --- | --- |",
+    ]
+    for row in current["results"]:
+        reference = baseline_rows.get(key(row))
+        if reference is None:
+            continue
+        lines.append(
+            f"| {_case_label(row)} "
+            f"| {reference['median_seconds']:.4f} "
+            f"| {row['median_seconds']:.4f} "
+            f"| {row['median_seconds'] / reference['median_seconds']:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """Runs the benchmarks, or compares two reports, and prints a Markdown table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--subjects", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--run-frames", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=pathlib.Path, default=None)
+    parser.add_argument(
+        "--compare", type=pathlib.Path, nargs=2, metavar=("BASELINE", "CURRENT")
+    )
+    arguments = parser.parse_args(args)
+
+    if arguments.compare is not None:
+        baseline, current = (json.loads(path.read_text()) for path in arguments.compare)
+        print(compare(baseline, current))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = stage_cases(
+            pathlib.Path(directory), arguments.frames, arguments.repeats, arguments.seed
+        ) + run_cases(
+            pathlib.Path(directory),
+            arguments.subjects,
+            arguments.run_frames,
+            arguments.workers,
+            arguments.repeats,
+            arguments.seed,
+        )
+
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "environment": environment(),
+        "seed": arguments.seed,
+        "results": results,
+    }
+    print(format_table(results))
+    if arguments.output is not None:
+        arguments.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+if __name__ == "__main__":
+    main()
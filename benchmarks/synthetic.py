@@ -0,0 +1,129 @@
+"""Synthetic skeleton recordings shaped like cleaned Kinect and Zed data.
+
+Every generated array has the layout returned by `readers.data_cleaner`: column 0
+holds the frame number and columns 1-60 hold the x, y, z coordinates of 20 joints,
+starting with the hip. Joints are placed by walking DEFAULT_JOINT_SEGMENTS from the
+hip outwards with fixed bone lengths, and every bone direction oscillates smoothly
+over time, so the data keeps realistic skeletal structure.
+"""
+
+import dataclasses
+from typing import Optional
+
+import numpy as np
+
+from mobi_motion_tracking.preprocessing.joint_index_list import DEFAULT_JOINT_SEGMENTS
+
+
+@dataclasses.dataclass
+class SkeletonMotion:
+    """Parameters of one synthetic movement.
+
+    Attributes:
+        bone_lengths: Length of every segment in DEFAULT_JOINT_SEGMENTS, in meters.
+        base_directions: Resting unit direction of every segment, shape (19, 3).
+        amplitudes: Oscillation amplitude of every segment direction, shape (19, 3).
+        frequencies: Oscillation frequency of every segment direction, shape
+            (19, 3), in cycles per unit of movement phase.
+        phases: Oscillation phase of every segment direction, shape (19, 3).
+    """
+
+    bone_lengths: np.ndarray
+    base_directions: np.ndarray
+    amplitudes: np.ndarray
+    frequencies: np.ndarray
+    phases: np.ndarray
+
+    @classmethod
+    def random(cls, rng: np.random.Generator) -> "SkeletonMotion":
+        """Draws a random movement."""
+        num_segments = len(DEFAULT_JOINT_SEGMENTS)
+        base_directions = rng.normal(size=(num_segments, 3))
+        base_directions /= np.linalg.norm(base_directions, axis=1, keepdims=True)
+        return cls(
+            bone_lengths=rng.uniform(0.1, 0.45, size=num_segments),
+            base_directions=base_directions,
+            amplitudes=rng.uniform(0.1, 0.6, size=(num_segments, 3)),
+            frequencies=rng.uniform(0.5, 3.0, size=(num_segments, 3)),
+            phases=rng.uniform(0, 2 * np.pi, size=(num_segments, 3)),
+        )
+
+    def sample(self, movement_phase: np.ndarray) -> np.ndarray:
+        """Joint coordinates at the given points of the movement.
+
+        Args:
+            movement_phase: Non-decreasing movement phase of every frame, from 0 at
+                the start of the movement to 1 at its end.
+
+        Returns:
+            Array of shape (len(movement_phase), 61) with frame numbers in column 0.
+        """
+        num_frames = len(movement_phase)
+        data = np.zeros((num_frames, 61))
+        data[:, 0] = np.arange(1, num_frames + 1)
+        data[:, 1] = 0.05 * np.sin(2 * np.pi * movement_phase)
+        data[:, 2] = 0.9
+        data[:, 3] = 2.5 + 0.05 * np.cos(2 * np.pi * movement_phase)
+
+        oscillation = self.amplitudes * np.sin(
+            2 * np.pi * self.frequencies * movement_phase[:, None, None] + self.phases
+        )
+        directions = self.base_directions + oscillation
+        directions /= np.linalg.norm(directions, axis=2, keepdims=True)
+
+        for i, segment in enumerate(DEFAULT_JOINT_SEGMENTS):
+            start_indices = [coordinate[0] for coordinate in segment]
+            end_indices = [coordinate[1] for coordinate in segment]
+            data[:, end_indices] = (
+                data[:, start_indices] + self.bone_lengths[i] * directions[:, i]
+            )
+
+        return data
+
+
+def time_warp(
+    num_frames: int, rng: np.random.Generator, strength: float = 0.3
+) -> np.ndarray:
+    """Random smooth, strictly increasing movement phase from 0 to 1.
+
+    Args:
+        num_frames: Number of frames to generate.
+        rng: Random generator.
+        strength: Relative amplitude of the speed changes, between 0 and 1.
+
+    Returns:
+        Movement phase of every frame.
+    """
+    time = np.linspace(0, 1, num_frames)
+    speed = 1 + strength * np.sin(
+        2 * np.pi * (rng.uniform(0.5, 2.0) * time + rng.uniform(0, 1))
+    )
+    phase = np.concatenate(([0], np.cumsum((speed[1:] + speed[:-1]) / 2)))
+    return phase / phase[-1] if phase[-1] > 0 else time
+
+
+def skeleton_pair(
+    num_frames_gold: int,
+    num_frames_subject: int,
+    rng: np.random.Generator,
+    noise: float = 0.01,
+    motion: Optional[SkeletonMotion] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """A gold recording and a time-warped, noisy repetition of the same movement.
+
+    Args:
+        num_frames_gold: Number of gold frames.
+        num_frames_subject: Number of subject frames.
+        rng: Random generator.
+        noise: Standard deviation of the joint noise added to the subject, in meters.
+        motion: Movement to record. A random movement is drawn if None.
+
+    Returns:
+        Gold and subject arrays of shape (frames, 61).
+    """
+    if motion is None:
+        motion = SkeletonMotion.random(rng)
+    gold = motion.sample(np.linspace(0, 1, num_frames_gold))
+    subject = motion.sample(time_warp(num_frames_subject, rng))
+    subject[:, 1:] += rng.normal(scale=noise, size=(num_frames_subject, 60))
+    return gold, subject
@@ -0,0 +1,102 @@
+"""Synthetic Kinect and Zed workbooks with realistic seqN sheets.
+
+Every sheet holds one recording in the layout exported by the motion tracking
+software: optional preamble rows, a header row starting with 'frame', 'x_Hip', 'y_Hip',
+'z_Hip' and followed by the x, y, z columns of the other 19 joints, then one row per
+frame. `readers.read_participant_data` reads these files like the real exports.
+"""
+
+import pathlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import openpyxl
+
+from benchmarks import synthetic
+from mobi_motion_tracking.preprocessing import joint_index_list
+
+JOINT_NAMES = joint_index_list.JOINT_NAMES
+HEADER = ["frame"] + [f"{axis}_{joint}" for joint in JOINT_NAMES for axis in "xyz"]
+
+
+def write_workbook(
+    path: pathlib.Path,
+    sequences: Dict[int, np.ndarray],
+    preamble: Optional[Sequence[Sequence[object]]] = None,
+) -> pathlib.Path:
+    """Writes recordings to a workbook with one seqN sheet per sequence.
+
+    Args:
+        path: Path of the xlsx file to create.
+        sequences: Recording of every sequence number, each of shape (frames, 61)
+            with frame numbers in column 0.
+        preamble: Rows written above the header of every sheet, e.g. device
+            metadata. The x_Hip header is found below them when reading.
+
+    Returns:
+        The path of the written workbook.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    for sequence, data in sequences.items():
+        worksheet = workbook.create_sheet(f"seq{sequence}")
+        for row in preamble or []:
+            worksheet.append(list(row))
+        worksheet.append(HEADER)
+        for frame in data.tolist():
+            frame[0] = int(frame[0])
+            worksheet.append(frame)
+    workbook.save(path)
+    return path
+
+
+def write_study(
+    directory: pathlib.Path,
+    num_subjects: int,
+    num_frames: int,
+    sequences: Sequence[int] = (1,),
+    seed: int = 0,
+) -> tuple[pathlib.Path, List[pathlib.Path]]:
+    """Writes a gold workbook and subject workbooks repeating the same movements.
+
+    The gold workbook is written to `directory` and the subject workbooks to
+    `directory / "subjects"`, so the subject folder can be passed to
+    `orchestrator.run` as is. Subjects have between 80% and 120% of the gold frames.
+
+    Args:
+        directory: Existing directory to write into.
+        num_subjects: Number of subject workbooks.
+        num_frames: Number of gold frames of every sequence.
+        sequences: Sequence numbers written to every workbook.
+        seed: Seed of the random generator.
+
+    Returns:
+        The gold path and the subject paths.
+    """
+    rng = np.random.default_rng(seed)
+    motions = {sequence: synthetic.SkeletonMotion.random(rng) for sequence in sequences}
+    preamble = [["Device", "Kinect"], ["Recorded", "synthetic"], []]
+
+    gold_path = write_workbook(
+        directory / "Gold.xlsx",
+        {
+            sequence: motion.sample(np.linspace(0, 1, num_frames))
+            for sequence, motion in motions.items()
+        },
+        preamble,
+    )
+
+    subject_dir = directory / "subjects"
+    subject_dir.mkdir(exist_ok=True)
+    subject_paths = []
+    for i in range(num_subjects):
+        recordings = {}
+        for sequence, motion in motions.items():
+            num_subject_frames = int(num_frames * rng.uniform(0.8, 1.2))
+            _, recordings[sequence] = synthetic.skeleton_pair(
+                num_frames, num_subject_frames, rng, motion=motion
+            )
+        subject_paths.append(
+            write_workbook(subject_dir / f"{100 + i}.xlsx", recordings, preamble)
+        )
+
+    return gold_path, subject_paths
@@ -2,9 +2,12 @@
 
 import argparse
 import pathlib
-from typing import List, Optional
+import sys
+from typing import Dict, List, Optional
 
 from mobi_motion_tracking.core import orchestrator
+from mobi_motion_tracking.io.readers import frame_store, readers
+from mobi_motion_tracking.io.writers import writers
 
 
 def parse_sequence_list(sequence_str: str) -> List[int]:
@@ -12,6 +15,20 @@ def parse_sequence_list(sequence_str: str) -> List[int]:
     return [int(seq.strip()) for seq in sequence_str.split(",")]
 
 
+def parse_metric_list(metric_str: str) -> List[str]:
+    """Converts input metric string to List[str]."""
+    return [metric.strip() for metric in metric_str.split(",")]
+
+
+def parse_joint_weights(weights_str: str) -> Dict[str, float]:
+    """Converts input 'Joint=weight' pairs to Dict[str, float]."""
+    joint_weights = {}
+    for pair in weights_str.split(","):
+        name, _, weight = pair.partition("=")
+        joint_weights[name.strip()] = float(weight)
+    return joint_weights
+
+
 def parse_arguments(args: Optional[List[str]]) -> argparse.Namespace:
     """Argument parser for mobi-motion-tracking cli.
 
@@ -59,9 +76,365 @@ def parse_arguments(args: Optional[List[str]]) -> argparse.Namespace:
         "-a",
         "--algorithm",
         type=str,
-        choices=["dtw"],
+        choices=orchestrator.ALGORITHM_LIST,
+        required=True,
+        help="Pick which algorithm to use. 'fastdtw' is an approximate, linear time "
+        "alternative to 'dtw'. 'weighted_dtw' weighs joints by --joint-weights, "
+        "'derivative_dtw' aligns frame velocities instead of poses, and 'cosine_dtw' "
+        "compares the directions of the skeleton segments.",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--window",
+        type=int,
+        default=None,
+        help="Sakoe-Chiba window size for DTW. Only cells with |subject frame - gold "
+        "frame| <= window are computed and stored, so memory and time scale with "
+        "frames * window. If not given, the full cost matrix is used.",
+    )
+
+    parser.add_argument(
+        "-m",
+        "--metrics",
+        type=parse_metric_list,
+        default=["distance"],
+        help="String of comma seperated metric(s) to save. Can include 'distance', "
+        "'target_path' and 'experimental_path'. Path metrics require the full DTW "
+        "traceback, otherwise a faster distance-only mode is used.",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--radius",
+        type=int,
+        default=1,
+        help="Search radius of 'fastdtw' around the path projected from the coarser "
+        "resolution. Larger values are slower and closer to exact DTW.",
+    )
+
+    parser.add_argument(
+        "--joint-weights",
+        type=parse_joint_weights,
+        default=None,
+        help="Comma seperated 'Joint=weight' pairs of the 'weighted_dtw' algorithm, "
+        "e.g. 'RHand=2,LHand=2'. Joints that are not listed have weight 1.",
+    )
+
+    parser.add_argument(
+        "--reader",
+        type=str,
+        choices=readers.READER_LIST,
+        default="pandas",
+        help="Workbook reader. 'fast' streams sheets with openpyxl in read-only mode "
+        "instead of building pandas DataFrames, and returns identical data.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of the cleaned sheet cache. Sheets cached for unchanged "
+        "workbooks are loaded from there instead of being parsed again, and newly "
+        "parsed sheets are added. Fill it ahead of time with the 'convert' command.",
+    )
+
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        choices=readers.DTYPE_LIST,
+        default="float64",
+        help="Precision of the data, preprocessing and similarity computations. "
+        "'float32' halves the memory of the frames and cost matrices, and distances "
+        "differ from 'float64' by a relative 5e-6 or less on the benchmark data.",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes comparing the subjects of a directory. Results are "
+        "written in the same order as with a single worker.",
+    )
+
+    parser.add_argument(
+        "--path-format",
+        type=str,
+        choices=writers.PATH_FORMATS,
+        default="json",
+        help="How warping path metrics are saved. 'npz' stores them as int32 arrays "
+        "in results_<gold>_<date>.paths.<n>.npz files next to the NDJSON output, and "
+        "the NDJSON rows link to them by file and key.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record wall time, frames and peak memory of the read, clean, center, "
+        "average-length, normalize, similarity and write stages of every participant "
+        "and sequence. Prints a summary table and writes every record to "
+        "profile_<gold>_<date>.ndjson next to the results. Files are compared one at "
+        "a time, without batching or worker processes.",
+    )
+
+    parser.add_argument(
+        "--cprofile",
+        type=pathlib.Path,
+        default=None,
+        help="Run the first subject file under cProfile and dump its statistics to "
+        "this path, e.g. for snakeviz or pstats.",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip subject sequences that already have a result for this gold file "
+        "and algorithm in the output folder, e.g. after an interrupted run or for "
+        "nightly runs over a growing directory. A result is computed again when the "
+        "subject or gold file or the run options changed since it was "
+        "written.",
+    )
+
+    return parser.parse_args(args)
+
+
+def parse_convert_arguments(args: Optional[List[str]]) -> argparse.Namespace:
+    """Argument parser for the mobi-motion-tracking convert command.
+
+    Args:
+        args: A list of command line arguments given as strings, without the leading
+            'convert'.
+
+    Returns:
+        Namespace object with all the input arguments and default values.
+
+    Raises:
+        SystemExit: if arguments are None.
+    """
+    parser = argparse.ArgumentParser(
+        prog="mobi_motion_tracking convert",
+        description="Pre-convert workbooks into the cleaned sheet cache.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-d",
+        "--data",
+        type=pathlib.Path,
+        required=True,
+        help="Path to a workbook or a directory of workbooks.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        required=True,
+        help="Directory of the cleaned sheet cache.",
+    )
+
+    parser.add_argument(
+        "--reader",
+        type=str,
+        choices=readers.READER_LIST,
+        default="pandas",
+        help="Workbook reader used for the conversion.",
+    )
+
+    return parser.parse_args(args)
+
+
+def parse_store_arguments(args: Optional[List[str]]) -> argparse.Namespace:
+    """Argument parser for the mobi-motion-tracking store command.
+
+    Args:
+        args: A list of command line arguments given as strings, without the leading
+            'store'.
+
+    Returns:
+        Namespace object with all the input arguments and default values.
+
+    Raises:
+        SystemExit: if arguments are None.
+    """
+    parser = argparse.ArgumentParser(
+        prog="mobi_motion_tracking store",
+        description="Ingest workbooks into a memory-mapped frame store.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-d",
+        "--data",
+        type=pathlib.Path,
+        required=True,
+        help="Path to a workbook or a directory of workbooks.",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--store",
+        type=pathlib.Path,
+        required=True,
+        help="Directory of the frame store. An existing store is replaced.",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--sequence",
+        type=parse_sequence_list,
+        default=None,
+        help="String of comma seperated integer(s) indicating which sequences to "
+        "ingest. If not given, every seqN sheet is ingested.",
+    )
+
+    parser.add_argument(
+        "--reader",
+        type=str,
+        choices=readers.READER_LIST,
+        default="pandas",
+        help="Workbook reader used for the ingestion.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of the cleaned sheet cache.",
+    )
+
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        choices=frame_store.DTYPE_LIST,
+        default="float64",
+        help="Precision of the stored frames. 'float32' halves the store size.",
+    )
+
+    return parser.parse_args(args)
+
+
+def parse_pairwise_arguments(args: Optional[List[str]]) -> argparse.Namespace:
+    """Argument parser for the mobi-motion-tracking pairwise command.
+
+    Args:
+        args: A list of command line arguments given as strings, without the leading
+            'pairwise'.
+
+    Returns:
+        Namespace object with all the input arguments and default values.
+
+    Raises:
+        SystemExit: if arguments are None.
+    """
+    parser = argparse.ArgumentParser(
+        prog="mobi_motion_tracking pairwise",
+        description="Compute the all-vs-all distance matrix of a cohort.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-d",
+        "--data",
+        type=pathlib.Path,
         required=True,
-        help="Pick which algorithm to use. Can be 'dtw'.",
+        help="Directory of subject workbooks, or a frame store built with the "
+        "'store' command.",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--sequence",
+        type=parse_sequence_list,
+        required=True,
+        help="String of comma seperated integer(s) indicating which sequences to "
+        "compute a matrix for.",
+    )
+
+    parser.add_argument(
+        "-a",
+        "--algorithm",
+        type=str,
+        choices=orchestrator.ALGORITHM_LIST,
+        default="dtw",
+        help="Pick which algorithm to use, see the main command.",
+    )
+
+    parser.add_argument(
+        "-g",
+        "--gold",
+        type=pathlib.Path,
+        default=None,
+        help="Gold data file whose segment lengths every participant is normalized "
+        "to. If not given, the mean segment lengths of the cohort are used.",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of the pairwise_<algorithm>_seq<N>.npz matrices. Defaults to "
+        "the data directory.",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--window",
+        type=int,
+        default=None,
+        help="Sakoe-Chiba window size for DTW.",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--radius",
+        type=int,
+        default=1,
+        help="Search radius of 'fastdtw'.",
+    )
+
+    parser.add_argument(
+        "--joint-weights",
+        type=parse_joint_weights,
+        default=None,
+        help="Comma seperated 'Joint=weight' pairs of the 'weighted_dtw' algorithm, "
+        "e.g. 'RHand=2,LHand=2'. Joints that are not listed have weight 1.",
+    )
+
+    parser.add_argument(
+        "--reader",
+        type=str,
+        choices=readers.READER_LIST,
+        default="pandas",
+        help="Workbook reader used when the data directory holds workbooks.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        default=None,
+        help="Directory of the cleaned sheet cache.",
+    )
+
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        choices=readers.DTYPE_LIST,
+        default="float64",
+        help="Precision of the data and distance computations. Frames of a frame "
+        "store are converted to it.",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes computing rows of the matrix.",
+    )
+
+    parser.add_argument(
+        "--checkpoint-seconds",
+        type=float,
+        default=60.0,
+        help="Minimum time between two checkpoints of the finished rows. A run "
+        "started again with the same inputs and options resumes from the checkpoint.",
     )
 
     return parser.parse_args(args)
@@ -69,16 +442,63 @@ def parse_arguments(args: Optional[List[str]]) -> argparse.Namespace:
 
 def main(
     args: Optional[List[str]] = None,
-) -> list[dict]:
+) -> list:
     """Runs motion tracking orchestrator with command line arguments.
 
+    When the first argument is 'convert', 'store' or 'pairwise', the remaining
+    arguments are passed to that command instead.
+
     Args:
          args: A list of command line arguments given as strings. If None, the parser
             will take the args from `sys.argv`.
 
     Returns:
-        A result dict containing saved metrics for specified sequences for all subjects.
+        A result dict containing saved metrics for specified sequences for all subjects,
+            the list of converted workbooks for the convert command, the stored
+            (participant_ID, sequence) pairs for the store command, or the written
+            matrix paths for the pairwise command.
     """
+    if args is None:
+        args = sys.argv[1:]
+
+    if args and args[0] == "convert":
+        convert_arguments = parse_convert_arguments(args[1:])
+        return orchestrator.convert(
+            experimental_path=convert_arguments.data,
+            cache_dir=convert_arguments.cache_dir,
+            reader=convert_arguments.reader,
+        )
+
+    if args and args[0] == "store":
+        store_arguments = parse_store_arguments(args[1:])
+        store = orchestrator.build_store(
+            experimental_path=store_arguments.data,
+            store_dir=store_arguments.store,
+            sequence=store_arguments.sequence,
+            reader=store_arguments.reader,
+            cache_dir=store_arguments.cache_dir,
+            dtype=store_arguments.dtype,
+        )
+        return store.keys()
+
+    if args and args[0] == "pairwise":
+        pairwise_arguments = parse_pairwise_arguments(args[1:])
+        return orchestrator.pairwise_distances(
+            experimental_path=pairwise_arguments.data,
+            sequence=pairwise_arguments.sequence,
+            output_dir=pairwise_arguments.output_dir,
+            gold_path=pairwise_arguments.gold,
+            algorithm=pairwise_arguments.algorithm,
+            window_size=pairwise_arguments.window,
+            radius=pairwise_arguments.radius,
+            joint_weights=pairwise_arguments.joint_weights,
+            reader=pairwise_arguments.reader,
+            cache_dir=pairwise_arguments.cache_dir,
+            dtype=pairwise_arguments.dtype,
+            workers=pairwise_arguments.workers,
+            checkpoint_seconds=pairwise_arguments.checkpoint_seconds,
+        )
+
     arguments = parse_arguments(args)
 
     results = orchestrator.run(
@@ -86,6 +506,18 @@ def main(
         gold_path=arguments.gold,
         sequence=arguments.sequence,
         algorithm=arguments.algorithm,
+        window_size=arguments.window,
+        selected_metrics=arguments.metrics,
+        radius=arguments.radius,
+        joint_weights=arguments.joint_weights,
+        reader=arguments.reader,
+        cache_dir=arguments.cache_dir,
+        dtype=arguments.dtype,
+        workers=arguments.workers,
+        path_format=arguments.path_format,
+        profile=arguments.profile,
+        cprofile_path=arguments.cprofile,
+        resume=arguments.resume,
     )
 
     return results
@@ -0,0 +1,89 @@
+"""Cache of preprocessed gold-standard data shared across subjects."""
+
+import dataclasses
+import pathlib
+from typing import Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+from mobi_motion_tracking.core import models, profiling
+from mobi_motion_tracking.io.readers import readers
+from mobi_motion_tracking.preprocessing import preprocessing
+
+
+@dataclasses.dataclass
+class GoldReference:
+    """Preprocessed gold-standard data for one sequence.
+
+    Attributes:
+        gold: gold-standard participant data, centered to the hip.
+        average_lengths: average segment lengths of the centered gold data, used to
+            normalize the subjects compared against it.
+    """
+
+    gold: models.ParticipantData
+    average_lengths: np.ndarray
+
+
+@dataclasses.dataclass
+class GoldCache:
+    """Reads and preprocesses every gold-standard sequence only once.
+
+    Entries are keyed by the resolved gold path, its modification time, and the
+    sequence number, so a gold file that changes on disk is read again.
+
+    Attributes:
+        reader: Reader backend used on cache misses, see readers.READER_LIST.
+        cache_dir: Optional directory of the cleaned sheet cache used on misses.
+        dtype: 'float64' or 'float32' gold data.
+        hits: Number of lookups served from the cache.
+        misses: Number of lookups that read and preprocessed the gold file.
+    """
+
+    reader: Literal["pandas", "fast"] = "pandas"
+    cache_dir: Optional[pathlib.Path] = None
+    dtype: Literal["float64", "float32"] = "float64"
+    hits: int = 0
+    misses: int = 0
+    _entries: Dict[Tuple[pathlib.Path, int, int], GoldReference] = dataclasses.field(
+        default_factory=dict, repr=False
+    )
+
+    def get(
+        self,
+        gold_path: pathlib.Path,
+        sequence: int,
+        profiler: Optional[profiling.StageProfiler] = None,
+    ) -> GoldReference:
+        """Return the preprocessed gold data of a sequence.
+
+        Args:
+            gold_path: Path to the gold-standard motion tracking data file.
+            sequence: integer value indicating the sequence to return.
+            profiler: Optional profiler recording the stages run on a cache miss.
+
+        Returns:
+            GoldReference with the centered gold data and its average segment
+                lengths.
+        """
+        key = (gold_path.resolve(), gold_path.stat().st_mtime_ns, sequence)
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        gold = readers.read_participant_sequences(
+            gold_path, [sequence], self.reader, self.cache_dir, profiler, self.dtype
+        )[sequence]
+        participant_ID, sheetname = gold.participant_ID, gold.sequence_sheetname
+        with profiling.stage(profiler, "center", participant_ID, sheetname) as record:
+            gold.data = preprocessing.center_joints_to_hip(gold.data)
+            record.frames = len(gold.data)
+        with profiling.stage(
+            profiler, "average_length", participant_ID, sheetname
+        ) as record:
+            average_lengths = preprocessing.get_average_length(gold.data)
+            record.frames = len(gold.data)
+        reference = GoldReference(gold=gold, average_lengths=average_lengths)
+        self._entries[key] = reference
+        return reference
@@ -1,7 +1,7 @@
 """Dataclass storing all similarity metrics."""
 
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -21,23 +21,34 @@ class SimilarityMetrics:
 
     @classmethod
     def from_dtw(
-        cls, distance: float, warping_path: list[tuple[int, int]]
+        cls,
+        distance: float,
+        warping_path: Optional[Union[np.ndarray, List[Tuple[int, int]]]] = None,
+        method: str = "DTW",
     ) -> "SimilarityMetrics":
         """Creates a SimilarityMetrics instance from DTW output.
 
         Args:
             distance: The cumulative distance between experimental and target sequences.
-            warping_path: A list of tuples representing the warping path.
+            warping_path: The warping path, as an (L, 2) array or a list of tuples. If
+                None, as for distance-only DTW, no path metrics are stored.
+            method: Name of the DTW variant that produced the output.
 
         Returns:
-            A SimilarityMetrics instance storing DTW-specific metrics.
+            A SimilarityMetrics instance storing DTW-specific metrics. The path
+                metrics are int32 views of the columns of the warping path; writers
+                convert them to lists when serializing.
         """
+        if warping_path is None:
+            return cls(method=method, metrics={"distance": distance})
+
+        path = np.asarray(warping_path, dtype=np.int32).reshape(-1, 2)
         return cls(
-            method="DTW",
+            method=method,
             metrics={
                 "distance": distance,
-                "target_path": ([p[0] for p in warping_path]),
-                "experimental_path": ([p[1] for p in warping_path]),
+                "target_path": path[:, 0],
+                "experimental_path": path[:, 1],
             },
         )
 
@@ -55,3 +66,22 @@ class ParticipantData:
     participant_ID: str
     sequence_sheetname: str
     data: np.ndarray
+
+
+@dataclass
+class NeighborSearchResult:
+    """Stores the outcome of a nearest-neighbour DTW search.
+
+    Attributes:
+        neighbors: (label, distance) of the nearest candidates, closest first.
+        pruned_by_kim: Number of candidates discarded by the LB_Kim lower bound.
+        pruned_by_keogh: Number of candidates discarded by the LB_Keogh lower bound.
+        abandoned: Number of candidates whose exact DTW was abandoned early.
+        computed: Number of candidates whose exact DTW distance was computed.
+    """
+
+    neighbors: List[Tuple[str, float]] = field(default_factory=list)
+    pruned_by_kim: int = 0
+    pruned_by_keogh: int = 0
+    abandoned: int = 0
+    computed: int = 0
@@ -1,26 +1,60 @@
 """Python based runner."""
 
+import concurrent.futures
+import contextlib
+import cProfile
+import dataclasses
+import datetime
+import functools
+import json
 import pathlib
-from typing import Literal
+from typing import Callable, ContextManager, Dict, Iterator, Literal, Optional, Tuple
 
-from mobi_motion_tracking.io.readers import readers
+import numpy as np
+
+from mobi_motion_tracking.core import gold_cache, models, pairwise, profiling
+from mobi_motion_tracking.io.readers import frame_store, readers
 from mobi_motion_tracking.io.writers import writers
 from mobi_motion_tracking.preprocessing import preprocessing
-from mobi_motion_tracking.processing import similarity_functions
+from mobi_motion_tracking.processing import cost_kernels, similarity_functions
 
-ALGORITHM_LIST = ["dtw"]
+ALGORITHM_LIST = ["dtw", "fastdtw"] + cost_kernels.KERNEL_LIST
+METHOD_NAMES = {
+    "dtw": "DTW",
+    "fastdtw": "FastDTW",
+    "weighted_dtw": cost_kernels.WeightedKernel.method,
+    "derivative_dtw": cost_kernels.DerivativeKernel.method,
+    "cosine_dtw": cost_kernels.CosineKernel.method,
+}
+Algorithm = Literal["dtw", "fastdtw", "weighted_dtw", "derivative_dtw", "cosine_dtw"]
+PATH_METRICS = ["target_path", "experimental_path"]
+METRIC_LIST = ["distance"] + PATH_METRICS
 
 
 def run(
     experimental_path: pathlib.Path,
     gold_path: pathlib.Path,
     sequence: list[int],
-    algorithm: Literal["dtw"] = "dtw",
+    algorithm: Algorithm = "dtw",
+    window_size: Optional[int] = None,
+    selected_metrics: Optional[list[str]] = None,
+    radius: int = 1,
+    joint_weights: Optional[Dict[str, float]] = None,
+    reader: Literal["pandas", "fast"] = "pandas",
+    cache_dir: Optional[pathlib.Path] = None,
+    dtype: Literal["float64", "float32"] = "float64",
+    workers: int = 1,
+    path_format: Literal["json", "npz"] = "json",
+    profile: bool = False,
+    cprofile_path: Optional[pathlib.Path] = None,
+    resume: bool = False,
+    output_dir: Optional[pathlib.Path] = None,
 ) -> list:
     """Checks if experimental path is a directory or file, calls run_file.
 
     This function determines whether the experimental path is a directory or a single
-    file and processes each subject's data accordingly by calling `run_file`.
+    file and processes each subject's data accordingly by calling `run_file`. The gold
+    data of each sequence is read and preprocessed once and shared by all subjects.
 
     Args:
         experimental_path: Path to the subject's motion tracking data
@@ -28,6 +62,42 @@ def run(
         gold_path: Path to the gold-standard motion tracking data file.
         sequence: List of sequence numbers to process.
         algorithm: Name of the algorithm to use for similarity computation.
+        window_size: Optional Sakoe-Chiba window size passed to the similarity
+            function. If None, no window constraint is applied.
+        selected_metrics: Metrics saved for every subject and sequence. Defaults to
+            ['distance']. When none of PATH_METRICS is selected, the similarity
+            function runs in its distance-only mode.
+        radius: Search radius of the 'fastdtw' algorithm.
+        joint_weights: Weights of the 'weighted_dtw' algorithm by joint name, see
+            cost_kernels.WeightedKernel. Joints that are not named have weight 1.
+        reader: Workbook reader backend, 'pandas' or the streaming 'fast' reader.
+        cache_dir: Optional directory of the cleaned sheet cache. Sheets found there
+            for unchanged workbooks are not parsed again.
+        dtype: Precision of the subject and gold data, see readers.DTYPE_LIST. With
+            'float32', preprocessing and the similarity functions also compute in
+            float32, which halves the memory of the frames and cost matrices at the
+            price of slightly less precise distances.
+        workers: Number of processes comparing the files of a directory. With more
+            than one worker, subjects are compared in parallel while results are
+            still written by this process only, in the same order as serially.
+        path_format: 'json' writes warping paths into the NDJSON rows, 'npz' stores
+            them as int32 arrays in a sidecar archive linked from the rows.
+        profile: Record the wall time, frames and peak memory of every stage of
+            every participant and sequence. A summary table is printed and the
+            records are written to profile_<gold>_<date>.ndjson in the output
+            folder. Files are then compared one at a time with run_file, without
+            batching or worker processes, so the stages can be told apart.
+        cprofile_path: If given, the first file is run under cProfile and its
+            statistics are dumped to this path. Implies one file at a time as with
+            profile.
+        resume: Skip the sequences that already have a result for this gold file
+            and method in any results file of the output folder, and only read the
+            remaining ones. Results are written with the fingerprints (size and
+            modification time) of the subject and gold files and the run options,
+            and a result is computed again when either file or an option changed
+            since, or when its linked warping paths no longer load.
+        output_dir: Directory of the results files. Defaults to experimental_path,
+            or to its folder when it is a file.
 
     Returns:
         list of lists containing metadata and specified metrics for each
@@ -36,31 +106,138 @@ def run(
     Raises:
         FileNotFoundError: Input 'experimental_path' doesn't exist.
         ValueError: if algorithm is unsupported.
+        ValueError: if a selected metric is not in METRIC_LIST.
+        ValueError: if joint_weights are invalid or given for another algorithm
+            than 'weighted_dtw'.
+        ValueError: if dtype is unsupported.
         TypeError: If `experimental_path` is not a file or directory.
     """
     outputs = []
 
     if algorithm not in ALGORITHM_LIST:
         raise ValueError("Unsupported algorithm provided.")
+    _check_metrics(selected_metrics)
+    _similarity_function(algorithm, window_size, radius, joint_weights)
+    if dtype not in readers.DTYPE_LIST:
+        raise ValueError("Unsupported dtype selected.")
+
+    cache = gold_cache.GoldCache(reader=reader, cache_dir=cache_dir, dtype=dtype)
 
     if experimental_path.is_dir():
-        for file in experimental_path.iterdir():
-            output_dir = experimental_path
-            try:
+        default_output_dir = experimental_path
+    elif experimental_path.is_file():
+        default_output_dir = experimental_path.parent
+    else:
+        raise FileNotFoundError("Input path does not exist.")
+    if output_dir is None:
+        output_dir = default_output_dir
+
+    files = (
+        [experimental_path]
+        if experimental_path.is_file()
+        else sorted(experimental_path.iterdir())
+    )
+    file_sequences = {file: sequence for file in files}
+    row_fields = None
+    if resume:
+        file_sequences, row_fields = _pending_sequences(
+            files,
+            gold_path,
+            output_dir,
+            sequence,
+            algorithm,
+            window_size=window_size,
+            radius=radius,
+            joint_weights=joint_weights,
+            dtype=dtype,
+            selected_metrics=selected_metrics,
+            path_format=path_format,
+        )
+
+    profiler = profiling.StageProfiler() if profile else None
+
+    with (
+        writers.ResultSink(
+            output_dir, path_format=path_format, row_fields=row_fields
+        ) as sink,
+        profiler if profiler is not None else contextlib.nullcontext(),
+    ):
+        if profiler is not None or cprofile_path is not None:
+            outputs = _run_profiled(
+                file_sequences,
+                gold_path,
+                output_dir,
+                sink,
+                algorithm,
+                window_size=window_size,
+                selected_metrics=selected_metrics,
+                radius=radius,
+                joint_weights=joint_weights,
+                reader=reader,
+                cache_dir=cache_dir,
+                dtype=dtype,
+                cache=cache,
+                profiler=profiler,
+                cprofile_path=cprofile_path,
+                skip_invalid=experimental_path.is_dir(),
+            )
+        elif experimental_path.is_file():
+            for file, file_sequence in file_sequences.items():
                 subject_output = run_file(
-                    file, gold_path, output_dir, sequence, algorithm
+                    file,
+                    gold_path,
+                    output_dir,
+                    file_sequence,
+                    algorithm,
+                    window_size=window_size,
+                    selected_metrics=selected_metrics,
+                    radius=radius,
+                    joint_weights=joint_weights,
+                    reader=reader,
+                    cache_dir=cache_dir,
+                    dtype=dtype,
+                    cache=cache,
+                    sink=sink,
                 )
                 outputs.append(subject_output)
-            except ValueError as ve:
-                print(f"Skipping file: {ve}")
-    elif experimental_path.is_file():
-        output_dir = experimental_path.parent
-        subject_output = run_file(
-            experimental_path, gold_path, output_dir, sequence, algorithm
+        elif workers > 1:
+            outputs = _run_parallel(
+                file_sequences,
+                gold_path,
+                sink,
+                algorithm,
+                window_size=window_size,
+                selected_metrics=selected_metrics,
+                radius=radius,
+                joint_weights=joint_weights,
+                reader=reader,
+                cache_dir=cache_dir,
+                dtype=dtype,
+                workers=workers,
+            )
+        else:
+            outputs = _run_batched(
+                file_sequences,
+                gold_path,
+                sink,
+                algorithm,
+                window_size=window_size,
+                selected_metrics=selected_metrics,
+                radius=radius,
+                joint_weights=joint_weights,
+                reader=reader,
+                cache_dir=cache_dir,
+                dtype=dtype,
+                cache=cache,
+            )
+
+    if profiler is not None:
+        trace_path = profiler.write_trace(
+            output_dir
+            / f"profile_{gold_path.stem}_{datetime.datetime.now():%m%d%Y}.ndjson"
         )
-        outputs.append(subject_output)
-    else:
-        raise FileNotFoundError("Input path does not exist.")
+        print(profiler.format_summary())
+        print(f"Profile trace written to {trace_path}")
 
     return outputs
 
@@ -70,7 +247,18 @@ def run_file(
     gold_path: pathlib.Path,
     output_dir: pathlib.Path,
     sequence: list[int],
-    algorithm: Literal["dtw"] = "dtw",
+    algorithm: Algorithm = "dtw",
+    window_size: Optional[int] = None,
+    selected_metrics: Optional[list[str]] = None,
+    radius: int = 1,
+    joint_weights: Optional[Dict[str, float]] = None,
+    reader: Literal["pandas", "fast"] = "pandas",
+    cache_dir: Optional[pathlib.Path] = None,
+    dtype: Literal["float64", "float32"] = "float64",
+    cache: Optional[gold_cache.GoldCache] = None,
+    sink: Optional[writers.ResultSink] = None,
+    path_format: Literal["json", "npz"] = "json",
+    profiler: Optional[profiling.StageProfiler] = None,
 ) -> list:
     """Performs main processing steps for a subject, per sequence.
 
@@ -86,20 +274,414 @@ def run_file(
         output_dir: Directory where similarity results should be saved.
         sequence: List of sequence numbers to process.
         algorithm: Name of the algorithm to use for similarity computation.
+        window_size: Optional Sakoe-Chiba window size passed to the similarity
+            function. If None, no window constraint is applied.
+        selected_metrics: Metrics saved for every subject and sequence. Defaults to
+            ['distance']. When none of PATH_METRICS is selected, the similarity
+            function runs in its distance-only mode.
+        radius: Search radius of the 'fastdtw' algorithm.
+        joint_weights: Weights of the 'weighted_dtw' algorithm by joint name, see
+            cost_kernels.WeightedKernel. Joints that are not named have weight 1.
+        reader: Workbook reader backend, 'pandas' or the streaming 'fast' reader.
+        cache_dir: Optional directory of the cleaned sheet cache.
+        dtype: Precision of the subject data, and of the gold data when cache is
+            None, see run.
+        cache: Cache of preprocessed gold data shared across calls. If None, a new
+            cache is used for this file only.
+        sink: Open result writer shared across calls. If None, results are written
+            to output_dir through a sink that is closed when the file is done.
+        path_format: Path format of the sink opened when sink is None.
+        profiler: Optional profiler recording the read, clean, center,
+            average-length, normalize, similarity and write stages of this file.
+            Gold stages are only recorded when the gold data is not cached yet.
 
     Returns:
         list of dictionaries being written to the output file.
 
     Raises:
         ValueError: Unsupported algorithm selected.
+        ValueError: Unsupported metric selected.
         ValueError: Invalid file extension.
         ValueError: Subject or gold file is named incorrectly.
     """
+    _check_metrics(selected_metrics)
+    if selected_metrics is None:
+        selected_metrics = ["distance"]
+
+    results_list = []
+    with (
+        writers.ResultSink(output_dir, path_format=path_format)
+        if sink is None
+        else contextlib.nullcontext(sink)
+    ) as file_sink:
+        for gold, subject, similarity_metric in _compare_file(
+            file_path,
+            gold_path,
+            sequence,
+            algorithm,
+            window_size=window_size,
+            selected_metrics=selected_metrics,
+            radius=radius,
+            joint_weights=joint_weights,
+            reader=reader,
+            cache_dir=cache_dir,
+            dtype=dtype,
+            cache=cache,
+            profiler=profiler,
+        ):
+            with profiling.stage(
+                profiler, "write", subject.participant_ID, subject.sequence_sheetname
+            ):
+                results = file_sink.write(
+                    gold,
+                    subject,
+                    similarity_metric,
+                    selected_metrics=selected_metrics,
+                )
+            results_list.append(results)
+
+    return results_list
+
+
+def convert(
+    experimental_path: pathlib.Path,
+    cache_dir: pathlib.Path,
+    reader: Literal["pandas", "fast"] = "pandas",
+) -> list[pathlib.Path]:
+    """Pre-convert workbooks into the cleaned sheet cache.
+
+    Every seqN sheet of every .xlsx workbook is cleaned and stored in cache_dir, so
+    later runs with the same cache_dir skip Excel parsing for these workbooks.
+
+    Args:
+        experimental_path: Path to a workbook or a directory of workbooks.
+        cache_dir: Directory of the cleaned sheet cache.
+        reader: Workbook reader backend, 'pandas' or the streaming 'fast' reader.
+
+    Returns:
+        list of workbooks that were converted.
+
+    Raises:
+        FileNotFoundError: Input 'experimental_path' doesn't exist.
+    """
+    if experimental_path.is_dir():
+        files = sorted(experimental_path.iterdir())
+    elif experimental_path.is_file():
+        files = [experimental_path]
+    else:
+        raise FileNotFoundError("Input path does not exist.")
+
+    converted = []
+    for file in files:
+        if file.suffix != ".xlsx":
+            continue
+        try:
+            readers.read_participant_sequences(
+                file, readers.list_sequences(file), reader, cache_dir
+            )
+        except (ValueError, IndexError) as error:
+            print(f"Skipping file: {file}: {error}")
+            continue
+        converted.append(file)
+
+    return converted
+
+
+def build_store(
+    experimental_path: pathlib.Path,
+    store_dir: pathlib.Path,
+    sequence: Optional[list[int]] = None,
+    reader: Literal["pandas", "fast"] = "pandas",
+    cache_dir: Optional[pathlib.Path] = None,
+    dtype: Literal["float64", "float32"] = "float64",
+) -> frame_store.FrameStore:
+    """Ingest workbooks into a memory-mapped frame store.
+
+    Args:
+        experimental_path: Path to a workbook or a directory of workbooks.
+        store_dir: Directory of the frame store. An existing store is replaced.
+        sequence: Sequences to ingest. If None, every seqN sheet is ingested.
+        reader: Workbook reader backend, 'pandas' or the streaming 'fast' reader.
+        cache_dir: Optional directory of the cleaned sheet cache.
+        dtype: 'float64' or 'float32' frame values.
+
+    Returns:
+        The opened frame store.
+
+    Raises:
+        FileNotFoundError: Input 'experimental_path' doesn't exist.
+    """
+    if experimental_path.is_dir():
+        files = sorted(experimental_path.iterdir())
+    elif experimental_path.is_file():
+        files = [experimental_path]
+    else:
+        raise FileNotFoundError("Input path does not exist.")
+
+    return frame_store.FrameStore.build(
+        store_dir,
+        [file for file in files if file.suffix == ".xlsx"],
+        sequences=sequence,
+        reader=reader,
+        cache_dir=cache_dir,
+        dtype=dtype,
+    )
+
+
+def pairwise_distances(
+    experimental_path: pathlib.Path,
+    sequence: list[int],
+    output_dir: Optional[pathlib.Path] = None,
+    gold_path: Optional[pathlib.Path] = None,
+    algorithm: Algorithm = "dtw",
+    window_size: Optional[int] = None,
+    radius: int = 1,
+    joint_weights: Optional[Dict[str, float]] = None,
+    reader: Literal["pandas", "fast"] = "pandas",
+    cache_dir: Optional[pathlib.Path] = None,
+    dtype: Literal["float64", "float32"] = "float64",
+    workers: int = 1,
+    checkpoint_seconds: float = 60.0,
+) -> list[pathlib.Path]:
+    """Compute the all-vs-all distance matrix of every sequence of a cohort.
+
+    Every participant and sequence is read and preprocessed once, see
+    pairwise.preprocess_cohort, and the upper triangle of the distance matrix is
+    computed by pairwise.distance_matrix. The matrix of each sequence is written to
+    pairwise_<algorithm>_seq<N>.npz with the participant IDs as labels. An
+    interrupted run resumes from its checkpoint when it is started again with the
+    same inputs and options.
+
+    Args:
+        experimental_path: A workbook directory, or a frame store directory built
+            with the store command.
+        sequence: List of sequence numbers to process.
+        output_dir: Directory of the matrices. Defaults to experimental_path.
+        gold_path: Optional gold-standard file whose segment lengths every
+            participant is normalized to, as in run. If None, the mean segment
+            lengths of the cohort are used.
+        algorithm: Name of the algorithm to use for similarity computation.
+        window_size: Optional Sakoe-Chiba window size of 'dtw'.
+        radius: Search radius of the 'fastdtw' algorithm.
+        joint_weights: Weights of the 'weighted_dtw' algorithm by joint name, see
+            cost_kernels.WeightedKernel. Joints that are not named have weight 1.
+        reader: Workbook reader backend, 'pandas' or the streaming 'fast' reader.
+        cache_dir: Optional directory of the cleaned sheet cache.
+        dtype: Precision of the participant data and distances, see run. Frames of
+            a frame store are converted to it.
+        workers: Number of processes computing matrix rows.
+        checkpoint_seconds: Minimum time between two checkpoint writes.
+
+    Returns:
+        list of the written matrix paths, one per sequence.
+
+    Raises:
+        FileNotFoundError: Input 'experimental_path' is not a directory.
+        ValueError: if algorithm is unsupported.
+        ValueError: if joint_weights are invalid or given for another algorithm
+            than 'weighted_dtw'.
+        ValueError: if dtype is unsupported.
+    """
+    if algorithm not in ALGORITHM_LIST:
+        raise ValueError("Unsupported algorithm provided.")
+    if dtype not in readers.DTYPE_LIST:
+        raise ValueError("Unsupported dtype selected.")
+    if not experimental_path.is_dir():
+        raise FileNotFoundError("Input path does not exist.")
+    similarity_function: Optional[Callable[..., models.SimilarityMetrics]] = (
+        _similarity_function(algorithm, window_size, radius, joint_weights)
+    )
     if algorithm == "dtw":
-        similarity_function = similarity_functions.dynamic_time_warping
+        similarity_function = None
+    if output_dir is None:
+        output_dir = experimental_path
+
+    if (experimental_path / frame_store.INDEX_FILE).exists():
+        store = frame_store.FrameStore(experimental_path)
+        cohorts = {
+            seq: [
+                _with_dtype(store.get(participant_ID, seq), dtype)
+                for participant_ID, stored_seq in store.keys()
+                if stored_seq == seq
+            ]
+            for seq in sequence
+        }
+        inputs = {
+            frame_store.FRAMES_FILE: writers.file_fingerprint(
+                experimental_path / frame_store.FRAMES_FILE
+            )
+        }
     else:
-        raise ValueError("Unsupported algorithm selected.")
+        cohorts, inputs = _read_cohorts(
+            sorted(experimental_path.iterdir()), sequence, reader, cache_dir, dtype
+        )
+
+    cache = gold_cache.GoldCache(reader=reader, cache_dir=cache_dir, dtype=dtype)
+    output_paths = []
+    for seq, participants in cohorts.items():
+        output_path = output_dir / f"pairwise_{algorithm}_seq{seq}.npz"
+        checkpoint_key = json.dumps(
+            {
+                "method": METHOD_NAMES[algorithm],
+                "window_size": window_size,
+                "radius": radius,
+                "joint_weights": joint_weights,
+                "dtype": dtype,
+                "sequence": seq,
+                "gold": None
+                if gold_path is None
+                else writers.file_fingerprint(gold_path),
+                "inputs": inputs,
+            },
+            sort_keys=True,
+        )
+        pairwise.distance_matrix(
+            pairwise.preprocess_cohort(
+                participants,
+                None
+                if gold_path is None
+                else cache.get(gold_path, seq).average_lengths,
+            ),
+            output_path,
+            checkpoint_key,
+            similarity_function=similarity_function,
+            window_size=window_size,
+            workers=workers,
+            checkpoint_seconds=checkpoint_seconds,
+        )
+        output_paths.append(output_path)
+
+    return output_paths
+
+
+_ComparisonResult = Tuple[
+    models.ParticipantData, models.ParticipantData, models.SimilarityMetrics
+]
+
+# Number of subject files whose sequences are batched together in directory runs.
+_BATCH_FILES = 64
+
+# Gold cache of a worker process, created by _initialize_worker.
+_worker_cache: Optional[gold_cache.GoldCache] = None
+
+
+def _compare_file(
+    file_path: pathlib.Path,
+    gold_path: pathlib.Path,
+    sequence: list[int],
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    selected_metrics: list[str],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+    cache: Optional[gold_cache.GoldCache],
+    profiler: Optional[profiling.StageProfiler] = None,
+) -> Iterator[_ComparisonResult]:
+    """Compare the sequences of a subject file against the gold data.
+
+    Comparisons are yielded one sequence at a time, so callers can save each result
+    before the next sequence is read. See run_file for the arguments.
+
+    Yields:
+        (gold, subject, similarity metrics) of every sequence with subject data.
+
+    Raises:
+        ValueError: Unsupported algorithm selected.
+        ValueError: Invalid file extension.
+        ValueError: Subject or gold file is named incorrectly.
+    """
+    similarity_function = _similarity_function(
+        algorithm, window_size, radius, joint_weights
+    )
+    distance_only = not any(metric in PATH_METRICS for metric in selected_metrics)
+
+    for gold, subject in _prepare_file(
+        file_path, gold_path, sequence, reader, cache_dir, dtype, cache, profiler
+    ):
+        with profiling.stage(
+            profiler,
+            "similarity",
+            subject.participant_ID,
+            subject.sequence_sheetname,
+        ) as record:
+            similarity_metric = similarity_function(
+                gold.data,
+                subject.data,
+                distance_only=distance_only,
+            )
+            record.frames = len(subject.data)
+
+        yield gold, subject, similarity_metric
+
+
+def _check_metrics(selected_metrics: Optional[list[str]]) -> None:
+    """Reject metric names outside METRIC_LIST before any file is read.
+
+    Raises:
+        ValueError: Unsupported metric selected.
+    """
+    if selected_metrics is None:
+        return
+    for metric in selected_metrics:
+        if metric not in METRIC_LIST:
+            raise ValueError(f"Unsupported metric selected: {metric}")
+
+
+def _similarity_function(
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]] = None,
+) -> Callable[..., models.SimilarityMetrics]:
+    """Similarity function of an algorithm with its options bound.
+
+    Raises:
+        ValueError: Joint weights given for another algorithm than 'weighted_dtw'.
+        ValueError: Unsupported algorithm selected.
+        ValueError: Invalid joint weights.
+    """
+    if joint_weights is not None and algorithm != "weighted_dtw":
+        raise ValueError("Joint weights are only supported by weighted_dtw.")
+    if algorithm == "dtw":
+        return functools.partial(
+            similarity_functions.dynamic_time_warping, window_size=window_size
+        )
+    if algorithm == "fastdtw":
+        return functools.partial(
+            similarity_functions.fast_dynamic_time_warping, radius=radius
+        )
+    if algorithm in cost_kernels.KERNEL_LIST:
+        return functools.partial(
+            similarity_functions.kernel_dynamic_time_warping,
+            kernel=cost_kernels.build_kernel(algorithm, joint_weights),
+            window_size=window_size,
+        )
+    raise ValueError("Unsupported algorithm selected.")
+
+
+def _prepare_file(
+    file_path: pathlib.Path,
+    gold_path: pathlib.Path,
+    sequence: list[int],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+    cache: Optional[gold_cache.GoldCache],
+    profiler: Optional[profiling.StageProfiler] = None,
+) -> Iterator[Tuple[models.ParticipantData, models.ParticipantData]]:
+    """Read a subject file and preprocess its sequences against the gold data.
 
+    Yields:
+        (gold, subject) of every sequence with subject data, with the subject
+            centered and normalized to the gold segment lengths.
+
+    Raises:
+        ValueError: Invalid file extension.
+        ValueError: Subject or gold file is named incorrectly.
+    """
     if ".xlsx" != file_path.suffix:
         raise ValueError(f"Invalid file extension: {file_path}. Expected '.xlsx'.")
 
@@ -107,30 +689,473 @@ def run_file(
     if not (participant_ID.isdigit() or "gold" in participant_ID.lower()):
         raise ValueError("The input file is named incorrectly.")
 
-    results_list = []
-    for seq in sequence:
-        gold = readers.read_participant_data(gold_path, seq)
-        subject = readers.read_participant_data(file_path, seq)
+    if cache is None:
+        cache = gold_cache.GoldCache(reader=reader, cache_dir=cache_dir, dtype=dtype)
+
+    subjects = readers.read_participant_sequences(
+        file_path, sequence, reader, cache_dir, profiler, dtype
+    )
 
+    for seq, subject in subjects.items():
         if subject.data.size == 0:
             continue
 
-        gold.data = preprocessing.center_joints_to_hip(gold.data)
-        subject.data = preprocessing.center_joints_to_hip(subject.data)
-        gold_average_lengths = preprocessing.get_average_length(gold.data)
-        subject.data = preprocessing.normalize_segments(
-            subject.data, gold_average_lengths
-        )
+        reference = cache.get(gold_path, seq, profiler)
+        sheetname = subject.sequence_sheetname
+        with profiling.stage(profiler, "center", participant_ID, sheetname) as record:
+            subject.data = preprocessing.center_joints_to_hip(subject.data)
+            record.frames = len(subject.data)
+        with profiling.stage(
+            profiler, "normalize", participant_ID, sheetname
+        ) as record:
+            subject.data = preprocessing.normalize_segments(
+                subject.data, reference.average_lengths
+            )
+            record.frames = len(subject.data)
 
-        similarity_metric = similarity_function(gold.data, subject.data)
+        yield reference.gold, subject
 
-        results = writers.save_results_to_ndjson(
-            gold,
-            subject,
-            similarity_metric,
-            output_dir,
-            selected_metrics=["distance"],
+
+def _run_batched(
+    file_sequences: Dict[pathlib.Path, list[int]],
+    gold_path: pathlib.Path,
+    sink: writers.ResultSink,
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    selected_metrics: Optional[list[str]],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+    cache: gold_cache.GoldCache,
+) -> list:
+    """Compare the files of a directory, batching subjects of the same sequence.
+
+    Files are processed in chunks of _BATCH_FILES. All subjects of a chunk are read
+    and preprocessed first; with 'dtw', every sequence is then compared in one
+    batch_dynamic_time_warping call against its gold data. Results are saved in file
+    order, and files that fail with a ValueError are skipped as in run, after saving
+    the sequences they completed.
+
+    Returns:
+        list of lists containing metadata and specified metrics for each
+            subject.
+    """
+    if selected_metrics is None:
+        selected_metrics = ["distance"]
+    similarity_function = _similarity_function(
+        algorithm, window_size, radius, joint_weights
+    )
+    distance_only = not any(metric in PATH_METRICS for metric in selected_metrics)
+
+    files = list(file_sequences)
+    outputs = []
+    for chunk_start in range(0, len(files), _BATCH_FILES):
+        prepared: list[
+            Tuple[
+                list[Tuple[models.ParticipantData, models.ParticipantData]],
+                Optional[ValueError],
+            ]
+        ] = []
+        for file in files[chunk_start : chunk_start + _BATCH_FILES]:
+            pairs = []
+            try:
+                for pair in _prepare_file(
+                    file,
+                    gold_path,
+                    file_sequences[file],
+                    reader,
+                    cache_dir,
+                    dtype,
+                    cache,
+                ):
+                    pairs.append(pair)
+            except ValueError as ve:
+                prepared.append((pairs, ve))
+                continue
+            prepared.append((pairs, None))
+
+        subjects_by_gold: Dict[int, list[models.ParticipantData]] = {}
+        golds: Dict[int, models.ParticipantData] = {}
+        for pairs, _ in prepared:
+            for gold, subject in pairs:
+                subjects_by_gold.setdefault(id(gold), []).append(subject)
+                golds[id(gold)] = gold
+
+        metrics: Dict[int, models.SimilarityMetrics] = {}
+        for gold_id, subjects in subjects_by_gold.items():
+            if algorithm == "dtw":
+                gold_metrics = similarity_functions.batch_dynamic_time_warping(
+                    golds[gold_id].data,
+                    [subject.data for subject in subjects],
+                    window_size=window_size,
+                    distance_only=distance_only,
+                )
+            else:
+                gold_metrics = [
+                    similarity_function(
+                        golds[gold_id].data, subject.data, distance_only=distance_only
+                    )
+                    for subject in subjects
+                ]
+            metrics.update(
+                (id(subject), metric) for subject, metric in zip(subjects, gold_metrics)
+            )
+
+        for pairs, error in prepared:
+            try:
+                subject_output = [
+                    sink.write(
+                        gold,
+                        subject,
+                        metrics[id(subject)],
+                        selected_metrics=selected_metrics,
+                    )
+                    for gold, subject in pairs
+                ]
+                if error is not None:
+                    raise error
+                outputs.append(subject_output)
+            except ValueError as ve:
+                print(f"Skipping file: {ve}")
+
+    return outputs
+
+
+def _run_profiled(
+    file_sequences: Dict[pathlib.Path, list[int]],
+    gold_path: pathlib.Path,
+    output_dir: pathlib.Path,
+    sink: writers.ResultSink,
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    selected_metrics: Optional[list[str]],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+    cache: gold_cache.GoldCache,
+    profiler: Optional[profiling.StageProfiler],
+    cprofile_path: Optional[pathlib.Path],
+    skip_invalid: bool,
+) -> list:
+    """Compare files one at a time with run_file, recording their stages.
+
+    The first .xlsx file is run under cProfile when cprofile_path is given, and its
+    statistics are dumped there once it is done. With skip_invalid, files that fail
+    with a ValueError are skipped as in directory runs instead of raising.
+
+    Returns:
+        list of lists containing metadata and specified metrics for each
+            subject.
+    """
+    outputs = []
+    file_profiler: Optional[cProfile.Profile] = None
+    for file, sequence in file_sequences.items():
+        profile_context: ContextManager = contextlib.nullcontext()
+        if (
+            cprofile_path is not None
+            and file_profiler is None
+            and file.suffix == ".xlsx"
+        ):
+            file_profiler = cProfile.Profile()
+            profile_context = file_profiler
+        try:
+            with profile_context:
+                subject_output = run_file(
+                    file,
+                    gold_path,
+                    output_dir,
+                    sequence,
+                    algorithm,
+                    window_size=window_size,
+                    selected_metrics=selected_metrics,
+                    radius=radius,
+                    joint_weights=joint_weights,
+                    reader=reader,
+                    cache_dir=cache_dir,
+                    dtype=dtype,
+                    cache=cache,
+                    sink=sink,
+                    profiler=profiler,
+                )
+            outputs.append(subject_output)
+        except ValueError as ve:
+            if not skip_invalid:
+                raise
+            print(f"Skipping file: {ve}")
+        finally:
+            if profile_context is file_profiler and cprofile_path is not None:
+                file_profiler.dump_stats(cprofile_path)
+                print(f"cProfile statistics of {file} written to {cprofile_path}")
+
+    return outputs
+
+
+def _run_parallel(
+    file_sequences: Dict[pathlib.Path, list[int]],
+    gold_path: pathlib.Path,
+    sink: writers.ResultSink,
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    selected_metrics: Optional[list[str]],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+    workers: int,
+) -> list:
+    """Compare files in a process pool and save the results from this process.
+
+    Each worker keeps its own gold cache. Results are collected in the order of files
+    and written by the calling process only, so appends to the output file never
+    interleave. Files that fail with a ValueError are skipped as in run, after saving
+    the sequences they completed.
+
+    Returns:
+        list of lists containing metadata and specified metrics for each
+            subject.
+    """
+    if selected_metrics is None:
+        selected_metrics = ["distance"]
+
+    outputs = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initialize_worker,
+        initargs=(reader, cache_dir, dtype),
+    ) as executor:
+        futures = [
+            executor.submit(
+                _compare_file_in_worker,
+                file,
+                gold_path,
+                sequence,
+                algorithm,
+                window_size,
+                selected_metrics,
+                radius,
+                joint_weights,
+                reader,
+                cache_dir,
+                dtype,
+            )
+            for file, sequence in file_sequences.items()
+        ]
+
+        for future in futures:
+            comparisons, error = future.result()
+            try:
+                subject_output = [
+                    sink.write(
+                        gold,
+                        subject,
+                        similarity_metric,
+                        selected_metrics=selected_metrics,
+                    )
+                    for gold, subject, similarity_metric in comparisons
+                ]
+                if error is not None:
+                    raise error
+                outputs.append(subject_output)
+            except ValueError as ve:
+                print(f"Skipping file: {ve}")
+
+    return outputs
+
+
+def _pending_sequences(
+    files: list[pathlib.Path],
+    gold_path: pathlib.Path,
+    output_dir: pathlib.Path,
+    sequence: list[int],
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    dtype: Literal["float64", "float32"],
+    selected_metrics: Optional[list[str]],
+    path_format: Literal["json", "npz"],
+) -> Tuple[Dict[pathlib.Path, list[int]], Dict[str, Dict[str, str]]]:
+    """Sequences of every file without an up-to-date result, for resumed runs.
+
+    Files that are not workbooks keep all sequences, so they are reported as in
+    normal runs. Workbooks with nothing left to compare are dropped. Besides the
+    file fingerprints, results record the run options, so a run with another
+    window, radius, joint weights, dtype, metrics or path format computes them
+    again. Results written without options, by runs that did not resume, count as
+    results of the default options.
+
+    Returns:
+        The remaining sequences of every file, and the fingerprint fields to write
+            with the results of every participant.
+    """
+    index = writers.ResultIndex.load(output_dir, gold_path.stem)
+    gold_fingerprint = writers.file_fingerprint(gold_path)
+    options_fingerprint = _options_fingerprint(
+        window_size, radius, joint_weights, dtype, selected_metrics, path_format
+    )
+    default_fingerprints = {
+        "options_fingerprint": _options_fingerprint(
+            None, 1, None, "float64", None, "json"
         )
-        results_list.append(results)
+    }
+    method = METHOD_NAMES[algorithm]
 
-    return results_list
+    file_sequences = {}
+    row_fields = {}
+    for file in files:
+        if file.suffix != ".xlsx":
+            file_sequences[file] = sequence
+            continue
+        fingerprints = {
+            "subject_fingerprint": writers.file_fingerprint(file),
+            "gold_fingerprint": gold_fingerprint,
+            "options_fingerprint": options_fingerprint,
+        }
+        row_fields[file.stem] = fingerprints
+        remaining = [
+            seq
+            for seq in sequence
+            if not index.is_done(
+                file.stem, f"seq{seq}", method, fingerprints, default_fingerprints
+            )
+        ]
+        if remaining:
+            file_sequences[file] = remaining
+
+    num_done = len(files) - len(file_sequences)
+    if num_done:
+        print(f"Resuming: skipping {num_done} file(s) with results for all sequences.")
+    return file_sequences, row_fields
+
+
+def _options_fingerprint(
+    window_size: Optional[int],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    dtype: Literal["float64", "float32"],
+    selected_metrics: Optional[list[str]],
+    path_format: Literal["json", "npz"],
+) -> str:
+    """Fingerprint of the run options that change the results of resumed runs."""
+    return json.dumps(
+        {
+            "window_size": window_size,
+            "radius": radius,
+            "joint_weights": joint_weights,
+            "dtype": dtype,
+            "selected_metrics": sorted(selected_metrics or ["distance"]),
+            "path_format": path_format,
+        },
+        sort_keys=True,
+    )
+
+
+def _read_cohorts(
+    files: list[pathlib.Path],
+    sequence: list[int],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+) -> Tuple[Dict[int, list[models.ParticipantData]], Dict[str, str]]:
+    """Read the sequences of every workbook for the pairwise command.
+
+    Workbooks that fail with a ValueError or IndexError are reported and skipped.
+
+    Returns:
+        The participants with data of every sequence, in file order, and the
+            fingerprints of the workbooks that were read.
+    """
+    cohorts: Dict[int, list[models.ParticipantData]] = {seq: [] for seq in sequence}
+    inputs = {}
+    for file in files:
+        if file.suffix != ".xlsx":
+            continue
+        try:
+            participants = readers.read_participant_sequences(
+                file, sequence, reader, cache_dir, dtype=dtype
+            )
+        except (ValueError, IndexError) as error:
+            print(f"Skipping file: {file}: {error}")
+            continue
+        inputs[file.name] = writers.file_fingerprint(file)
+        for seq, participant in participants.items():
+            if participant.data.size > 0:
+                cohorts[seq].append(participant)
+
+    return cohorts, inputs
+
+
+def _with_dtype(
+    participant: models.ParticipantData, dtype: Literal["float64", "float32"]
+) -> models.ParticipantData:
+    """Participant data converted to dtype, unchanged when it already matches."""
+    return dataclasses.replace(
+        participant, data=participant.data.astype(dtype, copy=False)
+    )
+
+
+def _initialize_worker(
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+) -> None:
+    """Create the gold cache of a worker process."""
+    global _worker_cache
+    _worker_cache = gold_cache.GoldCache(
+        reader=reader, cache_dir=cache_dir, dtype=dtype
+    )
+
+
+def _compare_file_in_worker(
+    file_path: pathlib.Path,
+    gold_path: pathlib.Path,
+    sequence: list[int],
+    algorithm: Algorithm,
+    window_size: Optional[int],
+    selected_metrics: list[str],
+    radius: int,
+    joint_weights: Optional[Dict[str, float]],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+    dtype: Literal["float64", "float32"],
+) -> Tuple[list[_ComparisonResult], Optional[ValueError]]:
+    """Compare a file in a worker process.
+
+    The joint data is dropped from the returned participants, since only their
+    metadata is written, to keep the results cheap to send back.
+
+    Returns:
+        The comparisons of all completed sequences, and the ValueError that stopped
+            the file, if any.
+    """
+    comparisons = []
+    try:
+        for gold, subject, similarity_metric in _compare_file(
+            file_path,
+            gold_path,
+            sequence,
+            algorithm,
+            window_size=window_size,
+            selected_metrics=selected_metrics,
+            radius=radius,
+            joint_weights=joint_weights,
+            reader=reader,
+            cache_dir=cache_dir,
+            dtype=dtype,
+            cache=_worker_cache,
+        ):
+            comparisons.append(
+                (
+                    dataclasses.replace(gold, data=np.empty(0)),
+                    dataclasses.replace(subject, data=np.empty(0)),
+                    similarity_metric,
+                )
+            )
+    except ValueError as ve:
+        return comparisons, ve
+    return comparisons, None
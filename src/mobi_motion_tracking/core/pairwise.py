@@ -0,0 +1,266 @@
+"""All-vs-all distance matrices of a cohort of participants.
+
+Every participant is preprocessed once per sequence: centered to the hip and
+normalized to one set of segment lengths shared by the whole cohort, so that the
+distance of two participants does not depend on which of them is the reference.
+Only the upper triangle is computed, one row at a time, and mirrored.
+
+Rows are checkpointed to '<output>.partial.npz' while the matrix is filled. A run
+with the same participants and options resumes from the checkpoint, and the
+checkpoint is removed once the finished matrix has been written.
+"""
+
+import concurrent.futures
+import os
+import pathlib
+import tempfile
+import time
+from typing import Callable, Iterator, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mobi_motion_tracking.core import models
+from mobi_motion_tracking.io.readers import frame_store
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import similarity_functions
+
+CHECKPOINT_SUFFIX = ".partial.npz"
+
+SimilarityFunction = Callable[..., models.SimilarityMetrics]
+
+# Preprocessed data of every participant in a worker process, created by
+# _initialize_worker from a scratch frame store shared through the page cache.
+_worker_data: List[np.ndarray] = []
+
+
+def preprocess_cohort(
+    participants: List[models.ParticipantData],
+    average_lengths: Optional[np.ndarray] = None,
+) -> List[models.ParticipantData]:
+    """Center participants and normalize them to shared segment lengths.
+
+    Args:
+        participants: Cleaned data of every participant for one sequence.
+        average_lengths: Segment lengths every participant is normalized to, e.g.
+            those of a gold-standard recording. If None, the mean of the average
+            segment lengths of all participants is used.
+
+    Returns:
+        The preprocessed participants, in the same order.
+    """
+    centered = [
+        preprocessing.center_joints_to_hip(participant.data)
+        for participant in participants
+    ]
+    if not centered:
+        return []
+    if average_lengths is None:
+        average_lengths = np.mean(
+            [preprocessing.get_average_length(data) for data in centered], axis=0
+        )
+
+    return [
+        models.ParticipantData(
+            participant_ID=participant.participant_ID,
+            sequence_sheetname=participant.sequence_sheetname,
+            data=preprocessing.normalize_segments(data, average_lengths),
+        )
+        for participant, data in zip(participants, centered)
+    ]
+
+
+def distance_matrix(
+    participants: List[models.ParticipantData],
+    output_path: pathlib.Path,
+    checkpoint_key: str,
+    similarity_function: Optional[SimilarityFunction] = None,
+    window_size: Optional[int] = None,
+    workers: int = 1,
+    checkpoint_seconds: float = 60.0,
+) -> np.ndarray:
+    """Compute and save the symmetric distance matrix of preprocessed participants.
+
+    Row i holds the distances of participant i to participants i + 1 and later. Rows
+    are computed in a process pool when workers > 1, largest first, and saved to the
+    checkpoint at most every checkpoint_seconds and when the computation stops.
+
+    The saved .npz archive holds 'distances', the (n, n) matrix with a zero
+    diagonal, and 'labels', the participant IDs of its rows and columns.
+
+    Args:
+        participants: Preprocessed data of every participant, see preprocess_cohort.
+        output_path: Path of the compressed .npz archive to write.
+        checkpoint_key: Text identifying the inputs and options. A checkpoint is
+            only resumed when its key and labels are the same.
+        similarity_function: Function comparing two participants, called with
+            distance_only=True. If None, exact DTW is computed with
+            batch_dynamic_time_warping, one row per call.
+        window_size: Optional Sakoe-Chiba window size of the exact DTW.
+        workers: Number of processes computing rows.
+        checkpoint_seconds: Minimum time between two checkpoint writes.
+
+    Returns:
+        The (n, n) distance matrix.
+    """
+    labels = np.array([participant.participant_ID for participant in participants])
+    checkpoint_path = output_path.with_name(output_path.stem + CHECKPOINT_SUFFIX)
+    distances, done = _load_checkpoint(checkpoint_path, labels, checkpoint_key)
+    pending = [row for row in range(len(labels) - 1) if not done[row]]
+    if done.any():
+        print(f"Resuming: {int(done.sum())} of {len(labels) - 1} rows checkpointed.")
+
+    last_checkpoint = time.monotonic()
+    try:
+        for row, row_distances in _compute_rows(
+            [participant.data for participant in participants],
+            pending,
+            similarity_function,
+            window_size,
+            workers,
+        ):
+            distances[row, row + 1 :] = row_distances
+            distances[row + 1 :, row] = row_distances
+            done[row] = True
+            if time.monotonic() - last_checkpoint >= checkpoint_seconds:
+                _save_checkpoint(
+                    checkpoint_path, distances, done, labels, checkpoint_key
+                )
+                last_checkpoint = time.monotonic()
+    finally:
+        if pending and not done[pending].all():
+            _save_checkpoint(checkpoint_path, distances, done, labels, checkpoint_key)
+
+    _save_archive(output_path, distances=distances, labels=labels)
+    checkpoint_path.unlink(missing_ok=True)
+    return distances
+
+
+def _compute_rows(
+    data: List[np.ndarray],
+    rows: List[int],
+    similarity_function: Optional[SimilarityFunction],
+    window_size: Optional[int],
+    workers: int,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Distances of every row in rows, in this process or in a pool.
+
+    Yields:
+        (row, distances to the participants after row), in order of completion.
+    """
+    if workers <= 1 or len(rows) <= 1:
+        for row in rows:
+            yield row, _row_distances(data, row, similarity_function, window_size)
+        return
+
+    dtype: Literal["float64", "float32"] = (
+        "float32"
+        if all(participant_data.dtype == np.float32 for participant_data in data)
+        else "float64"
+    )
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        frame_store.FrameStore.from_participants(
+            pathlib.Path(scratch_dir),
+            (
+                (0, models.ParticipantData(str(index), "seq0", participant_data))
+                for index, participant_data in enumerate(data)
+            ),
+            dtype=dtype,
+        )
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_initialize_worker,
+            initargs=(pathlib.Path(scratch_dir), len(data)),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _row_distances_in_worker, row, similarity_function, window_size
+                )
+                for row in rows
+            ]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+def _row_distances(
+    data: Sequence[np.ndarray],
+    row: int,
+    similarity_function: Optional[SimilarityFunction],
+    window_size: Optional[int],
+) -> np.ndarray:
+    """Distances of participant row to every participant after it."""
+    if similarity_function is None:
+        metrics = similarity_functions.batch_dynamic_time_warping(
+            data[row], data[row + 1 :], window_size=window_size, distance_only=True
+        )
+    else:
+        metrics = [
+            similarity_function(data[row], subject_data, distance_only=True)
+            for subject_data in data[row + 1 :]
+        ]
+    return np.array(
+        [metric.metrics["distance"] for metric in metrics], dtype=np.float64
+    )
+
+
+def _initialize_worker(store_dir: pathlib.Path, num_participants: int) -> None:
+    """Map the scratch frame store of the preprocessed participants."""
+    global _worker_data
+    store = frame_store.FrameStore(store_dir)
+    _worker_data = [store.get(str(index), 0).data for index in range(num_participants)]
+
+
+def _row_distances_in_worker(
+    row: int,
+    similarity_function: Optional[SimilarityFunction],
+    window_size: Optional[int],
+) -> Tuple[int, np.ndarray]:
+    """Compute a row in a worker process."""
+    return row, _row_distances(_worker_data, row, similarity_function, window_size)
+
+
+def _load_checkpoint(
+    checkpoint_path: pathlib.Path, labels: np.ndarray, checkpoint_key: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Distances and finished rows of a matching checkpoint, or an empty start."""
+    num_participants = len(labels)
+    if checkpoint_path.exists():
+        with np.load(checkpoint_path) as checkpoint:
+            if str(checkpoint["key"]) == checkpoint_key and np.array_equal(
+                checkpoint["labels"], labels
+            ):
+                return checkpoint["distances"], checkpoint["done"]
+        print(f"Ignoring checkpoint of other inputs or options: {checkpoint_path}")
+
+    return (
+        np.zeros((num_participants, num_participants)),
+        np.zeros(max(num_participants - 1, 0), dtype=bool),
+    )
+
+
+def _save_checkpoint(
+    checkpoint_path: pathlib.Path,
+    distances: np.ndarray,
+    done: np.ndarray,
+    labels: np.ndarray,
+    checkpoint_key: str,
+) -> None:
+    """Atomically replace the checkpoint with the rows finished so far."""
+    _save_archive(
+        checkpoint_path,
+        distances=distances,
+        done=done,
+        labels=labels,
+        key=np.array(checkpoint_key),
+    )
+
+
+def _save_archive(path: pathlib.Path, **arrays: np.ndarray) -> None:
+    """Write a compressed .npz archive through a temporary file."""
+    temporary_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary_path, "wb") as archive:
+        np.savez_compressed(archive, **arrays)  # type: ignore[arg-type]
+    os.replace(temporary_path, path)
@@ -0,0 +1,208 @@
+"""Opt-in wall time and memory instrumentation of the pipeline stages."""
+
+import contextlib
+import dataclasses
+import json
+import pathlib
+import time
+import tracemalloc
+from types import TracebackType
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Type
+
+STAGE_LIST = [
+    "read",
+    "clean",
+    "center",
+    "average_length",
+    "normalize",
+    "similarity",
+    "write",
+]
+
+
+@dataclasses.dataclass
+class StageRecord:
+    """Measurement of one pipeline stage for one participant.
+
+    Attributes:
+        participant_ID: Participant whose data the stage processed.
+        sequence_sheetname: Sheet of the sequence, or None for work shared by all
+            sequences of a workbook, such as opening it.
+        stage: Stage name, one of STAGE_LIST.
+        seconds: Wall time of the stage.
+        frames: Number of frames the stage produced or processed, if known.
+        peak_memory: Peak traced memory allocated during the stage on top of the
+            memory in use when it started, in bytes. None when memory is not traced.
+    """
+
+    participant_ID: str
+    sequence_sheetname: Optional[str]
+    stage: str
+    seconds: float = 0.0
+    frames: Optional[int] = None
+    peak_memory: Optional[int] = None
+
+
+@dataclasses.dataclass
+class StageProfiler:
+    """Collects a StageRecord for every stage run while it is passed along.
+
+    Used as a context manager, the profiler traces memory allocations with
+    tracemalloc for its duration. Tracing slows down Python heavy stages such as
+    pandas parsing, so compare wall times between profiled runs only.
+
+    Attributes:
+        trace_memory: Whether to start tracemalloc and record peak memory.
+        records: Records of all finished stages, in order of completion.
+    """
+
+    trace_memory: bool = True
+    records: List[StageRecord] = dataclasses.field(default_factory=list)
+    _peaks: List[int] = dataclasses.field(default_factory=list, repr=False)
+    _started_tracing: bool = dataclasses.field(default=False, repr=False)
+
+    def __enter__(self) -> "StageProfiler":
+        """Starts tracing memory allocations if requested."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Stops tracing memory allocations if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def stage(
+        self,
+        name: str,
+        participant_ID: str,
+        sequence_sheetname: Optional[str] = None,
+    ) -> Iterator[StageRecord]:
+        """Measures the code run inside the context as one stage.
+
+        Stages may be nested; the peak memory of an inner stage also counts towards
+        the stages around it.
+
+        Args:
+            name: Stage name, one of STAGE_LIST.
+            participant_ID: Participant whose data the stage processes.
+            sequence_sheetname: Sheet of the sequence, or None for work shared by all
+                sequences.
+
+        Yields:
+            The record of the stage. Callers may set its frames; the wall time and
+                peak memory are filled in when the context exits.
+        """
+        record = StageRecord(participant_ID, sequence_sheetname, name)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(current)
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            if tracing:
+                stage_peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record.peak_memory = stage_peak - current
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], stage_peak)
+            self.records.append(record)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Totals of every stage over all participants and sequences.
+
+        Returns:
+            One dict per recorded stage, in the order of STAGE_LIST, with the number
+                of records, total and mean seconds, share of the total time, total
+                frames and the largest peak memory.
+        """
+        total_seconds = sum(record.seconds for record in self.records)
+        rows = []
+        for name in STAGE_LIST:
+            records = [record for record in self.records if record.stage == name]
+            if not records:
+                continue
+            seconds = sum(record.seconds for record in records)
+            peaks = [r.peak_memory for r in records if r.peak_memory is not None]
+            rows.append(
+                {
+                    "stage": name,
+                    "count": len(records),
+                    "seconds": seconds,
+                    "mean_seconds": seconds / len(records),
+                    "share": seconds / total_seconds if total_seconds > 0 else 0.0,
+                    "frames": sum(record.frames or 0 for record in records),
+                    "peak_memory": max(peaks) if peaks else None,
+                }
+            )
+        return rows
+
+    def format_summary(self) -> str:
+        """Formats the stage summary as a table."""
+        lines = [
+            f"{'stage':<16}{'count':>7}{'seconds':>11}{'mean':>11}{'share':>8}"
+            f"{'frames':>10}{'peak MiB':>10}"
+        ]
+        for row in self.summary():
+            peak = row["peak_memory"]
+            peak_text = "-" if peak is None else f"{peak / 2**20:.1f}"
+            lines.append(
+                f"{row['stage']:<16}{row['count']:>7}{row['seconds']:>11.3f}"
+                f"{row['mean_seconds']:>11.4f}{row['share']:>8.1%}"
+                f"{row['frames']:>10}{peak_text:>10}"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path: pathlib.Path) -> pathlib.Path:
+        """Writes every record as one JSON line.
+
+        Args:
+            path: Path of the NDJSON trace file. An existing file is overwritten.
+
+        Returns:
+            The path of the trace file.
+        """
+        with open(path, "w") as trace_file:
+            for record in self.records:
+                trace_file.write(json.dumps(dataclasses.asdict(record)) + "\n")
+        return path
+
+
+def stage(
+    profiler: Optional[StageProfiler],
+    name: str,
+    participant_ID: str,
+    sequence_sheetname: Optional[str] = None,
+) -> ContextManager[StageRecord]:
+    """Measures a stage with profiler, or does nothing if profiler is None.
+
+    Args:
+        profiler: Profiler collecting the record, or None when profiling is off.
+        name: Stage name, one of STAGE_LIST.
+        participant_ID: Participant whose data the stage processes.
+        sequence_sheetname: Sheet of the sequence, or None for work shared by all
+            sequences.
+
+    Returns:
+        Context manager yielding the record of the stage. Without a profiler the
+            record is discarded.
+    """
+    if profiler is None:
+        return contextlib.nullcontext(
+            StageRecord(participant_ID, sequence_sheetname, name)
+        )
+    return profiler.stage(name, participant_ID, sequence_sheetname)
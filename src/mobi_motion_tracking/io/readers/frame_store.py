@@ -0,0 +1,222 @@
+"""Memory-mapped store of the cleaned frames of many participants.
+
+A store is a directory holding two files:
+
+- frames.bin: the cleaned (frames, 61) arrays of every participant and sequence,
+  concatenated row after row as raw float32 or float64 values.
+- index.json: the dtype and total number of frames, and one entry per participant
+  and sequence with the [start, stop) rows of its frames in frames.bin.
+
+Opening a store maps frames.bin read-only, so the data of a participant is a view
+into the page cache that is only read from disk when it is used.
+"""
+
+import json
+import os
+import pathlib
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+
+import numpy as np
+
+from mobi_motion_tracking.core import models
+from mobi_motion_tracking.io.readers import readers
+
+DTYPE_LIST = readers.DTYPE_LIST
+FRAMES_FILE = "frames.bin"
+INDEX_FILE = "index.json"
+
+
+class FrameStore:
+    """Read-only random access to the cleaned frames of many participants.
+
+    Example:
+        store = FrameStore.build(store_dir, sorted(data_dir.glob("*.xlsx")))
+        subject = store.get("100", 1)
+    """
+
+    def __init__(self, store_dir: pathlib.Path) -> None:
+        """Open a store built with FrameStore.build.
+
+        Args:
+            store_dir: Directory of the store.
+
+        Raises:
+            FileNotFoundError: if the store does not exist.
+        """
+        index_path = store_dir / INDEX_FILE
+        if not index_path.exists():
+            raise FileNotFoundError(f"Frame store does not exist: {store_dir}")
+
+        index = json.loads(index_path.read_text())
+        self.store_dir = store_dir
+        self.dtype = np.dtype(index["dtype"])
+        shape = (index["num_frames"], readers.NUM_COLUMNS)
+        if index["num_frames"] == 0:
+            self._frames = np.empty(shape, dtype=self.dtype)
+        else:
+            self._frames = np.memmap(
+                store_dir / FRAMES_FILE, dtype=self.dtype, mode="r", shape=shape
+            )
+        self._offsets: Dict[Tuple[str, int], Tuple[int, int]] = {
+            (entry["participant_ID"], entry["sequence"]): (
+                entry["start"],
+                entry["stop"],
+            )
+            for entry in index["entries"]
+        }
+
+    @classmethod
+    def build(
+        cls,
+        store_dir: pathlib.Path,
+        workbooks: Iterable[pathlib.Path],
+        sequences: Optional[List[int]] = None,
+        reader: Literal["pandas", "fast"] = "pandas",
+        cache_dir: Optional[pathlib.Path] = None,
+        dtype: Literal["float64", "float32"] = "float64",
+    ) -> "FrameStore":
+        """Ingest workbooks into a new store, replacing any store in store_dir.
+
+        Workbooks are read one at a time and their frames are appended to frames.bin,
+        so memory use does not grow with the number of participants. Workbooks that
+        fail with a ValueError or IndexError are reported and skipped, and sequences
+        whose sheet does not exist are not stored.
+
+        Args:
+            store_dir: Directory of the store. It is created if needed.
+            workbooks: Paths of the .xlsx workbooks to ingest. The participant ID of
+                each is its file stem.
+            sequences: Sequences to ingest. If None, every seqN sheet is ingested.
+            reader: Workbook reader backend, 'pandas' or the streaming 'fast' reader.
+            cache_dir: Optional directory of the cleaned sheet cache.
+            dtype: 'float64' or 'float32' frame values.
+
+        Returns:
+            The opened store.
+
+        Raises:
+            ValueError: if dtype is unsupported.
+        """
+        return cls.from_participants(
+            store_dir,
+            _read_workbooks(workbooks, sequences, reader, cache_dir),
+            dtype=dtype,
+        )
+
+    @classmethod
+    def from_participants(
+        cls,
+        store_dir: pathlib.Path,
+        participants: Iterable[Tuple[int, models.ParticipantData]],
+        dtype: Literal["float64", "float32"] = "float64",
+    ) -> "FrameStore":
+        """Write participant data into a new store, replacing any store in store_dir.
+
+        Participants are consumed one at a time, so a generator keeps memory use
+        constant. Participants without data are not stored.
+
+        Args:
+            store_dir: Directory of the store. It is created if needed.
+            participants: (sequence, participant data) pairs to store.
+            dtype: 'float64' or 'float32' frame values.
+
+        Returns:
+            The opened store.
+
+        Raises:
+            ValueError: if dtype is unsupported.
+        """
+        if dtype not in DTYPE_LIST:
+            raise ValueError("Unsupported dtype selected.")
+
+        store_dir.mkdir(parents=True, exist_ok=True)
+        frames_path = store_dir / f"{FRAMES_FILE}.{os.getpid()}.tmp"
+        index_path = store_dir / f"{INDEX_FILE}.{os.getpid()}.tmp"
+
+        entries = []
+        num_frames = 0
+        with open(frames_path, "wb") as frames_file:
+            for sequence, participant in participants:
+                if participant.data.size == 0:
+                    continue
+                frames_file.write(
+                    np.ascontiguousarray(participant.data, dtype=dtype).tobytes()
+                )
+                entries.append(
+                    {
+                        "participant_ID": participant.participant_ID,
+                        "sequence": sequence,
+                        "start": num_frames,
+                        "stop": num_frames + len(participant.data),
+                    }
+                )
+                num_frames += len(participant.data)
+
+        index_path.write_text(
+            json.dumps({"dtype": dtype, "num_frames": num_frames, "entries": entries})
+        )
+        os.replace(frames_path, store_dir / FRAMES_FILE)
+        os.replace(index_path, store_dir / INDEX_FILE)
+
+        return cls(store_dir)
+
+    def __len__(self) -> int:
+        """Number of stored participant sequences."""
+        return len(self._offsets)
+
+    def __contains__(self, key: object) -> bool:
+        """Whether a (participant_ID, sequence) pair is stored."""
+        return key in self._offsets
+
+    def keys(self) -> List[Tuple[str, int]]:
+        """Stored (participant_ID, sequence) pairs, in the order they were ingested."""
+        return list(self._offsets)
+
+    def get(self, participant_ID: str, sequence: int) -> models.ParticipantData:
+        """Return the cleaned data of a participant sequence without copying it.
+
+        Args:
+            participant_ID: The identifier of the participant.
+            sequence: integer value indicating the sequence.
+
+        Returns:
+            models.ParticipantData whose data is a read-only view into the store.
+
+        Raises:
+            KeyError: if the participant sequence is not stored.
+        """
+        start, stop = self._offsets[(participant_ID, sequence)]
+        return models.ParticipantData(
+            participant_ID=participant_ID,
+            sequence_sheetname=f"seq{sequence}",
+            data=self._frames[start:stop],
+        )
+
+
+def _read_workbooks(
+    workbooks: Iterable[pathlib.Path],
+    sequences: Optional[List[int]],
+    reader: Literal["pandas", "fast"],
+    cache_dir: Optional[pathlib.Path],
+) -> Iterator[Tuple[int, models.ParticipantData]]:
+    """Read the sequences of workbooks one workbook at a time.
+
+    Workbooks that fail with a ValueError or IndexError are reported and skipped.
+
+    Yields:
+        (sequence, participant data) of every sequence read.
+    """
+    for workbook in workbooks:
+        try:
+            participants = readers.read_participant_sequences(
+                workbook,
+                sequences
+                if sequences is not None
+                else readers.list_sequences(workbook),
+                reader,
+                cache_dir,
+            )
+        except (ValueError, IndexError) as error:
+            print(f"Skipping file: {workbook}: {error}")
+            continue
+        yield from participants.items()
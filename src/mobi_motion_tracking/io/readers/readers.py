@@ -1,11 +1,50 @@
 """Functions to read motion tracking data from a file."""
 
 import pathlib
+from typing import Any, Dict, Literal, Optional, Sequence, Tuple
 
 import numpy as np
+import openpyxl
 import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+from openpyxl.worksheet.worksheet import Worksheet
 
-from mobi_motion_tracking.core import models
+from mobi_motion_tracking.core import models, profiling
+from mobi_motion_tracking.io.readers import sheet_cache
+
+READER_LIST = ["pandas", "fast"]
+DTYPE_LIST = ["float64", "float32"]
+
+NUM_COLUMNS = 61
+
+# Rows parsed to find the x_Hip header before parsing only the joint columns.
+HEADER_SCAN_ROWS = 50
+
+# Text that pd.read_excel turns into NaN by default, plus Excel error values.
+_NA_STRINGS = frozenset(
+    [
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+        *ERROR_CODES,
+    ]
+)
 
 
 def data_cleaner(data: pd.DataFrame) -> np.ndarray:
@@ -27,35 +66,141 @@ def data_cleaner(data: pd.DataFrame) -> np.ndarray:
         ValueError: when x_Hip is not found in dataframe.
         IndexError: when column index is out of range.
     """
-    stripped = data.astype(str).apply(lambda x: x.str.strip())
-    matches = stripped == "x_Hip"
-    bool_result = matches.stack()
+    return _joint_columns(data).to_numpy(dtype=np.float64)
 
-    if not bool_result.any():
-        raise ValueError("x_Hip not found in DataFrame.")
-    if bool_result.sum() > 1:
-        raise ValueError("Multiple x_Hip entries found in DataFrame.")
 
-    header_row, _ = bool_result[bool_result].index[0]
+def read_joint_columns(
+    workbook: pd.ExcelFile,
+    sheet_name: str,
+    header_scan_rows: int = HEADER_SCAN_ROWS,
+) -> pd.DataFrame:
+    """Parse only the rows and columns of a sheet that data_cleaner keeps.
 
-    filtered_data = data.iloc[header_row + 1 :].copy()
-    filtered_data.columns = data.iloc[header_row].astype(str).str.strip()
+    A first pass parses the first header_scan_rows rows to locate x_Hip. A second pass
+    parses the rows below the header with usecols restricted to the frame column and
+    the 60 joint coordinates, so metadata columns are never converted, copied or
+    searched as strings. If x_Hip is not within the scanned rows, the whole sheet is
+    parsed as before. pandas drops trailing empty rows of the scanned block, so a
+    short block does not mean the sheet ended there.
 
-    col_idx = filtered_data.columns.get_loc("x_Hip")
+    The result converted with to_numpy(dtype=np.float64) equals data_cleaner applied
+    to the whole sheet, except that a second x_Hip below the scanned rows is only
+    detected within the selected columns.
 
-    start_col = col_idx - 1
-    end_col = col_idx + 60
+    Args:
+        workbook: workbook opened with pd.ExcelFile.
+        sheet_name: name of the sheet to parse.
+        header_scan_rows: number of leading rows searched for x_Hip.
+
+    Returns:
+        DataFrame of the NUM_COLUMNS columns below the header.
+
+    Raises:
+        ValueError: when x_Hip is not found in the sheet.
+        ValueError: when x_Hip is found more than once.
+        IndexError: when column index is out of range.
+    """
+    head = workbook.parse(sheet_name=sheet_name, header=None, nrows=header_scan_rows)
+    location = _locate_x_hip(head)
+    if location is None:
+        return _joint_columns(workbook.parse(sheet_name=sheet_name, header=None))
 
-    if start_col < 0 or end_col > filtered_data.shape[1]:
+    header_row, col_idx = location
+    start_col = col_idx - 1
+    end_col = col_idx + NUM_COLUMNS - 1
+    if start_col < 0:
         raise IndexError("Column index out of range.")
 
-    cleaned_data = filtered_data.iloc[:, start_col:end_col]
+    body = workbook.parse(
+        sheet_name=sheet_name,
+        header=None,
+        skiprows=header_row + 1,
+        usecols=lambda column: start_col <= column < end_col,
+    )
+    if body.shape[1] < NUM_COLUMNS:
+        if end_col > head.shape[1]:
+            raise IndexError("Column index out of range.")
+        body = body.reindex(columns=range(start_col, end_col))
+    if _locate_x_hip(body) is not None:
+        raise ValueError("Multiple x_Hip entries found in DataFrame.")
+
+    return body
+
+
+def stream_cleaned_sheet(worksheet: Worksheet) -> np.ndarray:
+    """Select applicable data from a worksheet while streaming its rows.
+
+    Produces the same array as data_cleaner applied to the sheet read with
+    pd.read_excel, without building a DataFrame. Rows are read as plain values from
+    a read-only worksheet; the x_Hip header is located on the way, and the 61 columns
+    of every following row are written straight into a preallocated float64 array.
+
+    Args:
+        worksheet: worksheet of a workbook opened with read_only=True.
+
+    Returns:
+        cleaned_data: np.array of [x,61] where x is the total number of rows
+            representing all frames and columns representing the frame number and 60
+            joint coordinates.
+
+    Raises:
+        ValueError: when x_Hip is not found in the worksheet.
+        ValueError: when a value in the selected columns is not numeric.
+        IndexError: when column index is out of range.
+    """
+    capacity = worksheet.max_row or 1024
+    cleaned_data = np.empty((capacity, NUM_COLUMNS), dtype=np.float64)
+    start_col: Optional[int] = None
+    num_rows = 0
+    num_filled_rows = 0
+    sheet_width = 0
+    conversion_error: Optional[ValueError] = None
+
+    for row in worksheet.iter_rows(values_only=True):
+        row_length = _trimmed_length(row)
+        sheet_width = max(sheet_width, row_length)
+
+        header_cols = [
+            col
+            for col, value in enumerate(row[:row_length])
+            if isinstance(value, str) and value.strip() == "x_Hip"
+        ]
+        if header_cols and (start_col is not None or len(header_cols) > 1):
+            raise ValueError("Multiple x_Hip entries found in DataFrame.")
+        if header_cols:
+            start_col = header_cols[0] - 1
+            continue
+        if start_col is None:
+            continue
 
-    return cleaned_data.to_numpy(dtype=np.float64)
+        if num_rows == capacity:
+            capacity *= 2
+            cleaned_data.resize((capacity, NUM_COLUMNS), refcheck=False)
+        if row_length > 0:
+            num_filled_rows = num_rows + 1
+        if start_col >= 0 and conversion_error is None:
+            try:
+                _write_row(cleaned_data[num_rows], row[start_col:row_length])
+            except ValueError as ve:
+                conversion_error = ve
+        num_rows += 1
+
+    if start_col is None:
+        raise ValueError("x_Hip not found in DataFrame.")
+    if start_col < 0 or start_col + NUM_COLUMNS > sheet_width:
+        raise IndexError("Column index out of range.")
+    if conversion_error is not None:
+        raise conversion_error
+
+    return cleaned_data[:num_filled_rows].copy()
 
 
 def read_participant_data(
-    subject_path: pathlib.Path, sequence: int
+    subject_path: pathlib.Path,
+    sequence: int,
+    reader: Literal["pandas", "fast"] = "pandas",
+    cache_dir: Optional[pathlib.Path] = None,
+    dtype: Literal["float64", "float32"] = "float64",
 ) -> models.ParticipantData:
     """Calls get_metadata and read sheet.
 
@@ -67,30 +212,253 @@ def read_participant_data(
     Args:
         subject_path: file path to the participant file.
         sequence: integer value indiciating the sequence currently being tested.
+        reader: 'pandas' cleans the sheet read by pd.read_excel with data_cleaner,
+            'fast' streams it with stream_cleaned_sheet. Both give the same data.
+        cache_dir: Optional directory of the cleaned sheet cache.
+        dtype: 'float64' or 'float32' data.
 
     Returns:
         models.ParticipantData: containing participant_ID (str), sheetname (str),
             and data (np.ndarray).
     """
-    participant_ID = subject_path.stem
-    sequence_sheetname = f"seq{sequence}"
+    return read_participant_sequences(
+        subject_path, [sequence], reader, cache_dir, dtype=dtype
+    )[sequence]
 
-    try:
-        motion_tracking_data = pd.read_excel(
-            subject_path, sheet_name=sequence_sheetname, engine="openpyxl", header=None
+
+def read_participant_sequences(
+    subject_path: pathlib.Path,
+    sequences: list[int],
+    reader: Literal["pandas", "fast"] = "pandas",
+    cache_dir: Optional[pathlib.Path] = None,
+    profiler: Optional[profiling.StageProfiler] = None,
+    dtype: Literal["float64", "float32"] = "float64",
+) -> Dict[int, models.ParticipantData]:
+    """Read several sequences of a participant with a single workbook open.
+
+    The workbook is opened and parsed once, after which every requested seqN sheet is
+    cleaned with data_cleaner. Missing sheets are reported and returned with empty
+    data, as in read_participant_data. Sheets that exist but hold no frames are
+    returned as cleaned, with zero rows, without being reported. With a cache
+    directory, sequences cached for the current version of the workbook are loaded
+    without opening it, and newly read sequences are added to the cache.
+
+    Args:
+        subject_path: file path to the participant file.
+        sequences: integer values indicating the sequences to read.
+        reader: 'pandas' cleans each sheet read by pandas with data_cleaner, 'fast'
+            streams it with stream_cleaned_sheet. Both give the same data.
+        cache_dir: Optional directory of the cleaned sheet cache.
+        profiler: Optional profiler recording the 'read' and 'clean' stages. The
+            'fast' reader cleans while reading, so its sheets are recorded as 'read'
+            only, as are sheets loaded from the cache.
+        dtype: 'float64' or 'float32' data. Sheets are always cleaned and cached in
+            float64 and converted afterwards.
+
+    Returns:
+        Dictionary mapping each requested sequence to its models.ParticipantData,
+            in the order of sequences.
+
+    Raises:
+        ValueError: if reader is unsupported.
+        ValueError: if dtype is unsupported.
+    """
+    if dtype not in DTYPE_LIST:
+        raise ValueError("Unsupported dtype selected.")
+
+    sheets = {}
+    if cache_dir is not None:
+        with profiling.stage(profiler, "read", subject_path.stem):
+            sheets = sheet_cache.load_sequences(cache_dir, subject_path)
+
+    missing_sequences = [sequence for sequence in sequences if sequence not in sheets]
+    if missing_sequences:
+        read_sheets = _read_workbook_sequences(
+            subject_path, missing_sequences, reader, profiler
         )
-    except ValueError as ve:
-        print(f"Sheet doesn't exist: {ve}")
-        return models.ParticipantData(
-            participant_ID=participant_ID,
+        if cache_dir is not None:
+            sheet_cache.store_sequences(cache_dir, subject_path, read_sheets)
+        sheets.update(read_sheets)
+
+    participant_data = {}
+    for sequence in sequences:
+        sequence_sheetname = f"seq{sequence}"
+        if _is_missing_sheet(sheets[sequence]):
+            print(
+                f"Sheet doesn't exist: Worksheet named '{sequence_sheetname}' "
+                "not found"
+            )
+        participant_data[sequence] = models.ParticipantData(
+            participant_ID=subject_path.stem,
             sequence_sheetname=sequence_sheetname,
-            data=np.array([]),
+            data=sheets[sequence].astype(dtype, copy=False),
         )
 
-    subject_data = data_cleaner(motion_tracking_data)
+    return participant_data
+
 
-    return models.ParticipantData(
-        participant_ID=participant_ID,
-        sequence_sheetname=sequence_sheetname,
-        data=subject_data,
+def list_sequences(subject_path: pathlib.Path) -> list[int]:
+    """List the sequences stored in a workbook.
+
+    Args:
+        subject_path: file path to the participant file.
+
+    Returns:
+        Sorted sequence numbers of all seqN sheets in the workbook.
+    """
+    workbook = openpyxl.load_workbook(subject_path, read_only=True, keep_links=False)
+    try:
+        sheet_names = workbook.sheetnames
+    finally:
+        workbook.close()
+
+    return sorted(
+        int(name[3:])
+        for name in sheet_names
+        if name.startswith("seq") and name[3:].isdigit()
     )
+
+
+def _read_workbook_sequences(
+    subject_path: pathlib.Path,
+    sequences: list[int],
+    reader: Literal["pandas", "fast"],
+    profiler: Optional[profiling.StageProfiler] = None,
+) -> Dict[int, np.ndarray]:
+    """Clean the requested sheets of a workbook, opening it once.
+
+    Args:
+        subject_path: file path to the participant file.
+        sequences: integer values indicating the sequences to read.
+        reader: 'pandas' or 'fast', see read_participant_sequences.
+        profiler: Optional profiler, see read_participant_sequences.
+
+    Returns:
+        Dictionary mapping each sequence to its cleaned data. Sheets that do not
+            exist map to a one-dimensional empty array, while existing sheets always
+            give two-dimensional data, even without frames; see _is_missing_sheet.
+
+    Raises:
+        ValueError: if reader is unsupported.
+    """
+    participant_ID = subject_path.stem
+    if reader not in READER_LIST:
+        raise ValueError("Unsupported reader selected.")
+
+    with profiling.stage(profiler, "read", participant_ID):
+        if reader == "pandas":
+            workbook = pd.ExcelFile(subject_path, engine="openpyxl")
+            sheet_names = workbook.sheet_names
+        else:
+            workbook = openpyxl.load_workbook(
+                subject_path, read_only=True, data_only=True, keep_links=False
+            )
+            sheet_names = workbook.sheetnames
+
+    sheets = {}
+    try:
+        for sequence in sequences:
+            sequence_sheetname = f"seq{sequence}"
+
+            if sequence_sheetname not in sheet_names:
+                sheets[sequence] = np.array([])
+            elif isinstance(workbook, pd.ExcelFile):
+                with profiling.stage(
+                    profiler, "read", participant_ID, sequence_sheetname
+                ):
+                    joint_columns = read_joint_columns(workbook, sequence_sheetname)
+                with profiling.stage(
+                    profiler, "clean", participant_ID, sequence_sheetname
+                ) as record:
+                    sheets[sequence] = joint_columns.to_numpy(dtype=np.float64)
+                    record.frames = len(sheets[sequence])
+            else:
+                with profiling.stage(
+                    profiler, "read", participant_ID, sequence_sheetname
+                ) as record:
+                    sheets[sequence] = stream_cleaned_sheet(
+                        workbook[sequence_sheetname]
+                    )
+                    record.frames = len(sheets[sequence])
+    finally:
+        workbook.close()
+
+    return sheets
+
+
+def _is_missing_sheet(data: np.ndarray) -> bool:
+    """Whether data stands for a sheet missing from its workbook.
+
+    See _read_workbook_sequences. The sheet cache keeps the shape of every array, so
+    this also holds for cached sequences.
+    """
+    return data.ndim == 1
+
+
+def _locate_x_hip(data: pd.DataFrame) -> Optional[Tuple[int, int]]:
+    """Position of the x_Hip header cell, searching text columns only.
+
+    Returns:
+        (row, column) position of the cell, or None if there is none.
+
+    Raises:
+        ValueError: when x_Hip is found more than once.
+    """
+    text_columns = [
+        position
+        for position, dtype in enumerate(data.dtypes)
+        if not pd.api.types.is_numeric_dtype(dtype)
+    ]
+    matches = np.zeros(data.shape, dtype=bool)
+    for position in text_columns:
+        matches[:, position] = (
+            data.iloc[:, position].astype(str).str.strip() == "x_Hip"
+        ).to_numpy()
+
+    rows, columns = np.nonzero(matches)
+    if len(rows) > 1:
+        raise ValueError("Multiple x_Hip entries found in DataFrame.")
+    if len(rows) == 0:
+        return None
+    return int(rows[0]), int(columns[0])
+
+
+def _joint_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """The NUM_COLUMNS columns below the x_Hip header, starting one column left.
+
+    Raises:
+        ValueError: when x_Hip is not found in dataframe.
+        IndexError: when column index is out of range.
+    """
+    location = _locate_x_hip(data)
+    if location is None:
+        raise ValueError("x_Hip not found in DataFrame.")
+
+    header_row, col_idx = location
+    start_col = col_idx - 1
+    end_col = col_idx + NUM_COLUMNS - 1
+
+    if start_col < 0 or end_col > data.shape[1]:
+        raise IndexError("Column index out of range.")
+
+    return data.iloc[header_row + 1 :, start_col:end_col]
+
+
+def _trimmed_length(row: Sequence[Any]) -> int:
+    """Length of a row without its trailing empty cells."""
+    length = len(row)
+    while length > 0 and (row[length - 1] is None or row[length - 1] == ""):
+        length -= 1
+    return length
+
+
+def _write_row(destination: np.ndarray, values: Sequence[Any]) -> None:
+    """Write cell values into a float64 row, padding missing cells with NaN."""
+    values = values[:NUM_COLUMNS]
+    if any(isinstance(value, str) for value in values):
+        values = [
+            None if isinstance(value, str) and value in _NA_STRINGS else value
+            for value in values
+        ]
+    destination[: len(values)] = values
+    destination[len(values) :] = np.nan
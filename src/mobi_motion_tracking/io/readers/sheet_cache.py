@@ -0,0 +1,103 @@
+"""On-disk cache of cleaned sheet data.
+
+Each workbook gets one .npz file in the cache directory, holding the cleaned
+(frames, 61) array of every sequence read so far. Sequences whose sheet does not
+exist are stored as one-dimensional empty arrays, so they can be told apart from
+sheets without frames. The modification time and size of the workbook are
+stored alongside the arrays, and a cache file whose workbook changed is ignored.
+"""
+
+import hashlib
+import os
+import pathlib
+from typing import Dict
+
+import numpy as np
+
+_MTIME_KEY = "workbook_mtime_ns"
+_SIZE_KEY = "workbook_size"
+_SEQUENCE_PREFIX = "seq"
+
+
+def cache_file(cache_dir: pathlib.Path, workbook_path: pathlib.Path) -> pathlib.Path:
+    """Path of the cache file of a workbook.
+
+    The name combines the workbook stem with a hash of its resolved path, so
+    workbooks with the same name in different directories do not collide.
+
+    Args:
+        cache_dir: Directory holding the cache files.
+        workbook_path: Path to the workbook.
+
+    Returns:
+        Path to the .npz cache file.
+    """
+    digest = hashlib.sha1(str(workbook_path.resolve()).encode()).hexdigest()[:16]
+    return cache_dir / f"{workbook_path.stem}_{digest}.npz"
+
+
+def load_sequences(
+    cache_dir: pathlib.Path, workbook_path: pathlib.Path
+) -> Dict[int, np.ndarray]:
+    """Load the cached sequences of a workbook.
+
+    Args:
+        cache_dir: Directory holding the cache files.
+        workbook_path: Path to the workbook.
+
+    Returns:
+        Dictionary mapping sequence numbers to cleaned data. Empty when there is no
+            cache file or the workbook changed since it was written.
+    """
+    path = cache_file(cache_dir, workbook_path)
+    if not path.exists():
+        return {}
+
+    stat = workbook_path.stat()
+    with np.load(path, allow_pickle=False) as cached:
+        if (
+            int(cached[_MTIME_KEY]) != stat.st_mtime_ns
+            or int(cached[_SIZE_KEY]) != stat.st_size
+        ):
+            return {}
+        return {
+            int(key[len(_SEQUENCE_PREFIX) :]): cached[key]
+            for key in cached.files
+            if key.startswith(_SEQUENCE_PREFIX)
+        }
+
+
+def store_sequences(
+    cache_dir: pathlib.Path,
+    workbook_path: pathlib.Path,
+    sequences: Dict[int, np.ndarray],
+) -> None:
+    """Add sequences of a workbook to its cache file.
+
+    Sequences already cached for the current version of the workbook are kept. The
+    file is written to a temporary name and then moved in place, so readers never see
+    a partially written cache file.
+
+    Args:
+        cache_dir: Directory holding the cache files.
+        workbook_path: Path to the workbook.
+        sequences: Dictionary mapping sequence numbers to cleaned data.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_file(cache_dir, workbook_path)
+    stat = workbook_path.stat()
+
+    arrays = {
+        f"{_SEQUENCE_PREFIX}{sequence}": data
+        for sequence, data in {
+            **load_sequences(cache_dir, workbook_path),
+            **sequences,
+        }.items()
+    }
+    arrays[_MTIME_KEY] = np.array(stat.st_mtime_ns)
+    arrays[_SIZE_KEY] = np.array(stat.st_size)
+
+    temporary_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary_path, "wb") as file:
+        np.savez(file, **arrays)  # type: ignore[arg-type]
+    os.replace(temporary_path, path)
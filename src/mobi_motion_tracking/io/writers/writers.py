@@ -1,12 +1,22 @@
 """Functions to write calculated outputs to a file."""
 
+import dataclasses
 import datetime
 import json
+import os
 import pathlib
-from typing import Optional
+import re
+import types
+import zipfile
+from typing import IO, Dict, Literal, Optional, Tuple, Type
+
+import numpy as np
 
 from mobi_motion_tracking.core import models
 
+PATH_FORMATS = ["json", "npz"]
+ARRAY_METRICS = ["target_path", "experimental_path"]
+
 
 def generate_output_filename(
     gold_participant_ID: str, output_dir: pathlib.Path
@@ -64,6 +74,367 @@ def save_results_to_ndjson(
     Returns:
         dict: entry to be written to output file.
 
+    Raises:
+        ValueError: If any selected metric is not available in
+            `similarity_metrics.metrics`.
+    """
+    new_entry = _build_entry(subject, similarity_metrics, selected_metrics)
+
+    output_path = generate_output_filename(gold.participant_ID, output_dir)
+
+    with open(output_path, "a") as f:
+        json.dump(new_entry, f)
+        f.write("\n")
+
+    return new_entry
+
+
+class ResultSink:
+    """Buffered writer of result entries to NDJSON files.
+
+    Writes the same entries as save_results_to_ndjson, but resolves the output file
+    of each gold participant once and keeps it open with a large buffer instead of
+    re-opening it for every entry. Buffered entries are flushed every flush_every
+    entries, and the files are flushed and synced to disk on close.
+
+    With path_format 'npz', the ARRAY_METRICS of every entry are stored as int32
+    arrays in sidecar .npz archives next to the NDJSON file, and the entry links to
+    them with {"file": <archive name>, "key": <array name>} instead of listing every
+    index as JSON. read_linked_array loads them back. Entries and their arrays are
+    held in memory until the next flush, which writes the arrays as a new numbered
+    archive, syncs it to disk and renames it into place before the entries are
+    written. An interrupted run therefore never leaves an entry whose link does not
+    resolve.
+
+    row_fields adds fixed fields to the entries of a participant, such as the input
+    file fingerprints of resumed runs. An incomplete last line left in an output file
+    by an interrupted run is removed before appending to it.
+
+    Example:
+        with ResultSink(output_dir) as sink:
+            sink.write(gold, subject, similarity_metrics)
+    """
+
+    def __init__(
+        self,
+        output_dir: pathlib.Path,
+        flush_every: int = 1000,
+        buffer_size: int = 2**20,
+        path_format: Literal["json", "npz"] = "json",
+        row_fields: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> None:
+        """Initialize the sink.
+
+        Args:
+            output_dir: Directory where the results files should be saved.
+            flush_every: Number of entries written between flushes.
+            buffer_size: Size in bytes of the write buffer of each file.
+            path_format: 'json' writes warping paths into the NDJSON entries, 'npz'
+                stores them in a sidecar archive.
+            row_fields: Optional fields appended to every entry of a subject, keyed
+                by subject participant ID.
+
+        Raises:
+            ValueError: if path_format is unsupported.
+        """
+        if path_format not in PATH_FORMATS:
+            raise ValueError("Unsupported path format selected.")
+
+        self.output_dir = output_dir
+        self.flush_every = flush_every
+        self.buffer_size = buffer_size
+        self.path_format = path_format
+        self.row_fields = row_fields if row_fields is not None else {}
+        self._files: Dict[str, IO[str]] = {}
+        self._sidecar_paths: Dict[str, pathlib.Path] = {}
+        self._pending_arrays: Dict[str, Dict[str, np.ndarray]] = {}
+        self._pending_lines: Dict[str, list[str]] = {}
+        self._pending = 0
+
+    def __enter__(self) -> "ResultSink":
+        """Return the sink itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[types.TracebackType],
+    ) -> None:
+        """Close the sink, also when the block raised."""
+        self.close()
+
+    def write(
+        self,
+        gold: models.ParticipantData,
+        subject: models.ParticipantData,
+        similarity_metrics: models.SimilarityMetrics,
+        selected_metrics: Optional[list[str]] = None,
+    ) -> dict:
+        """Append a result entry to the NDJSON file of the gold participant.
+
+        Args:
+            gold: data for the gold-standard participant.
+            subject: data for the subject being analyzed.
+            similarity_metrics: Object containing the similarity method and metrics.
+            selected_metrics: List of metric keys to include in the output. If None,
+                all available metrics are written.
+
+        Returns:
+            dict: entry written to the output file.
+
+        Raises:
+            ValueError: If any selected metric is not available in
+                `similarity_metrics.metrics`.
+        """
+        new_entry = _build_entry(subject, similarity_metrics, selected_metrics)
+
+        file = self._files.get(gold.participant_ID)
+        if file is None:
+            output_path = generate_output_filename(gold.participant_ID, self.output_dir)
+            _drop_partial_line(output_path)
+            file = open(output_path, "a", buffering=self.buffer_size)
+            self._files[gold.participant_ID] = file
+
+        if self.path_format == "npz":
+            for metric_key in ARRAY_METRICS:
+                if metric_key in new_entry:
+                    new_entry[metric_key] = self._store_array(
+                        gold.participant_ID,
+                        pathlib.Path(file.name),
+                        f"{subject.participant_ID}_{subject.sequence_sheetname}_"
+                        f"{metric_key}",
+                        new_entry[metric_key],
+                    )
+
+        new_entry.update(self.row_fields.get(subject.participant_ID, {}))
+        if self.path_format == "npz":
+            self._pending_lines.setdefault(gold.participant_ID, []).append(
+                json.dumps(new_entry) + "\n"
+            )
+        else:
+            file.write(json.dumps(new_entry) + "\n")
+
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+        return new_entry
+
+    def flush(self) -> None:
+        """Write buffered entries of all files to the operating system.
+
+        Pending arrays are committed to their sidecar archive first, so every
+        flushed entry links to arrays that are already on disk.
+        """
+        for gold_participant_ID, arrays in self._pending_arrays.items():
+            _write_archive(self._sidecar_paths.pop(gold_participant_ID), arrays)
+        self._pending_arrays.clear()
+        for gold_participant_ID, lines in self._pending_lines.items():
+            self._files[gold_participant_ID].write("".join(lines))
+        self._pending_lines.clear()
+        for file in self._files.values():
+            file.flush()
+        self._pending = 0
+
+    def close(self) -> None:
+        """Flush, sync to disk and close all files."""
+        self.flush()
+        for file in self._files.values():
+            os.fsync(file.fileno())
+            file.close()
+        self._files.clear()
+
+    def _store_array(
+        self,
+        gold_participant_ID: str,
+        output_path: pathlib.Path,
+        name: str,
+        values: list[int],
+    ) -> dict:
+        """Queue an index array for the next sidecar archive of an output file.
+
+        Archives are numbered results_<gold>_<date>.paths.<n>.npz, and every flush
+        starts the next unused number.
+
+        Args:
+            gold_participant_ID: The identifier for the gold-standard participant.
+            output_path: Path to the NDJSON file the entry is written to.
+            name: Name of the array; a counter is appended to keep it unique.
+            values: Indices to store as int32.
+
+        Returns:
+            dict: link to the stored array, relative to the output directory.
+        """
+        sidecar_path = self._sidecar_paths.get(gold_participant_ID)
+        if sidecar_path is None:
+            number = 0
+            while output_path.with_suffix(f".paths.{number}.npz").exists():
+                number += 1
+            sidecar_path = output_path.with_suffix(f".paths.{number}.npz")
+            self._sidecar_paths[gold_participant_ID] = sidecar_path
+
+        arrays = self._pending_arrays.setdefault(gold_participant_ID, {})
+        key = f"{name}_{len(arrays)}"
+        arrays[key] = np.asarray(values, dtype=np.int32)
+
+        return {"file": sidecar_path.name, "key": key}
+
+
+@dataclasses.dataclass
+class ResultIndex:
+    """Results already written for a gold participant, used to resume runs.
+
+    Entries are keyed by (participant_ID, sheetname, method). When several rows share
+    a key, the last one written wins.
+
+    Attributes:
+        rows: Latest result entry of every key.
+        output_dir: Directory of the results files, used to check that warping paths
+            linked from entries written with path_format 'npz' still load. Without
+            it, links are not checked.
+    """
+
+    rows: Dict[Tuple[str, str, str], dict] = dataclasses.field(default_factory=dict)
+    output_dir: Optional[pathlib.Path] = None
+    _archive_keys: Dict[str, frozenset] = dataclasses.field(
+        default_factory=dict, repr=False
+    )
+
+    @classmethod
+    def load(cls, output_dir: pathlib.Path, gold_participant_ID: str) -> "ResultIndex":
+        """Index every results file of a gold participant in a directory.
+
+        Files of all dates are read, oldest first. Lines that are not valid JSON, such
+        as the incomplete last line of an interrupted run, are ignored.
+
+        Args:
+            output_dir: Directory holding the NDJSON results files.
+            gold_participant_ID: The identifier for the gold-standard participant.
+
+        Returns:
+            The index of all entries found.
+        """
+        index = cls(output_dir=output_dir)
+        pattern = re.compile(
+            rf"results_{re.escape(gold_participant_ID)}_\d{{8}}\.ndjson"
+        )
+        paths = sorted(
+            (
+                path
+                for path in output_dir.glob("results_*.ndjson")
+                if pattern.fullmatch(path.name)
+            ),
+            key=lambda path: path.stat().st_mtime_ns,
+        )
+        for path in paths:
+            with open(path) as results_file:
+                for line in results_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(entry, dict):
+                        index.add(entry)
+        return index
+
+    def add(self, entry: dict) -> None:
+        """Index a result entry. Entries without the key fields are ignored."""
+        if not all(
+            field in entry for field in ("participant_ID", "sheetname", "method")
+        ):
+            return
+        self.rows[(entry["participant_ID"], entry["sheetname"], entry["method"])] = (
+            entry
+        )
+
+    def is_done(
+        self,
+        participant_ID: str,
+        sheetname: str,
+        method: str,
+        fingerprints: Optional[Dict[str, str]] = None,
+        defaults: Optional[Dict[str, str]] = None,
+    ) -> bool:
+        """Whether a comparison already has an up-to-date result.
+
+        Args:
+            participant_ID: The identifier of the subject.
+            sheetname: Sheet name of the sequence, e.g. 'seq1'.
+            method: Name of the similarity method, e.g. 'DTW'.
+            fingerprints: Current fingerprints of the input files and options. A
+                result whose entry records a different fingerprint is out of date.
+            defaults: Fingerprints assumed for entries that do not record them,
+                such as the entries of runs that did not resume. Fingerprints
+                without a default match any entry that does not record them.
+
+        Returns:
+            True if the result exists, is up to date and its linked arrays load.
+        """
+        entry = self.rows.get((participant_ID, sheetname, method))
+        if entry is None:
+            return False
+        defaults = defaults or {}
+        if not all(
+            entry.get(name, defaults.get(name, value)) == value
+            for name, value in (fingerprints or {}).items()
+        ):
+            return False
+        return all(
+            self._resolves(entry[metric_key])
+            for metric_key in ARRAY_METRICS
+            if isinstance(entry.get(metric_key), dict)
+        )
+
+    def _resolves(self, link: dict) -> bool:
+        """Whether a linked array is present in a complete sidecar archive."""
+        if self.output_dir is None:
+            return True
+        keys = self._archive_keys.get(link["file"])
+        if keys is None:
+            try:
+                with zipfile.ZipFile(self.output_dir / link["file"]) as archive:
+                    keys = frozenset(archive.namelist())
+            except (OSError, zipfile.BadZipFile):
+                keys = frozenset()
+            self._archive_keys[link["file"]] = keys
+        return f"{link['key']}.npy" in keys
+
+
+def file_fingerprint(path: pathlib.Path) -> str:
+    """Fingerprint of an input file, from its size and modification time.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        '<size>-<modification time in ns>'.
+    """
+    stat = path.stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def read_linked_array(output_dir: pathlib.Path, link: dict) -> np.ndarray:
+    """Load an array linked from an NDJSON entry written with path_format 'npz'.
+
+    Args:
+        output_dir: Directory holding the NDJSON file and its sidecar archive.
+        link: The {"file": ..., "key": ...} value of the entry.
+
+    Returns:
+        The stored int32 array.
+    """
+    with np.load(output_dir / link["file"], allow_pickle=False) as sidecar:
+        return sidecar[link["key"]]
+
+
+def _build_entry(
+    subject: models.ParticipantData,
+    similarity_metrics: models.SimilarityMetrics,
+    selected_metrics: Optional[list[str]],
+) -> dict:
+    """Build the result entry of a subject with the selected metrics.
+
     Raises:
         ValueError: If any selected metric is not available in
             `similarity_metrics.metrics`.
@@ -79,14 +450,48 @@ def save_results_to_ndjson(
 
     for metric_key in selected_metrics:
         if metric_key in list(similarity_metrics.metrics.keys()):
-            new_entry[metric_key] = similarity_metrics.metrics[metric_key]
+            value = similarity_metrics.metrics[metric_key]
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            new_entry[metric_key] = value
         else:
             raise ValueError("Selected metrics are not eligible for selected method.")
 
-    output_path = generate_output_filename(gold.participant_ID, output_dir)
+    return new_entry
 
-    with open(output_path, "a") as f:
-        json.dump(new_entry, f)
-        f.write("\n")
 
-    return new_entry
+def _write_archive(path: pathlib.Path, arrays: Dict[str, np.ndarray]) -> None:
+    """Write arrays to an .npz archive through a synced temporary file and a rename.
+
+    The archive appears under its final name only once it is complete.
+    """
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as archive_file:
+        with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_STORED) as archive:
+            for key, values in arrays.items():
+                with archive.open(f"{key}.npy", "w", force_zip64=True) as array_file:
+                    np.lib.format.write_array(array_file, values, allow_pickle=False)
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def _drop_partial_line(path: pathlib.Path) -> None:
+    """Truncate a file after its last newline, removing an incomplete last line."""
+    with open(path, "rb+") as file:
+        size = file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        file.seek(size - 1)
+        if file.read(1) == b"\n":
+            return
+        position = size
+        while position > 0:
+            chunk_start = max(position - 2**16, 0)
+            file.seek(chunk_start)
+            newline = file.read(position - chunk_start).rfind(b"\n")
+            if newline >= 0:
+                file.truncate(chunk_start + newline + 1)
+                return
+            position = chunk_start
+        file.truncate(0)
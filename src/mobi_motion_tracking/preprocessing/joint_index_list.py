@@ -1,5 +1,34 @@
 """File containing all joint segment indices."""
 
+import dataclasses
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Joints in the order of their x, y, z coordinate columns, starting at column 1.
+JOINT_NAMES = [
+    "Hip",
+    "LowerSpine",
+    "MiddleSpine",
+    "Chest",
+    "Neck",
+    "Head",
+    "RClavicle",
+    "RShoulder",
+    "RForearm",
+    "RHand",
+    "LClavicle",
+    "LShoulder",
+    "LForearm",
+    "LHand",
+    "RThigh",
+    "RShin",
+    "RFoot",
+    "LThigh",
+    "LShin",
+    "LFoot",
+]
+
 DEFAULT_JOINT_SEGMENTS = [
     [(1, 43), (2, 44), (3, 45)],
     [(1, 52), (2, 53), (3, 54)],
@@ -21,3 +50,97 @@ DEFAULT_JOINT_SEGMENTS = [
     [(25, 28), (26, 29), (27, 30)],
     [(37, 40), (38, 41), (39, 42)],
 ]
+
+
+@dataclasses.dataclass(frozen=True)
+class SkeletonTopology:
+    """Joint segments compiled into index arrays.
+
+    Building a topology validates the segment list once, so preprocessing functions
+    can index all segments directly instead of parsing the nested list on every call.
+
+    Attributes:
+        start_indices: Array of shape (num_segments, 3) holding the x, y, and z
+            columns of the starting joint of each segment.
+        end_indices: Array of shape (num_segments, 3) holding the x, y, and z
+            columns of the ending joint of each segment.
+        parents: Index of the segment ending at the starting joint of each segment,
+            or -1 when the segment starts at a root joint.
+        order: Segment indices ordered so that every parent precedes its children,
+            keeping the listed order otherwise.
+    """
+
+    start_indices: np.ndarray
+    end_indices: np.ndarray
+    parents: np.ndarray
+    order: np.ndarray
+
+    @classmethod
+    def from_segments(cls, segment_list: Sequence) -> "SkeletonTopology":
+        """Compile a segment list into a topology.
+
+        Args:
+            segment_list: List containing the (start, end) coordinate index pairs
+                of the x, y, and z coordinates of every joint segment.
+
+        Returns:
+            The compiled SkeletonTopology.
+
+        Raises:
+            ValueError: when a segment does not consist of three (start, end) pairs.
+            ValueError: when a coordinate index is negative.
+            ValueError: when a joint ends more than one segment.
+            ValueError: when the segments form a cycle.
+        """
+        indices = np.asarray(segment_list, dtype=np.intp)
+        if indices.shape[1:] != (3, 2) and len(segment_list) > 0:
+            raise ValueError("Each segment must contain three (start, end) pairs.")
+        indices = indices.reshape(-1, 3, 2)
+        if np.any(indices < 0):
+            raise ValueError("Joint indices in segment_list must be non-negative.")
+
+        start_indices = indices[:, :, 0].copy()
+        end_indices = indices[:, :, 1].copy()
+
+        segment_by_end_joint: Dict[int, int] = {}
+        for segment, end_joint in enumerate(end_indices[:, 0].tolist()):
+            if end_joint in segment_by_end_joint:
+                raise ValueError("A joint can only end one segment.")
+            segment_by_end_joint[end_joint] = segment
+
+        parents = np.array(
+            [segment_by_end_joint.get(joint, -1) for joint in start_indices[:, 0]],
+            dtype=np.intp,
+        )
+
+        order: List[int] = []
+        placed = np.zeros(len(parents), dtype=bool)
+        for segment in range(len(parents)):
+            ancestors: List[int] = []
+            while segment != -1 and not placed[segment]:
+                if segment in ancestors:
+                    raise ValueError("Segments must not form a cycle.")
+                ancestors.append(segment)
+                segment = int(parents[segment])
+            order.extend(reversed(ancestors))
+            placed[ancestors] = True
+        order_array = np.array(order, dtype=np.intp)
+
+        for array in (start_indices, end_indices, parents, order_array):
+            array.setflags(write=False)
+        return cls(start_indices, end_indices, parents, order_array)
+
+    @property
+    def num_segments(self) -> int:
+        """Number of segments in the skeleton."""
+        return len(self.parents)
+
+    @property
+    def max_index(self) -> int:
+        """Largest coordinate column referenced by any segment."""
+        if self.num_segments == 0:
+            return -1
+        return int(max(self.start_indices.max(), self.end_indices.max()))
+
+
+DEFAULT_SKELETON_TOPOLOGY = SkeletonTopology.from_segments(DEFAULT_JOINT_SEGMENTS)
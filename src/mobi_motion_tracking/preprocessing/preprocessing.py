@@ -1,8 +1,14 @@
 """Performs preprocessing steps for raw data."""
 
+from typing import Union
+
 import numpy as np
 
-from mobi_motion_tracking.preprocessing.joint_index_list import DEFAULT_JOINT_SEGMENTS
+from mobi_motion_tracking.preprocessing.joint_index_list import (
+    DEFAULT_SKELETON_TOPOLOGY,
+    SkeletonTopology,
+)
+from mobi_motion_tracking.processing import jit_kernels
 
 
 def center_joints_to_hip(data: np.ndarray) -> np.ndarray:
@@ -32,7 +38,8 @@ def center_joints_to_hip(data: np.ndarray) -> np.ndarray:
 
 
 def get_average_length(
-    centered_data: np.ndarray, segment_list: list = DEFAULT_JOINT_SEGMENTS
+    centered_data: np.ndarray,
+    segment_list: Union[list, SkeletonTopology] = DEFAULT_SKELETON_TOPOLOGY,
 ) -> np.ndarray:
     """Calculate the average lengths of all joint segments.
 
@@ -46,37 +53,36 @@ def get_average_length(
         centered_data: centered data output from center_joints_to_hip. The
             first column in centered data contains frame number, the following columns
             contain joint coordinates.
-        segment_list: List containing all coordinate index pairs for all joint segments
-            in skeleton whose lengths will be normalized. Defaults to JOINT_INDEX_LIST.
+        segment_list: SkeletonTopology, or list containing all coordinate index pairs
+            for all joint segments in skeleton whose lengths will be normalized.
+            Defaults to the compiled DEFAULT_JOINT_SEGMENTS.
 
     Returns:
-        ndarray [N,1], average distance between joints for all segments.
+        float64 ndarray [N,1], average distance between joints for all segments.
 
     Raises:
         IndexError: when a joint index in JOINT_INDEX_LIST is out of range of total
             number of joints.
     """
-    num_segments = len(segment_list)
+    topology = _compile_topology(segment_list)
     num_joint_coordinates = centered_data.shape[1]
-    all_distances = np.zeros((centered_data.shape[0], num_segments))
 
-    if np.any(np.array(segment_list) >= num_joint_coordinates):
+    if topology.max_index >= num_joint_coordinates:
         raise IndexError(
             "Incorrect joint index list. Joint index in \
                          segment_list is out of range for data."
         )
 
-    for i, segment in enumerate(segment_list):
-        start_indices = np.array([segment[0][0], segment[1][0], segment[2][0]])
-        end_indices = np.array([segment[0][1], segment[1][1], segment[2][1]])
-
-        start_points = centered_data[:, start_indices]
-        end_points = centered_data[:, end_indices]
-
-        distances = np.linalg.norm(start_points - end_points, axis=1)
-        all_distances[:, i] = distances
-
-    average_distances = all_distances.mean(axis=0, keepdims=True).T
+    # Row-major layout keeps the frame-wise summation order of the mean below, which
+    # is accumulated in float64 so long float32 recordings do not lose precision.
+    all_distances = np.ascontiguousarray(
+        np.linalg.norm(
+            centered_data[:, topology.start_indices]
+            - centered_data[:, topology.end_indices],
+            axis=2,
+        )
+    )
+    average_distances = all_distances.mean(axis=0, dtype=np.float64, keepdims=True).T
 
     return average_distances
 
@@ -84,7 +90,7 @@ def get_average_length(
 def normalize_segments(
     centered_data: np.ndarray,
     average_lengths: np.ndarray,
-    segment_list: list = DEFAULT_JOINT_SEGMENTS,
+    segment_list: Union[list, SkeletonTopology] = DEFAULT_SKELETON_TOPOLOGY,
 ) -> np.ndarray:
     """Normalize skeleton segments to maintain consistent bone lengths across frames.
 
@@ -94,18 +100,25 @@ def normalize_segments(
     and ending joints based on a user provided segment_list or default_joint_segments
     in JOINT_INDEX_LIST are used.
 
+    All frames are processed at once, one segment at a time with every parent
+    segment before its children, so segments whose starting joint was moved by
+    another segment are attached to the moved joint. A segment of zero length has no
+    direction to scale along; its ending joint is placed on its starting joint
+    instead of becoming NaN.
+
     Args:
         centered_data: centered data output from center_joints_to_hip. The
             first column in centered data contains frame number, the following columns
             contain joint coordinates.
         average_lengths: Array of shape (len(segment_list), 1) containing target
             lengths for each skeleton segment.
-        segment_list: List containing all coordinate index pairs for all joint segments
-            in skeleton whose lengths will be normalized. Defaults to JOINT_INDEX_LIST.
+        segment_list: SkeletonTopology, or list containing all coordinate index pairs
+            for all joint segments in skeleton whose lengths will be normalized.
+            Defaults to the compiled DEFAULT_JOINT_SEGMENTS.
 
     Returns:
-        np.ndarray: Normalized motion data with consistent bone lengths, same shape as
-            centered_data.
+        np.ndarray: Normalized motion data with consistent bone lengths, same shape
+            and floating point type as centered_data.
 
     Raises:
         ValueError: when length of segment_list and length of average_lengths do not
@@ -114,31 +127,55 @@ def normalize_segments(
             the length of segment_list or length of average_lengths.
     """
     normalized_data = centered_data.copy()
+    topology = _compile_topology(segment_list)
 
-    if len(segment_list) != len(average_lengths):
+    if topology.num_segments != len(average_lengths):
         raise ValueError("Mismatch in shape for segment_list and average_lengths.")
 
-    if (centered_data.shape[1] != 3 * len(segment_list) + 4) or (
+    if (centered_data.shape[1] != 3 * topology.num_segments + 4) or (
         centered_data.shape[1] != 3 * len(average_lengths) + 4
     ):
         raise ValueError(
             "The shape of centered_data does not match the expected dimensions."
         )
 
-    for frame in range(centered_data.shape[0]):
-        for i, segment in enumerate(segment_list):
-            start_indices = np.array([segment[0][0], segment[1][0], segment[2][0]])
-            end_indices = np.array([segment[0][1], segment[1][1], segment[2][1]])
+    segment_lengths = np.reshape(average_lengths, topology.num_segments)
+    if jit_kernels.AVAILABLE and centered_data.dtype.kind == "f":
+        jit_kernels.normalize_segments(
+            centered_data,
+            normalized_data,
+            topology.start_indices[topology.order],
+            topology.end_indices[topology.order],
+            segment_lengths[topology.order].astype(np.float64),
+        )
+        return normalized_data
 
-            segment_vector = (
-                centered_data[frame, end_indices] - centered_data[frame, start_indices]
+    for i in topology.order:
+        start_indices = topology.start_indices[i]
+        end_indices = topology.end_indices[i]
+        segment_vectors = (
+            centered_data[:, end_indices] - centered_data[:, start_indices]
+        )
+        norms = np.sqrt(
+            np.matmul(
+                segment_vectors[:, np.newaxis, :], segment_vectors[:, :, np.newaxis]
             )
+        )[:, 0]
 
-            scaled_segment_vector = (
-                average_lengths[i] / np.linalg.norm(segment_vector)
-            ) * segment_vector
+        nonzero = norms[:, 0] > 0
+        scale = np.zeros_like(norms)
+        np.divide(segment_lengths[i], norms, out=scale, where=nonzero[:, np.newaxis])
 
-            normalized_data[frame, end_indices] = (
-                normalized_data[frame, start_indices] + scaled_segment_vector
-            )
+        normalized_data[:, end_indices] = (
+            normalized_data[:, start_indices] + scale * segment_vectors
+        )
     return normalized_data
+
+
+def _compile_topology(
+    segment_list: Union[list, SkeletonTopology],
+) -> SkeletonTopology:
+    """Return segment_list as a SkeletonTopology, compiling it if needed."""
+    if isinstance(segment_list, SkeletonTopology):
+        return segment_list
+    return SkeletonTopology.from_segments(segment_list)
@@ -0,0 +1,233 @@
+"""Local cost kernels of dynamic time warping.
+
+dynamic_time_warping matches frames by the Euclidean distance of their joint
+coordinates. A cost kernel replaces that local cost. Every kernel maps the frames
+of a preprocessed sequence to feature vectors once, and the local cost of two
+frames is computed from their features:
+
+- WeightedKernel scales every joint by the square root of its weight, so the
+  Euclidean distance of the features weighs the squared joint distances.
+- DerivativeKernel replaces every frame by its estimated velocity (derivative DTW),
+  so sequences are aligned by the shape of their movements rather than by their
+  poses.
+- CosineKernel maps frames to the unit direction vectors of their skeleton segments
+  and uses the mean cosine distance of the segment directions, which ignores
+  segment lengths altogether.
+
+Kernels with euclidean set keep the Euclidean distance on their features, so they
+run on the same banded and distance-only engines as dynamic_time_warping. The other
+kernels compute their full cost matrix at once in cost_matrix.
+
+Features keep the precision of float32 data, so float32 sequences are also compared
+in float32, see similarity_functions.dynamic_time_warping.
+"""
+
+import dataclasses
+from typing import ClassVar, Dict, Optional, Tuple
+
+import numpy as np
+
+from mobi_motion_tracking.preprocessing import joint_index_list
+
+KERNEL_LIST = ["weighted_dtw", "derivative_dtw", "cosine_dtw"]
+
+
+@dataclasses.dataclass(frozen=True)
+class CostKernel:
+    """Euclidean distance between the joint coordinates of two frames.
+
+    As in dynamic_time_warping, columns 0-3 (frame number and hip coordinates) are
+    ignored. Subclasses override features, and non-Euclidean kernels also
+    cost_matrix.
+
+    Attributes:
+        method: Name of the DTW variant saved with the results.
+        euclidean: Whether the local cost is the Euclidean distance of the features.
+    """
+
+    method: ClassVar[str] = "DTW"
+    euclidean: ClassVar[bool] = True
+
+    def features(self, data: np.ndarray) -> np.ndarray:
+        """Feature vectors of every frame of preprocessed data.
+
+        Args:
+            data: Preprocessed data with 61 columns, one row per frame.
+
+        Returns:
+            Array with one row of features per frame.
+        """
+        return data[:, 4:]
+
+    def cost_matrix(
+        self, subject_features: np.ndarray, target_features: np.ndarray
+    ) -> np.ndarray:
+        """Local cost of every pair of subject and target frames.
+
+        The Euclidean distance of the features. kernel_dynamic_time_warping only
+        calls it for non-Euclidean kernels, which override it; Euclidean kernels run
+        on the DTW engines, which compute the same distances strip by strip or
+        within the window.
+
+        Args:
+            subject_features: Features of the subject frames.
+            target_features: Features of the target frames.
+
+        Returns:
+            Array of shape (num_frames_subject, num_frames_target).
+        """
+        # similarity_functions imports this module, so it is imported on use.
+        from mobi_motion_tracking.processing import similarity_functions
+
+        return similarity_functions._pairwise_distances(
+            subject_features, target_features
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class WeightedKernel(CostKernel):
+    """Euclidean distance with one weight per joint.
+
+    The cost of two frames is sqrt(sum_j w_j * |s_j - t_j|^2) over the joints j
+    after the hip. A weight of 0 ignores a joint.
+
+    Attributes:
+        weights: Weight of every joint of joint_index_list.JOINT_NAMES. The hip
+            weight has no effect, since the hip is not compared.
+    """
+
+    method: ClassVar[str] = "WeightedDTW"
+
+    weights: Tuple[float, ...] = (1.0,) * len(joint_index_list.JOINT_NAMES)
+
+    @classmethod
+    def from_joint_weights(cls, joint_weights: Dict[str, float]) -> "WeightedKernel":
+        """Kernel weighing the named joints, and every other joint with 1.
+
+        Args:
+            joint_weights: Weight of joints by their name in
+                joint_index_list.JOINT_NAMES.
+
+        Returns:
+            The weighted kernel.
+
+        Raises:
+            ValueError: when a joint name is unknown.
+            ValueError: when a weight is negative.
+        """
+        for name, weight in joint_weights.items():
+            if name not in joint_index_list.JOINT_NAMES:
+                raise ValueError(f"Unknown joint name: {name}")
+            if weight < 0:
+                raise ValueError("Joint weights must be non-negative.")
+        return cls(
+            tuple(
+                float(joint_weights.get(name, 1.0))
+                for name in joint_index_list.JOINT_NAMES
+            )
+        )
+
+    def features(self, data: np.ndarray) -> np.ndarray:
+        """Joint coordinates scaled by the square root of their joint weight."""
+        scale = np.repeat(np.sqrt(self.weights[1:]), 3)
+        return data[:, 4:] * scale.astype(np.result_type(data, np.float32))
+
+
+@dataclasses.dataclass(frozen=True)
+class DerivativeKernel(CostKernel):
+    """Euclidean distance between the estimated derivatives of two frames.
+
+    The derivative of frame i is the average of the backward difference
+    x_i - x_(i-1) and the central difference (x_(i+1) - x_(i-1)) / 2, as in
+    derivative DTW. The first and last frames take the derivative of their
+    neighbour.
+    """
+
+    method: ClassVar[str] = "DerivativeDTW"
+
+    def features(self, data: np.ndarray) -> np.ndarray:
+        """Estimated derivative of the joint coordinates of every frame."""
+        coordinates = data[:, 4:]
+        derivatives = np.zeros(
+            coordinates.shape, dtype=np.result_type(coordinates, np.float32)
+        )
+        if len(coordinates) == 2:
+            derivatives[:] = coordinates[1] - coordinates[0]
+        elif len(coordinates) > 2:
+            derivatives[1:-1] = (
+                coordinates[1:-1]
+                - coordinates[:-2]
+                + (coordinates[2:] - coordinates[:-2]) / 2
+            ) / 2
+            derivatives[0] = derivatives[1]
+            derivatives[-1] = derivatives[-2]
+        return derivatives
+
+
+@dataclasses.dataclass(frozen=True)
+class CosineKernel(CostKernel):
+    """Mean cosine distance between the segment directions of two frames.
+
+    The cost of two frames is 1 - mean_k(cos(angle between segment k of the
+    subject frame and segment k of the target frame)), between 0 for identical
+    directions and 2 for opposite ones. A segment of zero length, or with missing
+    coordinates, has no direction and costs 1.
+
+    Attributes:
+        topology: Segments whose directions are compared.
+    """
+
+    method: ClassVar[str] = "CosineDTW"
+    euclidean: ClassVar[bool] = False
+
+    topology: joint_index_list.SkeletonTopology = (
+        joint_index_list.DEFAULT_SKELETON_TOPOLOGY
+    )
+
+    def features(self, data: np.ndarray) -> np.ndarray:
+        """Unit direction vectors of all segments, concatenated per frame."""
+        segments = (
+            data[:, self.topology.end_indices] - data[:, self.topology.start_indices]
+        )
+        lengths = np.linalg.norm(segments, axis=2, keepdims=True)
+        directions = np.divide(
+            segments,
+            lengths,
+            out=np.zeros(segments.shape, dtype=lengths.dtype),
+            where=lengths > 0,
+        )
+        return directions.reshape(len(data), -1)
+
+    def cost_matrix(
+        self, subject_features: np.ndarray, target_features: np.ndarray
+    ) -> np.ndarray:
+        """Mean cosine distance of the segment directions of every frame pair."""
+        cost = subject_features @ target_features.T
+        cost *= -1 / max(self.topology.num_segments, 1)
+        cost += 1
+        return np.maximum(cost, 0, out=cost)
+
+
+def build_kernel(
+    algorithm: str, joint_weights: Optional[Dict[str, float]] = None
+) -> CostKernel:
+    """Kernel of an algorithm in KERNEL_LIST.
+
+    Args:
+        algorithm: Name of the algorithm, one of KERNEL_LIST.
+        joint_weights: Weights of the 'weighted_dtw' kernel, by joint name. Joints
+            that are not named have weight 1.
+
+    Returns:
+        The cost kernel.
+
+    Raises:
+        ValueError: when algorithm is not a kernel algorithm.
+    """
+    if algorithm == "weighted_dtw":
+        return WeightedKernel.from_joint_weights(joint_weights or {})
+    if algorithm == "derivative_dtw":
+        return DerivativeKernel()
+    if algorithm == "cosine_dtw":
+        return CosineKernel()
+    raise ValueError("Unsupported cost kernel selected.")
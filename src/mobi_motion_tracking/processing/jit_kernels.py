@@ -0,0 +1,293 @@
+"""Numba-compiled kernels of the DTW recursion, traceback and segment normalization.
+
+The kernels are compiled when the optional 'fast' extra is installed, which provides
+numba:
+
+    pip install "mobi_motion_tracking[fast]"
+
+The NumPy implementations hide the sequential dependency of the cost recursion
+behind anti-diagonal wavefronts, which still pay for one strided slice operation per
+anti-diagonal. The compiled kernels visit every cell in a plain loop instead, and
+the traceback and segment normalization loops run without Python overhead.
+
+Callers check AVAILABLE and otherwise use their NumPy implementations, so the
+package works the same without numba. Given the same local costs, the accumulated
+costs and warping paths are identical to the NumPy engines. Frame distances and
+normalized coordinates may differ by floating point rounding only, because the
+kernels sum the squared coordinates in another order.
+
+Kernels are compiled for every new combination of argument types on their first
+call, and cached on disk so later processes load them.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None  # type: ignore[assignment]
+
+# numba turns njit into a no-op when NUMBA_DISABLE_JIT is set, in which case the
+# loops below would run as plain Python, far slower than the NumPy fallbacks.
+AVAILABLE = numba is not None and not numba.config.DISABLE_JIT  # type: ignore[attr-defined]
+
+
+def _jit(function: Callable) -> Callable:
+    """Compile function in nopython mode when numba is installed."""
+    if numba is None:
+        return function
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+@_jit
+def _minimum(first: float, second: float) -> float:
+    """Smaller of two costs, or the first NaN, like np.minimum."""
+    if first != first or first <= second:
+        return first
+    return second
+
+
+@_jit
+def _step(up: float, left: float, up_left: float) -> int:
+    """Traceback step of a cell, as in similarity_functions._traceback.
+
+    Returns:
+        0 to go up, 1 to go left, and 2 to go up and left: the first minimum of
+            [up, left, up_left], or the first NaN.
+    """
+    if (
+        up != up
+        or (left == left and up_left == up_left)
+        and (up <= left and up <= up_left)
+    ):
+        return 0
+    if left != left or (up_left == up_left and left <= up_left):
+        return 1
+    return 2
+
+
+@_jit
+def fill_wavefronts(cost_matrices: np.ndarray) -> None:
+    """Accumulate a stack of cost matrices in place, row after row.
+
+    See similarity_functions._fill_wavefronts for the layout. Every cell only depends
+    on its upper, left and upper-left neighbours, so a row-major loop visits them in
+    a valid order.
+
+    Args:
+        cost_matrices: Stack of matrices of boundary and local costs, of shape
+            (num_matrices, num_rows, num_columns).
+    """
+    num_matrices, num_rows, num_columns = cost_matrices.shape
+    for matrix in range(num_matrices):
+        cost = cost_matrices[matrix]
+        for row in range(1, num_rows):
+            for column in range(1, num_columns):
+                cost[row, column] += _minimum(
+                    _minimum(cost[row - 1, column], cost[row, column - 1]),
+                    cost[row - 1, column - 1],
+                )
+
+
+@_jit
+def fill_banded(
+    subject_data: np.ndarray,
+    target_data: np.ndarray,
+    first_rows: np.ndarray,
+    last_rows: np.ndarray,
+    row_zero_positions: np.ndarray,
+    values: np.ndarray,
+) -> None:
+    """Accumulate the values of a banded cost matrix in place.
+
+    See similarity_functions._BandedCostMatrix for the layout. Frame distances are
+    computed cell by cell, so no anti-diagonal of differences is allocated.
+
+    Args:
+        subject_data: subject joint coordinates, one row per frame.
+        target_data: target joint coordinates, one row per frame.
+        first_rows: First stored row of every anti-diagonal.
+        last_rows: Last stored row of every anti-diagonal.
+        row_zero_positions: Position in values of row 0 of every anti-diagonal.
+        values: Infinite stored cells, with the cell (0, 0) set to 0.
+    """
+    num_coordinates = subject_data.shape[1]
+    for diagonal in range(2, len(first_rows)):
+        current = row_zero_positions[diagonal]
+        previous = row_zero_positions[diagonal - 1]
+        before_previous = row_zero_positions[diagonal - 2]
+        for row in range(first_rows[diagonal], last_rows[diagonal] + 1):
+            column = diagonal - row
+            squared = 0.0
+            for coordinate in range(num_coordinates):
+                difference = (
+                    subject_data[row - 1, coordinate]
+                    - target_data[column - 1, coordinate]
+                )
+                squared += difference * difference
+            values[current + row] = np.sqrt(squared) + _minimum(
+                _minimum(values[previous + row - 1], values[previous + row]),
+                values[before_previous + row - 1],
+            )
+
+
+@_jit
+def traceback_dense(cost_matrix: np.ndarray, path: np.ndarray) -> int:
+    """Write the optimal warping path of a dense cost matrix backwards into path.
+
+    Args:
+        cost_matrix: Accumulated cost matrix with a leading padding row and column.
+        path: int32 array of shape (num_rows + num_columns - 1, 2).
+
+    Returns:
+        Position of the first path cell, (0, 0), in path.
+    """
+    subject_idx, target_idx = cost_matrix.shape[0] - 1, cost_matrix.shape[1] - 1
+    position = len(path) - 1
+    path[position, 0], path[position, 1] = subject_idx, target_idx
+
+    while subject_idx > 0 or target_idx > 0:
+        if subject_idx == 0:
+            target_idx -= 1
+        elif target_idx == 0:
+            subject_idx -= 1
+        else:
+            step = _step(
+                cost_matrix[subject_idx - 1, target_idx],
+                cost_matrix[subject_idx, target_idx - 1],
+                cost_matrix[subject_idx - 1, target_idx - 1],
+            )
+            if step != 1:
+                subject_idx -= 1
+            if step != 0:
+                target_idx -= 1
+        position -= 1
+        path[position, 0], path[position, 1] = subject_idx, target_idx
+
+    return position
+
+
+@_jit
+def _banded_cell(
+    first_rows: np.ndarray,
+    last_rows: np.ndarray,
+    row_zero_positions: np.ndarray,
+    values: np.ndarray,
+    row: int,
+    column: int,
+) -> float:
+    """Accumulated cost of a cell of a banded matrix, infinite outside the window."""
+    diagonal = row + column
+    if row < first_rows[diagonal] or row > last_rows[diagonal]:
+        return np.inf
+    return values[row_zero_positions[diagonal] + row]
+
+
+@_jit
+def traceback_banded(
+    first_rows: np.ndarray,
+    last_rows: np.ndarray,
+    row_zero_positions: np.ndarray,
+    values: np.ndarray,
+    path: np.ndarray,
+) -> int:
+    """Write the optimal warping path of a banded cost matrix backwards into path.
+
+    Args:
+        first_rows: First stored row of every anti-diagonal.
+        last_rows: Last stored row of every anti-diagonal.
+        row_zero_positions: Position in values of row 0 of every anti-diagonal.
+        values: Accumulated costs of all stored cells, with padding.
+        path: int32 array of shape (num_rows + num_columns - 1, 2).
+
+    Returns:
+        Position of the first path cell, (0, 0), in path.
+    """
+    subject_idx = last_rows[-1]
+    target_idx = len(first_rows) - 1 - subject_idx
+    position = len(path) - 1
+    path[position, 0], path[position, 1] = subject_idx, target_idx
+
+    while subject_idx > 0 or target_idx > 0:
+        if subject_idx == 0:
+            target_idx -= 1
+        elif target_idx == 0:
+            subject_idx -= 1
+        else:
+            step = _step(
+                _banded_cell(
+                    first_rows,
+                    last_rows,
+                    row_zero_positions,
+                    values,
+                    subject_idx - 1,
+                    target_idx,
+                ),
+                _banded_cell(
+                    first_rows,
+                    last_rows,
+                    row_zero_positions,
+                    values,
+                    subject_idx,
+                    target_idx - 1,
+                ),
+                _banded_cell(
+                    first_rows,
+                    last_rows,
+                    row_zero_positions,
+                    values,
+                    subject_idx - 1,
+                    target_idx - 1,
+                ),
+            )
+            if step != 1:
+                subject_idx -= 1
+            if step != 0:
+                target_idx -= 1
+        position -= 1
+        path[position, 0], path[position, 1] = subject_idx, target_idx
+
+    return position
+
+
+@_jit
+def normalize_segments(
+    centered_data: np.ndarray,
+    normalized_data: np.ndarray,
+    start_indices: np.ndarray,
+    end_indices: np.ndarray,
+    segment_lengths: np.ndarray,
+) -> None:
+    """Scale the segments of every frame to the segment lengths, in place.
+
+    See preprocessing.normalize_segments. Frames are independent, and the segments
+    of a frame are processed in order, so each segment is attached to its starting
+    joint after that joint was moved.
+
+    Args:
+        centered_data: centered data whose segment directions are kept.
+        normalized_data: copy of centered_data whose ending joints are moved.
+        start_indices: x, y, and z columns of the starting joint of every segment.
+        end_indices: x, y, and z columns of the ending joint of every segment.
+        segment_lengths: float64 target length of every segment.
+    """
+    for frame in range(centered_data.shape[0]):
+        for segment in range(len(segment_lengths)):
+            squared = 0.0
+            for axis in range(3):
+                component = (
+                    centered_data[frame, end_indices[segment, axis]]
+                    - centered_data[frame, start_indices[segment, axis]]
+                )
+                squared += component * component
+            norm = np.sqrt(squared)
+            scale = segment_lengths[segment] / norm if norm > 0 else 0.0
+            for axis in range(3):
+                normalized_data[frame, end_indices[segment, axis]] = normalized_data[
+                    frame, start_indices[segment, axis]
+                ] + scale * (
+                    centered_data[frame, end_indices[segment, axis]]
+                    - centered_data[frame, start_indices[segment, axis]]
+                )
@@ -0,0 +1,185 @@
+"""Nearest-neighbour DTW search with a lower-bound pruning cascade."""
+
+import bisect
+from typing import Mapping, Optional
+
+import numpy as np
+
+from mobi_motion_tracking.core import models
+from mobi_motion_tracking.processing import similarity_functions
+
+
+def lb_kim(
+    preprocessed_target_data: np.ndarray, preprocessed_subject_data: np.ndarray
+) -> float:
+    """Lower bound of the DTW distance from the first and last frames.
+
+    Every warping path starts by matching the first frames and ends by matching the
+    last frames, so the sum of those two frame distances never exceeds the DTW
+    distance. As in dynamic_time_warping, columns 0-3 are ignored.
+
+    Args:
+        preprocessed_target_data: cleaned and centered target data.
+        preprocessed_subject_data: cleaned, centered, and normalized subject data.
+
+    Returns:
+        The LB_Kim lower bound.
+    """
+    target = preprocessed_target_data[:, 4:]
+    subject = preprocessed_subject_data[:, 4:]
+
+    first = float(np.linalg.norm(subject[0] - target[0]))
+    if len(subject) == 1 and len(target) == 1:
+        return first
+    return first + float(np.linalg.norm(subject[-1] - target[-1]))
+
+
+def lb_keogh(
+    preprocessed_target_data: np.ndarray,
+    preprocessed_subject_data: np.ndarray,
+    window_size: Optional[int] = None,
+) -> float:
+    """Lower bound of the DTW distance from the envelope of the target.
+
+    Subject frame i can only be matched to target frames within window_size of i.
+    Over those frames every coordinate of the target stays between a lower and an
+    upper envelope, so the distance from the subject frame to that box is a lower
+    bound of any cost it can pick up. Every subject frame is matched at least once,
+    so the sum of these distances never exceeds the DTW distance. The window is
+    widened to the length difference exactly as in dynamic_time_warping.
+
+    Args:
+        preprocessed_target_data: cleaned and centered target data.
+        preprocessed_subject_data: cleaned, centered, and normalized subject data.
+        window_size: Sakoe-Chiba window of the DTW being bounded. If None, the
+            whole target is used as envelope.
+
+    Returns:
+        The LB_Keogh lower bound.
+    """
+    target = preprocessed_target_data[:, 4:]
+    subject = preprocessed_subject_data[:, 4:]
+    num_frames_subject, num_frames_target = len(subject), len(target)
+
+    if window_size is None:
+        window_size = max(num_frames_subject, num_frames_target)
+    else:
+        window_size = max(window_size, abs(num_frames_subject - num_frames_target))
+
+    upper = _sliding_extreme(target, window_size, num_frames_subject, np.maximum)
+    lower = _sliding_extreme(-target, window_size, num_frames_subject, np.maximum)
+    lower *= -1
+
+    excess = np.maximum(subject - upper, 0) + np.maximum(lower - subject, 0)
+    return float(np.sqrt(np.einsum("ij,ij->i", excess, excess)).sum())
+
+
+def nearest_neighbors(
+    preprocessed_subject_data: np.ndarray,
+    candidates: Mapping[str, np.ndarray],
+    k: int = 1,
+    window_size: Optional[int] = None,
+) -> models.NeighborSearchResult:
+    """Find the k candidates with the smallest DTW distance to a subject sequence.
+
+    Candidates, such as preprocessed gold recordings or other participants, take the
+    target role of dynamic_time_warping. Each candidate goes through a cascade of
+    increasingly expensive checks, and leaves it as soon as it provably cannot beat
+    the current k-th best distance:
+
+    1. LB_Kim, from the first and last frames. Candidates are visited in order of
+       increasing LB_Kim, so once one is pruned all remaining ones are too.
+    2. LB_Keogh, from the envelope of the candidate over the DTW window.
+    3. Exact distance-only DTW, abandoned early once it exceeds the k-th best.
+
+    Args:
+        preprocessed_subject_data: cleaned, centered, and normalized subject data.
+        candidates: Preprocessed candidate data keyed by label.
+        k: Number of neighbours to return.
+        window_size: Optional Sakoe-Chiba window used for DTW and LB_Keogh.
+
+    Returns:
+        NeighborSearchResult with the k nearest candidates and the number of
+            candidates that left the cascade at each stage.
+
+    Raises:
+        ValueError: when k is smaller than 1.
+    """
+    if k < 1:
+        raise ValueError("k must be a positive integer.")
+
+    result = models.NeighborSearchResult()
+    best_distances: list[float] = []
+    best_labels: list[str] = []
+
+    kim_bounds = sorted(
+        (lb_kim(data, preprocessed_subject_data), label)
+        for label, data in candidates.items()
+    )
+    for position, (kim_bound, label) in enumerate(kim_bounds):
+        kth_best = best_distances[-1] if len(best_distances) == k else float("inf")
+        if kim_bound >= kth_best:
+            result.pruned_by_kim = len(kim_bounds) - position
+            break
+
+        candidate_data = candidates[label]
+        if lb_keogh(candidate_data, preprocessed_subject_data, window_size) >= kth_best:
+            result.pruned_by_keogh += 1
+            continue
+
+        distance = similarity_functions.dynamic_time_warping(
+            candidate_data,
+            preprocessed_subject_data,
+            window_size=window_size,
+            distance_only=True,
+            upper_bound=None if kth_best == float("inf") else kth_best,
+        ).metrics["distance"]
+        if distance > kth_best:
+            result.abandoned += 1
+            continue
+
+        result.computed += 1
+        if distance < kth_best:
+            position = bisect.bisect_right(best_distances, distance)
+            best_distances.insert(position, distance)
+            best_labels.insert(position, label)
+            del best_distances[k:], best_labels[k:]
+
+    result.neighbors = list(zip(best_labels, best_distances))
+    return result
+
+
+def _sliding_extreme(
+    data: np.ndarray, half_width: int, num_positions: int, ufunc: np.ufunc
+) -> np.ndarray:
+    """Running maximum over a centered window, in O(frames) per coordinate.
+
+    Position i covers the frames i - half_width to i + half_width that exist in
+    data. The van Herk/Gil-Werman scheme splits the padded frames into blocks of the
+    window length and combines a suffix extreme of one block with a prefix extreme
+    of the next, so the cost does not depend on the window length.
+
+    Args:
+        data: Values, one row per frame.
+        half_width: Number of frames on either side of each position.
+        num_positions: Number of positions to evaluate, starting at frame 0.
+        ufunc: np.maximum; pass negated data to get a running minimum.
+
+    Returns:
+        Array of shape (num_positions, data.shape[1]).
+    """
+    if half_width >= max(len(data), num_positions):
+        return np.broadcast_to(data.max(axis=0), (num_positions, data.shape[1])).copy()
+
+    window = 2 * half_width + 1
+    num_blocks = -(-(num_positions + window - 1) // window)
+    padded = np.full((num_blocks * window, data.shape[1]), -np.inf)
+    padded[half_width : half_width + len(data)] = data
+
+    blocks = padded.reshape(num_blocks, window, -1)
+    prefix = ufunc.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    return ufunc(
+        suffix[:num_positions], prefix[window - 1 : window - 1 + num_positions]
+    )
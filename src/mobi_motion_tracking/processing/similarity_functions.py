@@ -1,16 +1,41 @@
 """Functions for calculating similarity metrics on preprocessed data."""
 
-from typing import Optional
+import dataclasses
+from typing import Literal, Optional, Sequence, Union
 
 import numpy as np
 
 from mobi_motion_tracking.core import models
+from mobi_motion_tracking.processing import cost_kernels, jit_kernels
+
+ENGINE_LIST = ["reference", "vectorized"]
+
+# Relative size of a squared distance below which _pairwise_distances recomputes it
+# from the explicit frame difference instead of the dot-product expansion. The
+# float32 expansion keeps about 1e-7 of the squared norms, so it is trusted less.
+_EXPANSION_TOLERANCE = 1e-6
+_EXPANSION_TOLERANCE_FLOAT32 = 1e-3
+
+# Number of accumulated costs held by one strip of the distance-only DTW. Strips
+# are also kept about as tall as the window is wide, so that narrow windows do not
+# compute a rectangle much larger than the window itself.
+_STRIP_ELEMENTS = 2**20
+_MIN_STRIP_ROWS = 64
+
+# Number of accumulated costs held by one group of batch_dynamic_time_warping, and
+# the relative length difference allowed within a group. Subjects are padded to the
+# longest subject of their group, so the slack bounds the wasted rows.
+_BATCH_ELEMENTS = 2**24
+_BATCH_LENGTH_SLACK = 0.25
 
 
 def dynamic_time_warping(
     preprocessed_target_data: np.ndarray,
     preprocessed_subject_data: np.ndarray,
     window_size: Optional[int] = None,
+    engine: Literal["reference", "vectorized"] = "vectorized",
+    distance_only: bool = False,
+    upper_bound: Optional[float] = None,
 ) -> models.SimilarityMetrics:
     """Perform dynamic time warping.
 
@@ -23,22 +48,156 @@ def dynamic_time_warping(
     we index the data starting at the 4th column until the end. This function returns
     a dataclass which stores the DTW similarity metrics, distance and paths.
 
+    Two engines fill the accumulated cost matrix. The 'reference' engine visits every
+    cell in a Python double loop. The 'vectorized' engine computes all pairwise frame
+    distances in one batched call and fills the accumulated cost one anti-diagonal at
+    a time, since every cell on an anti-diagonal only depends on the two previous
+    anti-diagonals. When window_size excludes part of the matrix, the 'vectorized'
+    engine only stores the cells inside the Sakoe-Chiba band, so memory and time
+    scale with num_frames_subject * window_size. Both engines return the same
+    metrics up to floating point rounding.
+
+    When only the distance is needed, distance_only skips the traceback. The
+    'vectorized' engine then keeps a single rolling row of accumulated cost plus a
+    small strip of rows in memory, and can abandon the computation early: every
+    warping path crosses every row, so once all cells of a row exceed upper_bound
+    the final distance must exceed it too.
+
+    When both sequences are float32, frame distances and accumulated costs are
+    computed and stored in float32, which halves the memory and memory traffic of
+    the cost matrix. Pairs whose accumulated cost could overflow float32 are
+    compared in float64, as are all other input types.
+
     Args:
         preprocessed_target_data: cleaned and centered target data.
         preprocessed_subject_data: cleaned, centered, and normalized subject data.
         window_size: constraint for matching points, ensuring
             |num_frames_subject - num_frames_target| <= window_size. If None, the
             window size is set to the maximum amount of rows of the two sequences.
+        engine: Name of the engine used to fill the cost matrix, one of ENGINE_LIST.
+        distance_only: If True, only the distance is computed and the returned
+            metrics contain no warping paths.
+        upper_bound: Optional distance above which the computation may stop, in
+            which case the returned distance is infinite. Requires distance_only.
 
     Returns:
         SimilarityMetrics: a dataclass which stores the DTW similarity metrics.
 
     Raises:
         ValueError: when dimensions of the two inputs do not match.
+        ValueError: when engine is unsupported.
+        ValueError: when upper_bound is given without distance_only.
     """
-    preprocessed_subject_data = preprocessed_subject_data[:, 4:]
-    preprocessed_target_data = preprocessed_target_data[:, 4:]
+    return _warp(
+        preprocessed_subject_data[:, 4:],
+        preprocessed_target_data[:, 4:],
+        window_size,
+        engine,
+        distance_only,
+        upper_bound,
+    )
+
+
+def kernel_dynamic_time_warping(
+    preprocessed_target_data: np.ndarray,
+    preprocessed_subject_data: np.ndarray,
+    kernel: cost_kernels.CostKernel,
+    window_size: Optional[int] = None,
+    distance_only: bool = False,
+) -> models.SimilarityMetrics:
+    """Perform dynamic time warping with the local cost of a cost kernel.
+
+    Both sequences are mapped to the features of the kernel once. Kernels whose cost
+    is the Euclidean distance of their features are aligned exactly like
+    dynamic_time_warping aligns joint coordinates, with the same banded and
+    distance-only engines. For the other kernels the full local cost matrix is
+    computed in one call to the kernel, cells outside the window are excluded, and
+    the matrix is accumulated by anti-diagonal wavefronts.
+
+    Args:
+        preprocessed_target_data: cleaned and centered target data.
+        preprocessed_subject_data: cleaned, centered, and normalized subject data.
+        kernel: Local cost kernel, see cost_kernels.build_kernel.
+        window_size: Optional Sakoe-Chiba window size, as in dynamic_time_warping.
+        distance_only: If True, only the distance is computed and the returned
+            metrics contain no warping paths.
+
+    Returns:
+        SimilarityMetrics: a dataclass which stores the DTW similarity metrics, with
+            the method of the kernel.
+
+    Raises:
+        ValueError: when dimensions of the two inputs do not match.
+    """
+    subject_features = kernel.features(preprocessed_subject_data)
+    target_features = kernel.features(preprocessed_target_data)
+    if kernel.euclidean:
+        return _warp(
+            subject_features,
+            target_features,
+            window_size,
+            "vectorized",
+            distance_only,
+            method=kernel.method,
+        )
+
+    if subject_features.shape[1] != target_features.shape[1]:
+        raise ValueError(
+            "Error in dtw(): the dimensions of the two input signals do not match."
+        )
+    num_frames_subject, num_frames_target = len(subject_features), len(target_features)
+    local_cost = kernel.cost_matrix(subject_features, target_features)
+    cost_matrix = np.full(
+        (num_frames_subject + 1, num_frames_target + 1),
+        float("inf"),
+        dtype=local_cost.dtype,
+    )
+    cost_matrix[1:, 1:] = local_cost
+    cost_matrix[0, 0] = 0
+    if window_size is not None:
+        first_columns, last_columns = _sakoe_chiba_bounds(
+            num_frames_subject,
+            num_frames_target,
+            max(window_size, abs(num_frames_subject - num_frames_target)),
+        )
+        columns = np.arange(1, num_frames_target + 1)
+        cost_matrix[1:, 1:][
+            (columns < first_columns[1:, np.newaxis])
+            | (columns > last_columns[1:, np.newaxis])
+        ] = float("inf")
 
+    _fill_wavefronts(cost_matrix)
+
+    distance = float(cost_matrix[num_frames_subject, num_frames_target])
+    if distance_only:
+        return models.SimilarityMetrics.from_dtw(distance, method=kernel.method)
+    return models.SimilarityMetrics.from_dtw(
+        distance, _traceback(cost_matrix), method=kernel.method
+    )
+
+
+def _warp(
+    preprocessed_subject_data: np.ndarray,
+    preprocessed_target_data: np.ndarray,
+    window_size: Optional[int],
+    engine: Literal["reference", "vectorized"],
+    distance_only: bool,
+    upper_bound: Optional[float] = None,
+    method: str = "DTW",
+) -> models.SimilarityMetrics:
+    """Align two sequences by the Euclidean distance of their frames.
+
+    See dynamic_time_warping, whose inputs have already been reduced to the compared
+    columns here.
+
+    Returns:
+        SimilarityMetrics of the given method.
+
+    Raises:
+        ValueError: when dimensions of the two inputs do not match.
+        ValueError: when engine is unsupported.
+        ValueError: when upper_bound is given without distance_only.
+    """
     num_frames_subject, num_joints_subject = preprocessed_subject_data.shape
     num_frames_target, num_joints_target = preprocessed_target_data.shape
 
@@ -52,6 +211,383 @@ def dynamic_time_warping(
     else:
         window_size = max(window_size, abs(num_frames_subject - num_frames_target))
 
+    if upper_bound is not None and not distance_only:
+        raise ValueError("upper_bound can only be used with distance_only.")
+
+    dtype = _cost_dtype(preprocessed_subject_data, preprocessed_target_data)
+    preprocessed_subject_data = preprocessed_subject_data.astype(dtype, copy=False)
+    preprocessed_target_data = preprocessed_target_data.astype(dtype, copy=False)
+
+    if distance_only and engine == "vectorized":
+        first_columns, last_columns = _sakoe_chiba_bounds(
+            num_frames_subject, num_frames_target, window_size
+        )
+        distance = _strip_distance(
+            preprocessed_subject_data,
+            preprocessed_target_data,
+            first_columns,
+            last_columns,
+            upper_bound,
+        )
+        return models.SimilarityMetrics.from_dtw(distance=distance, method=method)
+
+    cost_matrix: Union[np.ndarray, _BandedCostMatrix]
+    if engine == "reference":
+        cost_matrix = _accumulate_cost_reference(
+            preprocessed_subject_data, preprocessed_target_data, window_size
+        )
+    elif engine == "vectorized" and window_size < max(
+        num_frames_subject, num_frames_target
+    ):
+        first_columns, last_columns = _sakoe_chiba_bounds(
+            num_frames_subject, num_frames_target, window_size
+        )
+        cost_matrix = _accumulate_cost_banded(
+            preprocessed_subject_data,
+            preprocessed_target_data,
+            first_columns,
+            last_columns,
+        )
+    elif engine == "vectorized":
+        cost_matrix = _accumulate_cost_vectorized(
+            preprocessed_subject_data, preprocessed_target_data
+        )
+    else:
+        raise ValueError("Unsupported DTW engine selected.")
+
+    distance = float(cost_matrix[num_frames_subject, num_frames_target])
+    if distance_only:
+        if upper_bound is not None and distance > upper_bound:
+            distance = float("inf")
+        return models.SimilarityMetrics.from_dtw(distance=distance, method=method)
+
+    path = _traceback(cost_matrix)
+
+    return models.SimilarityMetrics.from_dtw(
+        distance=distance, warping_path=path, method=method
+    )
+
+
+def fast_dynamic_time_warping(
+    preprocessed_target_data: np.ndarray,
+    preprocessed_subject_data: np.ndarray,
+    radius: int = 1,
+    distance_only: bool = False,
+) -> models.SimilarityMetrics:
+    """Perform approximate dynamic time warping with the multiscale FastDTW scheme.
+
+    Both sequences are repeatedly coarsened by averaging pairs of consecutive frames
+    until they are shorter than radius + 2 frames, where exact DTW is computed. The
+    warping path found at each resolution is projected onto the next finer
+    resolution and widened by radius frames in every direction, and DTW is refined
+    inside that window only. Time and memory therefore grow linearly with the
+    sequence lengths, at the cost of possibly missing the optimal path. The returned
+    distance is never lower than the exact DTW distance. As in dynamic_time_warping,
+    columns 0-3 (frame number and hip coordinates) are ignored.
+
+    Args:
+        preprocessed_target_data: cleaned and centered target data.
+        preprocessed_subject_data: cleaned, centered, and normalized subject data.
+        radius: Number of extra frames searched around the projected path at every
+            resolution. Larger values are slower and closer to exact DTW.
+        distance_only: If True, the final traceback is skipped and the returned
+            metrics contain no warping paths.
+
+    Returns:
+        SimilarityMetrics: a dataclass which stores the FastDTW similarity metrics.
+
+    Raises:
+        ValueError: when dimensions of the two inputs do not match.
+        ValueError: when radius is negative.
+    """
+    preprocessed_subject_data = preprocessed_subject_data[:, 4:]
+    preprocessed_target_data = preprocessed_target_data[:, 4:]
+
+    if preprocessed_subject_data.shape[1] != preprocessed_target_data.shape[1]:
+        raise ValueError(
+            "Error in fastdtw(): the dimensions of the two input signals do not match."
+        )
+    if radius < 0:
+        raise ValueError("FastDTW radius must be a non-negative integer.")
+
+    dtype = _cost_dtype(preprocessed_subject_data, preprocessed_target_data)
+    preprocessed_subject_data = preprocessed_subject_data.astype(dtype, copy=False)
+    preprocessed_target_data = preprocessed_target_data.astype(dtype, copy=False)
+
+    num_frames_subject = preprocessed_subject_data.shape[0]
+    num_frames_target = preprocessed_target_data.shape[0]
+    min_frames = radius + 2
+    if num_frames_subject < min_frames or num_frames_target < min_frames:
+        cost_matrix = _accumulate_cost_vectorized(
+            preprocessed_subject_data, preprocessed_target_data
+        )
+        distance = float(cost_matrix[num_frames_subject, num_frames_target])
+        if distance_only:
+            return models.SimilarityMetrics.from_dtw(distance, method="FastDTW")
+        return models.SimilarityMetrics.from_dtw(
+            distance, _traceback(cost_matrix), method="FastDTW"
+        )
+
+    coarse_metrics = fast_dynamic_time_warping(
+        _coarsen(preprocessed_target_data),
+        _coarsen(preprocessed_subject_data),
+        radius,
+    )
+    # "target_path" holds the first (subject) index of every path cell.
+    first_columns, last_columns = _project_window(
+        np.asarray(coarse_metrics.metrics["target_path"]),
+        np.asarray(coarse_metrics.metrics["experimental_path"]),
+        num_frames_subject,
+        num_frames_target,
+        radius,
+    )
+
+    if distance_only:
+        distance = _strip_distance(
+            preprocessed_subject_data,
+            preprocessed_target_data,
+            first_columns,
+            last_columns,
+        )
+        return models.SimilarityMetrics.from_dtw(distance, method="FastDTW")
+
+    banded_cost = _accumulate_cost_banded(
+        preprocessed_subject_data,
+        preprocessed_target_data,
+        first_columns,
+        last_columns,
+    )
+    return models.SimilarityMetrics.from_dtw(
+        banded_cost[num_frames_subject, num_frames_target],
+        _traceback(banded_cost),
+        method="FastDTW",
+    )
+
+
+def batch_dynamic_time_warping(
+    preprocessed_target_data: np.ndarray,
+    preprocessed_subject_data: Sequence[np.ndarray],
+    window_size: Optional[int] = None,
+    distance_only: bool = False,
+) -> list[models.SimilarityMetrics]:
+    """Perform dynamic time warping of many subjects against one target.
+
+    Returns the same metrics as calling dynamic_time_warping for every subject, up
+    to floating point rounding. Without a window, subjects are sorted by length and
+    grouped with subjects of similar length. Each group is padded to its longest
+    subject and filled as a single stack of accumulated cost matrices: the local
+    distances are computed in strips of rows that share the target norms, and every
+    anti-diagonal wavefront updates all matrices at once. Padding rows stay infinite
+    and only follow the real rows, so they never change the cost of the cells a
+    subject ends in. With distance_only, a subject alone in its group, or a group
+    over the memory budget, is compared strip by strip like dynamic_time_warping
+    does, keeping one row of accumulated cost. With a window, the Sakoe-Chiba band
+    of each subject depends on its length, and subjects are compared one at a time.
+
+    Args:
+        preprocessed_target_data: cleaned and centered target data.
+        preprocessed_subject_data: cleaned, centered, and normalized data of every
+            subject.
+        window_size: constraint for matching points, as in dynamic_time_warping.
+        distance_only: If True, only the distances are computed and the returned
+            metrics contain no warping paths.
+
+    Returns:
+        SimilarityMetrics of every subject, in the order of the subjects.
+
+    Raises:
+        ValueError: when dimensions of the target and a subject do not match.
+    """
+    if window_size is not None:
+        return [
+            dynamic_time_warping(
+                preprocessed_target_data,
+                subject_data,
+                window_size=window_size,
+                distance_only=distance_only,
+            )
+            for subject_data in preprocessed_subject_data
+        ]
+
+    target_data = preprocessed_target_data[:, 4:]
+    subjects = [data[:, 4:] for data in preprocessed_subject_data]
+
+    if any(subject.shape[1] != target_data.shape[1] for subject in subjects):
+        raise ValueError(
+            "Error in dtw(): the dimensions of the two input signals do not match."
+        )
+
+    dtype = _cost_dtype(target_data, *subjects)
+    target_data = target_data.astype(dtype, copy=False)
+    target_norms = np.einsum("ij,ij->i", target_data, target_data)
+
+    metrics: list[Optional[models.SimilarityMetrics]] = [None] * len(subjects)
+    for group in _length_groups(
+        [len(subject) for subject in subjects], len(target_data)
+    ):
+        num_rows = max(len(subjects[index]) for index in group)
+        group_elements = len(group) * (num_rows + 1) * (len(target_data) + 1)
+        if distance_only and (len(group) == 1 or group_elements > _BATCH_ELEMENTS):
+            for index in group:
+                subject_data = subjects[index].astype(dtype, copy=False)
+                first_columns, last_columns = _sakoe_chiba_bounds(
+                    len(subject_data),
+                    len(target_data),
+                    max(len(subject_data), len(target_data)),
+                )
+                metrics[index] = models.SimilarityMetrics.from_dtw(
+                    distance=_strip_distance(
+                        subject_data, target_data, first_columns, last_columns
+                    )
+                )
+            continue
+
+        cost_matrices = np.full(
+            (len(group), num_rows + 1, len(target_data) + 1), float("inf"), dtype=dtype
+        )
+        strip_rows = max(1, _STRIP_ELEMENTS // len(target_data))
+        for position, index in enumerate(group):
+            subject_data = subjects[index].astype(dtype, copy=False)
+            for first_row in range(0, len(subject_data), strip_rows):
+                last_row = min(first_row + strip_rows, len(subject_data))
+                cost_matrices[position, first_row + 1 : last_row + 1, 1:] = (
+                    _pairwise_distances(
+                        subject_data[first_row:last_row], target_data, target_norms
+                    )
+                )
+        cost_matrices[:, 0, 0] = 0
+
+        _fill_wavefronts(cost_matrices)
+
+        for position, index in enumerate(group):
+            cost_matrix = cost_matrices[position, : len(subjects[index]) + 1]
+            distance = float(cost_matrix[-1, -1])
+            if distance_only:
+                metrics[index] = models.SimilarityMetrics.from_dtw(distance=distance)
+            else:
+                metrics[index] = models.SimilarityMetrics.from_dtw(
+                    distance=distance, warping_path=_traceback(cost_matrix)
+                )
+
+    return [metric for metric in metrics if metric is not None]
+
+
+def _length_groups(num_frames: list[int], num_frames_target: int) -> list[list[int]]:
+    """Group subject indices by similar length within the batch memory budget.
+
+    Args:
+        num_frames: Number of frames of every subject.
+        num_frames_target: Number of frames of the target.
+
+    Returns:
+        Lists of subject indices, each padded to its longest subject by the caller.
+    """
+    groups: list[list[int]] = []
+    for index in np.argsort(num_frames, kind="stable").tolist():
+        if groups:
+            group = groups[-1]
+            shortest = num_frames[group[0]]
+            group_elements = (
+                (len(group) + 1) * (num_frames[index] + 1) * (num_frames_target + 1)
+            )
+            if (
+                num_frames[index] <= shortest * (1 + _BATCH_LENGTH_SLACK)
+                and group_elements <= _BATCH_ELEMENTS
+            ):
+                group.append(index)
+                continue
+        groups.append([index])
+    return groups
+
+
+def _coarsen(data: np.ndarray) -> np.ndarray:
+    """Halve the frame rate by averaging pairs of consecutive frames.
+
+    The result keeps four leading placeholder columns so it has the same layout as
+    the preprocessed data passed to fast_dynamic_time_warping. A trailing unpaired
+    frame is kept as is.
+
+    Args:
+        data: joint coordinates, one row per frame.
+
+    Returns:
+        Array of ceil(num_frames / 2) frames with four leading zero columns.
+    """
+    num_pairs = data.shape[0] // 2
+    coarse = np.zeros((data.shape[0] - num_pairs, data.shape[1] + 4), dtype=data.dtype)
+    coarse[:num_pairs, 4:] = (
+        data[0 : 2 * num_pairs : 2] + data[1 : 2 * num_pairs : 2]
+    ) / 2
+    if data.shape[0] % 2:
+        coarse[-1, 4:] = data[-1]
+    return coarse
+
+
+def _project_window(
+    coarse_subject_path: np.ndarray,
+    coarse_target_path: np.ndarray,
+    num_frames_subject: int,
+    num_frames_target: int,
+    radius: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Column bounds of the search window projected from a coarse warping path.
+
+    Every coarse cell (i, j) covers the fine rows 2i - 1 and 2i and the fine columns
+    2j - 1 and 2j. The covered cells are widened by radius rows and columns. Because
+    the coarse path is monotone, the first and last column of every fine row are
+    non-decreasing, as _accumulate_cost_banded requires.
+
+    Args:
+        coarse_subject_path: Row index of every cell of the coarse path, starting
+            with the padding cell (0, 0).
+        coarse_target_path: Column index of every cell of the coarse path.
+        num_frames_subject: Number of fine subject frames (rows).
+        num_frames_target: Number of fine target frames (columns).
+        radius: Number of extra rows and columns added around the projected path.
+
+    Returns:
+        First and last column of every fine row, including the padding row 0.
+    """
+    coarse_rows = coarse_subject_path[1:]
+    coarse_columns = coarse_target_path[1:]
+    fine_rows = np.minimum(
+        np.concatenate((2 * coarse_rows - 1, 2 * coarse_rows)), num_frames_subject
+    )
+    fine_first_columns = np.tile(2 * coarse_columns - 1, 2)
+    fine_last_columns = np.minimum(np.tile(2 * coarse_columns, 2), num_frames_target)
+
+    path_first = np.full(num_frames_subject + 1, num_frames_target)
+    path_last = np.zeros(num_frames_subject + 1, dtype=int)
+    np.minimum.at(path_first, fine_rows, fine_first_columns)
+    np.maximum.at(path_last, fine_rows, fine_last_columns)
+
+    rows = np.arange(num_frames_subject + 1)
+    first_columns = np.maximum(path_first[np.maximum(rows - radius, 1)] - radius, 1)
+    last_columns = np.minimum(
+        path_last[np.minimum(rows + radius, num_frames_subject)] + radius,
+        num_frames_target,
+    )
+    first_columns[0] = last_columns[0] = 0
+    return first_columns, last_columns
+
+
+def _accumulate_cost_reference(
+    subject_data: np.ndarray, target_data: np.ndarray, window_size: int
+) -> np.ndarray:
+    """Fill the accumulated cost matrix cell by cell.
+
+    Args:
+        subject_data: subject joint coordinates, one row per frame.
+        target_data: target joint coordinates, one row per frame.
+        window_size: maximum allowed |row - column| of a matched cell.
+
+    Returns:
+        Accumulated cost matrix of shape (num_frames_subject + 1,
+            num_frames_target + 1).
+    """
+    num_frames_subject = subject_data.shape[0]
+    num_frames_target = target_data.shape[0]
+
     cost_matrix = np.full((num_frames_subject + 1, num_frames_target + 1), float("inf"))
     cost_matrix[0, 0] = 0
 
@@ -59,20 +595,446 @@ def dynamic_time_warping(
         for column in range(
             max(1, row - window_size), min(num_frames_target + 1, row + window_size + 1)
         ):
-            cost_value = np.linalg.norm(
-                preprocessed_subject_data[row - 1]
-                - preprocessed_target_data[column - 1]
-            )
+            cost_value = np.linalg.norm(subject_data[row - 1] - target_data[column - 1])
             cost_matrix[row, column] = cost_value + min(
                 cost_matrix[row - 1, column],
                 cost_matrix[row, column - 1],
                 cost_matrix[row - 1, column - 1],
             )
 
-    distance = cost_matrix[num_frames_subject, num_frames_target]
+    return cost_matrix
+
+
+def _accumulate_cost_vectorized(
+    subject_data: np.ndarray, target_data: np.ndarray
+) -> np.ndarray:
+    """Fill the full accumulated cost matrix by anti-diagonal wavefronts.
+
+    Args:
+        subject_data: subject joint coordinates, one row per frame.
+        target_data: target joint coordinates, one row per frame.
+
+    Returns:
+        Accumulated cost matrix of shape (num_frames_subject + 1,
+            num_frames_target + 1).
+    """
+    local_cost = _pairwise_distances(subject_data, target_data)
+    cost_matrix = np.full(
+        (subject_data.shape[0] + 1, target_data.shape[0] + 1),
+        float("inf"),
+        dtype=local_cost.dtype,
+    )
+    cost_matrix[1:, 1:] = local_cost
+    cost_matrix[0, 0] = 0
+
+    _fill_wavefronts(cost_matrix)
+
+    return cost_matrix
+
+
+def _fill_wavefronts(cost_matrix: np.ndarray) -> None:
+    """Accumulate costs in place, one anti-diagonal at a time.
+
+    Row 0 and column 0 hold fixed boundary costs and every other cell holds its
+    local frame distance on entry. Cell (row, column) lies on anti-diagonal
+    row + column and depends on its upper, left and upper-left neighbours, which lie
+    on the two previous anti-diagonals. In the flattened row-major matrix an
+    anti-diagonal, and each of those neighbour sets, is a slice with a stride of
+    num_columns - 1, so every wavefront is updated with a few strided slice
+    operations. A stack of matrices of equal shape is filled in the same passes.
+
+    Args:
+        cost_matrix: C-contiguous matrix of boundary and local costs, or a stack of
+            such matrices along the first axis.
+    """
+    if jit_kernels.AVAILABLE:
+        jit_kernels.fill_wavefronts(cost_matrix.reshape((-1,) + cost_matrix.shape[-2:]))
+        return
+
+    num_rows, num_columns = cost_matrix.shape[-2:]
+    stride = num_columns - 1
+
+    flat_cost = cost_matrix.reshape(cost_matrix.shape[:-2] + (-1,))
+    for diagonal in range(2, num_rows + num_columns - 1):
+        first_row = max(1, diagonal - stride)
+        last_row = min(num_rows - 1, diagonal - 1)
+
+        start = first_row * num_columns + diagonal - first_row
+        stop = last_row * num_columns + diagonal - last_row + 1
+        up = flat_cost[..., start - num_columns : stop - num_columns : stride]
+        left = flat_cost[..., start - 1 : stop - 1 : stride]
+        up_left = flat_cost[
+            ..., start - num_columns - 1 : stop - num_columns - 1 : stride
+        ]
+        flat_cost[..., start:stop:stride] += np.minimum(np.minimum(up, left), up_left)
+
+
+@dataclasses.dataclass
+class _BandedCostMatrix:
+    """Accumulated cost matrix that only stores the cells inside a window.
+
+    Cells are stored anti-diagonal by anti-diagonal. Anti-diagonal d holds the rows
+    first_rows[d] to last_rows[d], padded with one infinite cell on either side.
+    Because the window bounds are non-decreasing, the neighbours of an anti-diagonal
+    are contiguous runs of the two previous anti-diagonals, padding included, so
+    they can be read as plain slices. Cells outside the window read as infinite.
+
+    Attributes:
+        first_rows: First stored row of every anti-diagonal.
+        last_rows: Last stored row of every anti-diagonal.
+        row_zero_positions: Position in values that row 0 of every anti-diagonal
+            would occupy, so row r of anti-diagonal d lives at
+            row_zero_positions[d] + r.
+        values: Accumulated costs of all stored cells, with padding.
+    """
+
+    first_rows: np.ndarray
+    last_rows: np.ndarray
+    row_zero_positions: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def empty(
+        cls,
+        first_columns: np.ndarray,
+        last_columns: np.ndarray,
+        dtype: np.dtype = np.dtype(np.float64),
+    ) -> "_BandedCostMatrix":
+        """Allocates an infinite banded matrix for non-decreasing row bounds.
+
+        Args:
+            first_columns: First column of every row, including the padding row 0.
+            last_columns: Last column of every row, including the padding row 0.
+            dtype: Floating point type of the accumulated costs.
+
+        Returns:
+            The banded matrix with every cell set to infinity.
+        """
+        first_rows, last_rows = _diagonal_row_bounds(first_columns, last_columns)
+
+        padded_lengths = np.maximum(last_rows - first_rows + 1, 0) + 2
+        diagonal_starts = np.concatenate(([0], np.cumsum(padded_lengths)[:-1]))
+        values = np.full(int(padded_lengths.sum()), float("inf"), dtype=dtype)
+
+        return cls(first_rows, last_rows, diagonal_starts + 1 - first_rows, values)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the equivalent dense accumulated cost matrix."""
+        num_rows = int(self.last_rows[-1]) + 1
+        return num_rows, len(self.first_rows) - num_rows + 1
+
+    def __getitem__(self, cell: tuple[int, int]) -> float:
+        """Accumulated cost of a single cell, infinite outside the window."""
+        row, column = cell
+        diagonal = row + column
+        if not self.first_rows[diagonal] <= row <= self.last_rows[diagonal]:
+            return float("inf")
+        return float(self.values[self.row_zero_positions[diagonal] + row])
+
+
+def _sakoe_chiba_bounds(
+    num_frames_subject: int, num_frames_target: int, window_size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Column bounds of every row of a Sakoe-Chiba band.
+
+    Args:
+        num_frames_subject: Number of subject frames (rows).
+        num_frames_target: Number of target frames (columns).
+        window_size: maximum allowed |row - column| of a matched cell.
+
+    Returns:
+        First and last column of every row, including the padding row 0.
+    """
+    rows = np.arange(num_frames_subject + 1)
+    first_columns = np.maximum(rows - window_size, 1)
+    last_columns = np.minimum(rows + window_size, num_frames_target)
+    first_columns[0] = last_columns[0] = 0
+    return first_columns, last_columns
+
+
+def _diagonal_row_bounds(
+    first_columns: np.ndarray, last_columns: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """First and last row of every anti-diagonal inside a window.
+
+    With non-decreasing column bounds, row + first_columns[row] and
+    row + last_columns[row] are strictly increasing, so the rows of each
+    anti-diagonal that fall inside the window form one contiguous run. Empty
+    anti-diagonals have a first row greater than their last row.
+
+    Args:
+        first_columns: First column of every row, including the padding row 0.
+        last_columns: Last column of every row, including the padding row 0.
+
+    Returns:
+        First and last row of every anti-diagonal, from 0 to the final cell.
+    """
+    rows = np.arange(len(first_columns))
+    diagonals = np.arange(len(first_columns) + int(last_columns[-1]))
+    first_rows = np.searchsorted(rows + last_columns, diagonals)
+    last_rows = np.searchsorted(rows + first_columns, diagonals, side="right") - 1
+    return first_rows, last_rows
+
+
+def _strip_distance(
+    subject_data: np.ndarray,
+    target_data: np.ndarray,
+    first_columns: np.ndarray,
+    last_columns: np.ndarray,
+    upper_bound: Optional[float] = None,
+) -> float:
+    """DTW distance computed strip by strip, keeping one row of accumulated cost.
+
+    The subject frames are split into strips of rows. For each strip the local
+    distances of its window columns are computed in one batched call and
+    accumulated by anti-diagonal wavefronts, starting from the last accumulated row
+    of the previous strip. Memory is therefore bounded by one row of
+    num_frames_target + 1 costs plus one strip, and no traceback information is
+    kept. Every warping path crosses every row, so once all cells of a strip's last
+    row exceed upper_bound the final distance must exceed it too.
+
+    Args:
+        subject_data: subject joint coordinates, one row per frame.
+        target_data: target joint coordinates, one row per frame.
+        first_columns: First column of every row, including the padding row 0.
+        last_columns: Last column of every row, including the padding row 0.
+        upper_bound: Optional distance above which the computation stops early.
+
+    Returns:
+        The DTW distance, or infinity if it was abandoned for exceeding upper_bound.
+    """
+    num_frames_subject = subject_data.shape[0]
+    num_frames_target = target_data.shape[0]
+
+    dtype = np.result_type(subject_data, target_data, np.float32)
+    boundary_row = np.full(num_frames_target + 1, float("inf"), dtype=dtype)
+    boundary_row[0] = 0
+
+    first_row = 1
+    while first_row <= num_frames_subject:
+        first_column = int(first_columns[first_row])
+        window_width = int(last_columns[first_row]) - first_column + 1
+        candidate_last_columns = last_columns[
+            first_row : first_row + max(_MIN_STRIP_ROWS, window_width)
+        ]
+        strip_sizes = np.arange(2, len(candidate_last_columns) + 2) * (
+            candidate_last_columns - first_column + 2
+        )
+        strip_rows = max(1, int(np.searchsorted(strip_sizes, _STRIP_ELEMENTS, "right")))
+        last_row = first_row + strip_rows - 1
+        last_column = int(last_columns[last_row])
+        rows = np.arange(first_row, last_row + 1)
+        columns = np.arange(first_column, last_column + 1)
+
+        strip = np.full((len(rows) + 1, len(columns) + 1), float("inf"), dtype=dtype)
+        strip[0] = boundary_row[first_column - 1 : last_column + 1]
+        strip[1:, 1:] = _pairwise_distances(
+            subject_data[first_row - 1 : last_row],
+            target_data[first_column - 1 : last_column],
+        )
+        outside_window = (columns < first_columns[rows, np.newaxis]) | (
+            columns > last_columns[rows, np.newaxis]
+        )
+        strip[1:, 1:][outside_window] = float("inf")
+
+        _fill_wavefronts(strip)
+
+        boundary_row[:] = float("inf")
+        boundary_row[first_column - 1 : last_column + 1] = strip[-1]
+        if upper_bound is not None and boundary_row.min() > upper_bound:
+            return float("inf")
+        first_row = last_row + 1
+
+    distance = float(boundary_row[num_frames_target])
+    if upper_bound is not None and distance > upper_bound:
+        return float("inf")
+    return distance
+
+
+def _accumulate_cost_banded(
+    subject_data: np.ndarray,
+    target_data: np.ndarray,
+    first_columns: np.ndarray,
+    last_columns: np.ndarray,
+) -> _BandedCostMatrix:
+    """Fill a banded accumulated cost matrix by anti-diagonal wavefronts.
+
+    Only the cells between first_columns and last_columns of each row are stored
+    and computed, and both bounds must be non-decreasing. The frame distances of
+    each anti-diagonal are computed on the fly from a slice of subject frames and a
+    reversed slice of target frames, so no full matrix is ever allocated.
+
+    Args:
+        subject_data: subject joint coordinates, one row per frame.
+        target_data: target joint coordinates, one row per frame.
+        first_columns: First column of every row, including the padding row 0.
+        last_columns: Last column of every row, including the padding row 0.
+
+    Returns:
+        The banded accumulated cost matrix.
+    """
+    cost_matrix = _BandedCostMatrix.empty(
+        first_columns,
+        last_columns,
+        np.result_type(subject_data, target_data, np.float32),
+    )
+    values = cost_matrix.values
+    if jit_kernels.AVAILABLE:
+        values[cost_matrix.row_zero_positions[0]] = 0
+        jit_kernels.fill_banded(
+            subject_data,
+            target_data,
+            cost_matrix.first_rows,
+            cost_matrix.last_rows,
+            cost_matrix.row_zero_positions,
+            values,
+        )
+        return cost_matrix
+
+    first_rows = cost_matrix.first_rows.tolist()
+    last_rows = cost_matrix.last_rows.tolist()
+    row_zero_positions = cost_matrix.row_zero_positions.tolist()
+    values[row_zero_positions[0]] = 0
+
+    for diagonal in range(2, len(first_rows)):
+        first_row, last_row = first_rows[diagonal], last_rows[diagonal]
+        if first_row > last_row:
+            continue
+        current = row_zero_positions[diagonal]
+        previous = row_zero_positions[diagonal - 1]
+        before_previous = row_zero_positions[diagonal - 2]
+
+        differences = (
+            subject_data[first_row - 1 : last_row]
+            - target_data[diagonal - last_row - 1 : diagonal - first_row][::-1]
+        )
+        up = values[previous + first_row - 1 : previous + last_row]
+        left = values[previous + first_row : previous + last_row + 1]
+        up_left = values[before_previous + first_row - 1 : before_previous + last_row]
+
+        values[current + first_row : current + last_row + 1] = np.sqrt(
+            np.einsum("ij,ij->i", differences, differences)
+        ) + np.minimum(np.minimum(up, left), up_left)
 
-    subject_idx, target_idx = num_frames_subject, num_frames_target
-    path = [(subject_idx, target_idx)]
+    return cost_matrix
+
+
+def _cost_dtype(*frames: np.ndarray) -> np.dtype:
+    """Floating point type in which sequences of frames are compared.
+
+    float32 frames are compared in float32 and all other frames in float64. Before
+    float32 is used, the largest squared frame distance and the largest accumulated
+    cost of a warping path are bounded from the largest finite coordinate: a path
+    never has more cells than the sequences have frames together. Sequences whose
+    bound could overflow float32 are compared in float64 instead.
+
+    Args:
+        frames: Joint coordinates of every compared sequence, one row per frame.
+
+    Returns:
+        float32 or float64.
+    """
+    dtype = np.result_type(*frames, np.float32)
+    if dtype != np.float32:
+        return dtype
+
+    largest = max(
+        (
+            float(np.max(np.abs(data), initial=0, where=np.isfinite(data)))
+            for data in frames
+        ),
+        default=0.0,
+    )
+    num_coordinates = max((data.shape[1] for data in frames), default=0)
+    largest_squared_distance = 4 * num_coordinates * largest**2
+    largest_cost = sum(len(data) for data in frames) * largest_squared_distance**0.5
+    if max(largest_squared_distance, largest_cost) < float(np.finfo(np.float32).max):
+        return dtype
+    return np.dtype(np.float64)
+
+
+def _pairwise_distances(
+    subject_data: np.ndarray,
+    target_data: np.ndarray,
+    target_norms: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Euclidean distance between every subject frame and every target frame.
+
+    Squared distances are formed in one matrix product through the expansion
+    |s - t|^2 = |s|^2 + |t|^2 - 2 s.t. The expansion loses precision when two frames
+    nearly coincide, so those cells are recomputed from the explicit difference.
+    float32 frames are compared in float32, and any other frames in float64.
+
+    Args:
+        subject_data: subject joint coordinates, one row per frame.
+        target_data: target joint coordinates, one row per frame.
+        target_norms: Optional precomputed squared norms of the target frames, for
+            callers comparing many subjects against the same target.
+
+    Returns:
+        Array of shape (num_frames_subject, num_frames_target).
+    """
+    dtype = np.result_type(subject_data, target_data, np.float32)
+    subject_data = subject_data.astype(dtype, copy=False)
+    target_data = target_data.astype(dtype, copy=False)
+    subject_norms = np.einsum("ij,ij->i", subject_data, subject_data)
+    if target_norms is None:
+        target_norms = np.einsum("ij,ij->i", target_data, target_data)
+
+    squared = subject_data @ target_data.T
+    squared *= -2
+    squared += subject_norms[:, np.newaxis]
+    squared += target_norms
+
+    tolerance = (
+        _EXPANSION_TOLERANCE_FLOAT32 if dtype == np.float32 else _EXPANSION_TOLERANCE
+    )
+    rows, columns = np.nonzero(
+        squared <= tolerance * np.add.outer(subject_norms, target_norms)
+    )
+    differences = subject_data[rows] - target_data[columns]
+    squared[rows, columns] = np.einsum("ij,ij->i", differences, differences)
+
+    return np.sqrt(squared, out=squared)
+
+
+def _traceback(
+    cost_matrix: Union[np.ndarray, _BandedCostMatrix],
+) -> np.ndarray:
+    """Recover the optimal warping path from an accumulated cost matrix.
+
+    A path from the last cell back to (0, 0) takes at most num_rows + num_columns - 1
+    steps, so it is written backwards into a preallocated array of that length and
+    returned as a view of the filled part.
+
+    Args:
+        cost_matrix: Dense or banded accumulated cost matrix with a leading padding
+            row and column.
+
+    Returns:
+        int32 array of shape (path_length, 2) holding (subject_index, target_index)
+            pairs from (0, 0) to the last cell.
+    """
+    num_rows, num_columns = cost_matrix.shape
+    path = np.empty((num_rows + num_columns - 1, 2), dtype=np.int32)
+
+    if jit_kernels.AVAILABLE and isinstance(cost_matrix, _BandedCostMatrix):
+        return path[
+            jit_kernels.traceback_banded(
+                cost_matrix.first_rows,
+                cost_matrix.last_rows,
+                cost_matrix.row_zero_positions,
+                cost_matrix.values,
+                path,
+            ) :
+        ]
+    if jit_kernels.AVAILABLE:
+        return path[jit_kernels.traceback_dense(cost_matrix, path) :]
+
+    subject_idx, target_idx = num_rows - 1, num_columns - 1
+    position = len(path) - 1
+    path[position] = subject_idx, target_idx
 
     while subject_idx > 0 or target_idx > 0:
         if subject_idx == 0:
@@ -80,22 +1042,23 @@ def dynamic_time_warping(
         elif target_idx == 0:
             subject_idx -= 1
         else:
-            min_cost_index = np.argmin(
-                [
-                    cost_matrix[subject_idx - 1, target_idx],
-                    cost_matrix[subject_idx, target_idx - 1],
-                    cost_matrix[subject_idx - 1, target_idx - 1],
-                ]
-            )
-            if min_cost_index == 0:
+            # Same choice as np.argmin over [up, left, up_left]: the first minimum,
+            # or the first NaN.
+            up = cost_matrix[subject_idx - 1, target_idx]
+            left = cost_matrix[subject_idx, target_idx - 1]
+            up_left = cost_matrix[subject_idx - 1, target_idx - 1]
+            if (
+                up != up
+                or (left == left and up_left == up_left)
+                and (up <= left and up <= up_left)
+            ):
                 subject_idx -= 1
-            elif min_cost_index == 1:
+            elif left != left or (up_left == up_left and left <= up_left):
                 target_idx -= 1
             else:
                 subject_idx -= 1
                 target_idx -= 1
-        path.append((subject_idx, target_idx))
-
-    path.reverse()
+        position -= 1
+        path[position] = subject_idx, target_idx
 
-    return models.SimilarityMetrics.from_dtw(distance=distance, warping_path=path)
+    return path[position:]
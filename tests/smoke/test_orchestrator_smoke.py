@@ -1,20 +1,24 @@
 """smoke tests for orchestrator.py."""
 
 import datetime
+import functools
+import json
 import pathlib
+import shutil
+
+import numpy as np
 
 from mobi_motion_tracking.core import orchestrator
 
 
-def test_orchestrator_good_file() -> None:
+def test_orchestrator_good_file(tmp_path: pathlib.Path) -> None:
     """Smoke test for the orchestrator run function."""
-    experimental_path = pathlib.Path("tests/sample_data/100.xlsx")
+    experimental_path = tmp_path / "100.xlsx"
+    shutil.copy(pathlib.Path("tests/sample_data/100.xlsx"), experimental_path)
     gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
     sequence = [1]
     date_str = datetime.datetime.now().strftime("%m%d%Y")
-    expected_output_file = pathlib.Path(
-        f"tests/sample_data/results_Gold_{date_str}.ndjson"
-    )
+    expected_output_file = tmp_path / f"results_Gold_{date_str}.ndjson"
     expected_keys = {"participant_ID", "sheetname", "method", "distance"}
 
     outputs = orchestrator.run(experimental_path, gold_path, sequence, "dtw")
@@ -25,20 +29,243 @@ def test_orchestrator_good_file() -> None:
     ), "Saved dictionary keys do not match expected results."
 
 
-def test_orchestrator_good_dir() -> None:
+def test_orchestrator_good_dir(tmp_path: pathlib.Path) -> None:
     """Smoke test for the orchestrator run function."""
     experimental_path = pathlib.Path("tests/sample_data/sample_directory")
     gold_path = pathlib.Path("tests/sample_data/sample_directory/Gold.xlsx")
     sequence = [1]
     date_str = datetime.datetime.now().strftime("%m%d%Y")
-    expected_output_file = pathlib.Path(
-        f"tests/sample_data/results_Gold_{date_str}.ndjson"
-    )
+    expected_output_file = tmp_path / f"results_Gold_{date_str}.ndjson"
     expected_keys = {"participant_ID", "sheetname", "method", "distance"}
 
-    outputs = orchestrator.run(experimental_path, gold_path, sequence, "dtw")
+    outputs = orchestrator.run(
+        experimental_path, gold_path, sequence, "dtw", output_dir=tmp_path
+    )
 
     assert expected_output_file.exists(), "Expected file was not created."
+    assert not list(experimental_path.glob("results_*")), "Wrote into the input."
     assert (
         outputs[0][0].keys() == expected_keys
     ), "Saved dictionary keys do not match expected results."
+
+
+def test_orchestrator_fastdtw(tmp_path: pathlib.Path) -> None:
+    """Smoke test for the orchestrator run function with fastdtw."""
+    experimental_path = pathlib.Path("tests/sample_data/100.xlsx")
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    sequence = [1]
+
+    outputs = orchestrator.run(
+        experimental_path, gold_path, sequence, "fastdtw", output_dir=tmp_path
+    )
+
+    assert outputs[0][0]["method"] == "FastDTW"
+    assert outputs[0][0]["distance"] >= 0
+
+
+def test_orchestrator_parallel_matches_serial(tmp_path: pathlib.Path) -> None:
+    """Smoke test that parallel workers write the same results as a serial run."""
+    written = {}
+    for workers in (1, 2):
+        data_dir = tmp_path / f"workers_{workers}"
+        data_dir.mkdir()
+        for file_name in ("100.xlsx", "101.xlsx", "csv_file.csv"):
+            shutil.copy(pathlib.Path("tests/sample_data") / file_name, data_dir)
+
+        orchestrator.run(
+            data_dir,
+            pathlib.Path("tests/sample_data/Gold.xlsx"),
+            [1],
+            "dtw",
+            workers=workers,
+        )
+        (output_file,) = data_dir.glob("results_*.ndjson")
+        written[workers] = [
+            json.loads(line) for line in output_file.read_text().splitlines()
+        ]
+
+    assert [row["participant_ID"] for row in written[2]] == ["100", "101"]
+    assert [row["participant_ID"] for row in written[1]] == ["100", "101"]
+    assert np.allclose(
+        [row["distance"] for row in written[2]],
+        [row["distance"] for row in written[1]],
+        rtol=1e-12,
+        equal_nan=True,
+    )
+
+
+def test_orchestrator_profile(tmp_path: pathlib.Path) -> None:
+    """Smoke test that a profiled run traces every stage and dumps cProfile stats."""
+    for file_name in ("100.xlsx", "101.xlsx", "csv_file.csv"):
+        shutil.copy(pathlib.Path("tests/sample_data") / file_name, tmp_path)
+    cprofile_path = tmp_path / "first_file.prof"
+
+    outputs = orchestrator.run(
+        tmp_path,
+        pathlib.Path("tests/sample_data/Gold.xlsx"),
+        [1],
+        "dtw",
+        profile=True,
+        cprofile_path=cprofile_path,
+    )
+    (trace_file,) = tmp_path.glob("profile_Gold_*.ndjson")
+    records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+
+    assert len(outputs) == 2
+    assert cprofile_path.exists()
+    assert {record["stage"] for record in records} == {
+        "read",
+        "clean",
+        "center",
+        "average_length",
+        "normalize",
+        "similarity",
+        "write",
+    }
+    assert {
+        record["participant_ID"]
+        for record in records
+        if record["stage"] == "similarity"
+    } == {"100", "101"}
+    assert all(record["peak_memory"] >= 0 for record in records)
+
+
+def test_orchestrator_resume(tmp_path: pathlib.Path) -> None:
+    """Smoke test that resumed runs only score new or changed recordings."""
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    shutil.copy(pathlib.Path("tests/sample_data/100.xlsx"), tmp_path)
+
+    first = orchestrator.run(tmp_path, gold_path, [1], "dtw", resume=True)
+    unchanged = orchestrator.run(tmp_path, gold_path, [1], "dtw", resume=True)
+    shutil.copy(pathlib.Path("tests/sample_data/101.xlsx"), tmp_path)
+    new_file = orchestrator.run(tmp_path, gold_path, [1], "dtw", resume=True)
+    (output_file,) = tmp_path.glob("results_*.ndjson")
+    rows = [json.loads(line) for line in output_file.read_text().splitlines()]
+
+    assert [row["participant_ID"] for row in first[0]] == ["100"]
+    assert unchanged == []
+    assert [output[0]["participant_ID"] for output in new_file] == ["101"]
+    assert [row["participant_ID"] for row in rows] == ["100", "101"]
+    assert all("subject_fingerprint" in row for row in rows)
+
+
+def test_orchestrator_resume_options(tmp_path: pathlib.Path) -> None:
+    """Smoke test that resumed runs score again for new options or lost paths."""
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    shutil.copy(pathlib.Path("tests/sample_data/100.xlsx"), tmp_path)
+    run = functools.partial(
+        orchestrator.run,
+        tmp_path,
+        gold_path,
+        [1],
+        "dtw",
+        selected_metrics=["distance", "target_path"],
+        path_format="npz",
+        resume=True,
+    )
+
+    first = run()
+    other_window = run(window_size=10)
+    same_window = run(window_size=10)
+    for archive in tmp_path.glob("*.paths.*.npz"):
+        archive.unlink()
+    lost_paths = run(window_size=10)
+
+    assert len(first) == 1
+    assert len(other_window) == 1
+    assert same_window == []
+    assert len(lost_paths) == 1
+
+
+def test_orchestrator_resume_metrics(tmp_path: pathlib.Path) -> None:
+    """Smoke test that resumed runs score again for options of older results."""
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    shutil.copy(pathlib.Path("tests/sample_data/100.xlsx"), tmp_path)
+    run = functools.partial(orchestrator.run, tmp_path, gold_path, [1], "dtw")
+
+    not_resumed = run()
+    defaults = run(resume=True)
+    other_window = run(window_size=10, resume=True)
+    with_paths = run(selected_metrics=["distance", "target_path"], resume=True)
+    same_paths = run(selected_metrics=["target_path", "distance"], resume=True)
+
+    assert len(not_resumed) == 1
+    assert defaults == []
+    assert len(other_window) == 1
+    assert "target_path" in with_paths[0][0]
+    assert same_paths == []
+
+
+def test_orchestrator_pairwise(tmp_path: pathlib.Path) -> None:
+    """Smoke test that pairwise matrices match between workers and a frame store."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for file_name in ("100.xlsx", "101.xlsx", "valid_file.xlsx", "csv_file.csv"):
+        shutil.copy(pathlib.Path("tests/sample_data") / file_name, data_dir)
+
+    (serial_path,) = orchestrator.pairwise_distances(data_dir, [1])
+    (parallel_path,) = orchestrator.pairwise_distances(
+        data_dir, [1], output_dir=tmp_path, workers=2
+    )
+    orchestrator.build_store(data_dir, tmp_path / "store")
+    (store_path,) = orchestrator.pairwise_distances(
+        tmp_path / "store",
+        [1],
+        gold_path=pathlib.Path("tests/sample_data/Gold.xlsx"),
+    )
+
+    assert serial_path == data_dir / "pairwise_dtw_seq1.npz"
+    with np.load(serial_path) as serial, np.load(parallel_path) as parallel:
+        assert list(serial["labels"]) == ["100", "101", "valid_file"]
+        assert np.allclose(serial["distances"], parallel["distances"], equal_nan=True)
+        assert np.array_equal(
+            serial["distances"], serial["distances"].T, equal_nan=True
+        )
+    with np.load(store_path) as store:
+        assert store["distances"].shape == (3, 3)
+
+
+def test_orchestrator_cost_kernels(tmp_path: pathlib.Path) -> None:
+    """Smoke test that every cost kernel algorithm writes its method."""
+    for file_name in ("100.xlsx", "101.xlsx"):
+        shutil.copy(pathlib.Path("tests/sample_data") / file_name, tmp_path)
+
+    for algorithm in ("weighted_dtw", "derivative_dtw", "cosine_dtw"):
+        outputs = orchestrator.run(
+            tmp_path,
+            pathlib.Path("tests/sample_data/Gold.xlsx"),
+            [1],
+            algorithm,  # type: ignore[arg-type]
+            joint_weights=(
+                {"RHand": 2.0, "LHand": 2.0} if algorithm == "weighted_dtw" else None
+            ),
+            workers=2 if algorithm == "cosine_dtw" else 1,
+        )
+
+        assert [row["method"] for (row,) in outputs] == [
+            orchestrator.METHOD_NAMES[algorithm]
+        ] * 2
+
+
+def test_orchestrator_float32(tmp_path: pathlib.Path) -> None:
+    """Smoke test that float32 runs match float64 distances closely."""
+    for file_name in ("100.xlsx", "101.xlsx"):
+        shutil.copy(pathlib.Path("tests/sample_data") / file_name, tmp_path)
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+
+    distances = {
+        dtype: [
+            row["distance"]
+            for (row,) in orchestrator.run(
+                tmp_path,
+                gold_path,
+                [1],
+                dtype=dtype,  # type: ignore[arg-type]
+            )
+        ]
+        for dtype in ("float64", "float32")
+    }
+
+    assert np.allclose(
+        distances["float32"], distances["float64"], rtol=1e-5, equal_nan=True
+    )
@@ -27,6 +27,91 @@ def test_parse_arguments() -> None:
     assert args.gold == pathlib.Path("path/to/gold")
     assert args.sequence == [1, 2, 3]
     assert args.algorithm == "dtw"
+    assert args.window is None
+
+
+def test_parse_arguments_window() -> None:
+    """Test that the optional DTW window is parsed as an integer."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["--window", "25"]
+    )
+
+    assert args.window == 25
+
+
+def test_parse_arguments_metrics() -> None:
+    """Test that the metric list is split on commas."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["-m", "distance, target_path"]
+    )
+
+    assert args.metrics == ["distance", "target_path"]
+
+
+def test_parse_arguments_fastdtw() -> None:
+    """Test that fastdtw and its radius are accepted."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "fastdtw"]
+        + ["--radius", "4"]
+    )
+
+    assert args.algorithm == "fastdtw"
+    assert args.radius == 4
+
+
+def test_parse_arguments_reader() -> None:
+    """Test that the fast reader can be selected."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["--reader", "fast"]
+    )
+
+    assert args.reader == "fast"
+
+
+def test_parse_arguments_workers() -> None:
+    """Test that the number of workers is parsed as an integer."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["--workers", "4"]
+    )
+
+    assert args.workers == 4
+
+
+def test_parse_arguments_path_format() -> None:
+    """Test that the npz path format can be selected."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["--path-format", "npz"]
+    )
+
+    assert args.path_format == "npz"
+
+
+def test_parse_arguments_profile() -> None:
+    """Test that profiling is off by default and can be requested."""
+    base = ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+
+    default_args = cli.parse_arguments(base)
+    args = cli.parse_arguments(base + ["--profile", "--cprofile", "run.prof"])
+
+    assert default_args.profile is False
+    assert default_args.cprofile is None
+    assert args.profile is True
+    assert args.cprofile == pathlib.Path("run.prof")
+
+
+def test_parse_arguments_resume() -> None:
+    """Test that resume mode can be requested."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["--resume"]
+    )
+
+    assert args.resume is True
 
 
 def test_parse_arguments_no_inputs() -> None:
@@ -59,4 +144,98 @@ def test_main_default(
         gold_path=pathlib.Path("tests/sample_data/Gold.xlsx"),
         sequence=[1],
         algorithm="dtw",
+        window_size=None,
+        selected_metrics=["distance"],
+        radius=1,
+        joint_weights=None,
+        reader="pandas",
+        cache_dir=None,
+        dtype="float64",
+        workers=1,
+        path_format="json",
+        profile=False,
+        cprofile_path=None,
+        resume=False,
+    )
+
+
+def test_main_convert(
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    """Test that the convert command is dispatched to orchestrator.convert."""
+    mock_convert = mocker.patch.object(orchestrator, "convert")
+
+    cli.main(["convert", "-d", "tests/sample_data", "--cache-dir", "cache"])
+
+    mock_convert.assert_called_once_with(
+        experimental_path=pathlib.Path("tests/sample_data"),
+        cache_dir=pathlib.Path("cache"),
+        reader="pandas",
     )
+
+
+def test_main_store(
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    """Test that the store command is dispatched to orchestrator.build_store."""
+    mock_build_store = mocker.patch.object(orchestrator, "build_store")
+
+    cli.main(
+        ["store", "-d", "tests/sample_data", "-o", "store", "-s", "1,2"]
+        + ["--dtype", "float32"]
+    )
+
+    mock_build_store.assert_called_once_with(
+        experimental_path=pathlib.Path("tests/sample_data"),
+        store_dir=pathlib.Path("store"),
+        sequence=[1, 2],
+        reader="pandas",
+        cache_dir=None,
+        dtype="float32",
+    )
+
+
+def test_main_pairwise(
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    """Test that the pairwise command is dispatched to orchestrator."""
+    mock_pairwise = mocker.patch.object(orchestrator, "pairwise_distances")
+
+    cli.main(["pairwise", "-d", "store", "-s", "1", "--workers", "4"])
+
+    mock_pairwise.assert_called_once_with(
+        experimental_path=pathlib.Path("store"),
+        sequence=[1],
+        output_dir=None,
+        gold_path=None,
+        algorithm="dtw",
+        window_size=None,
+        radius=1,
+        joint_weights=None,
+        reader="pandas",
+        cache_dir=None,
+        dtype="float64",
+        workers=4,
+        checkpoint_seconds=60.0,
+    )
+
+
+def test_parse_arguments_joint_weights() -> None:
+    """Test that joint weights are parsed into a dictionary."""
+    args = cli.parse_arguments(
+        ["-d", "data", "-g", "gold.xlsx", "-s", "1", "-a", "weighted_dtw"]
+        + ["--joint-weights", "RHand=2, LHand=0.5"]
+    )
+
+    assert args.algorithm == "weighted_dtw"
+    assert args.joint_weights == {"RHand": 2.0, "LHand": 0.5}
+
+
+def test_parse_arguments_dtype() -> None:
+    """Test that the float32 computation mode can be selected."""
+    args = cli.parse_arguments(
+        ["-d", "path/to/subject", "-g", "path/to/gold", "-s", "1", "-a", "dtw"]
+        + ["--dtype", "float32"]
+    )
+
+    assert args.dtype == "float32"
@@ -0,0 +1,196 @@
+"""Test cost_kernels.py functions."""
+
+import numpy as np
+import pytest
+
+from mobi_motion_tracking.preprocessing import joint_index_list
+from mobi_motion_tracking.processing import cost_kernels, similarity_functions
+
+
+def _sequences() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(30, 61)), rng.normal(size=(24, 61))
+
+
+def _with_placeholders(features: np.ndarray) -> np.ndarray:
+    """Features with four leading columns, as dynamic_time_warping expects."""
+    return np.hstack((np.zeros((len(features), 4)), features))
+
+
+def _reference_dtw(cost: np.ndarray) -> float:
+    accumulated = np.full((cost.shape[0] + 1, cost.shape[1] + 1), float("inf"))
+    accumulated[0, 0] = 0
+    for row in range(1, cost.shape[0] + 1):
+        for column in range(1, cost.shape[1] + 1):
+            accumulated[row, column] = cost[row - 1, column - 1] + min(
+                accumulated[row - 1, column],
+                accumulated[row, column - 1],
+                accumulated[row - 1, column - 1],
+            )
+    return float(accumulated[-1, -1])
+
+
+def test_uniform_weights_match_dtw() -> None:
+    """Test that unit joint weights give the default DTW metrics."""
+    target, subject = _sequences()
+
+    weighted = similarity_functions.kernel_dynamic_time_warping(
+        target, subject, cost_kernels.WeightedKernel()
+    )
+    expected = similarity_functions.dynamic_time_warping(target, subject)
+
+    assert weighted.method == "WeightedDTW"
+    assert weighted.metrics["distance"] == pytest.approx(expected.metrics["distance"])
+    assert np.array_equal(
+        weighted.metrics["target_path"], expected.metrics["target_path"]
+    )
+
+
+def test_euclidean_cost_matrix() -> None:
+    """Test that the base kernel cost is the Euclidean distance of the features."""
+    target, subject = _sequences()
+    kernel = cost_kernels.CostKernel()
+
+    cost = kernel.cost_matrix(kernel.features(subject), kernel.features(target))
+
+    assert np.allclose(
+        cost,
+        np.linalg.norm(subject[:, np.newaxis, 4:] - target[:, 4:], axis=2),
+    )
+
+
+def test_weights_select_joints() -> None:
+    """Test that zero weights ignore joints and weights scale squared distances."""
+    target, subject = _sequences()
+    head = slice(16, 19)
+    kernel = cost_kernels.WeightedKernel.from_joint_weights(
+        {name: 0.0 for name in joint_index_list.JOINT_NAMES} | {"Head": 4.0}
+    )
+
+    weighted = similarity_functions.kernel_dynamic_time_warping(
+        target, subject, kernel, distance_only=True
+    )
+    head_only = similarity_functions.dynamic_time_warping(
+        _with_placeholders(target[:, head]),
+        _with_placeholders(subject[:, head]),
+        distance_only=True,
+    )
+
+    assert weighted.metrics["distance"] == pytest.approx(
+        2 * head_only.metrics["distance"]
+    )
+
+
+def test_weighted_kernel_errors() -> None:
+    """Test that unknown joints and negative weights raise errors."""
+    with pytest.raises(ValueError, match="Unknown joint name: Tail"):
+        cost_kernels.WeightedKernel.from_joint_weights({"Tail": 1.0})
+    with pytest.raises(ValueError, match="Joint weights must be non-negative."):
+        cost_kernels.WeightedKernel.from_joint_weights({"Head": -1.0})
+
+
+def test_derivative_features() -> None:
+    """Test the derivative estimate of interior and boundary frames."""
+    data = np.zeros((4, 61))
+    data[:, 4] = [0.0, 1.0, 4.0, 9.0]
+
+    features = cost_kernels.DerivativeKernel().features(data)
+
+    assert features.shape == (4, 57)
+    assert np.allclose(features[:, 0], [1.5, 1.5, 3.5, 3.5])
+    assert np.allclose(features[:, 1:], 0)
+
+
+@pytest.mark.parametrize("num_frames", [1, 2])
+def test_derivative_features_short(num_frames: int) -> None:
+    """Test that one and two frame sequences have finite derivatives."""
+    data = np.arange(num_frames * 61, dtype=float).reshape(num_frames, 61)
+
+    features = cost_kernels.DerivativeKernel().features(data)
+
+    assert np.allclose(features, 61.0 if num_frames == 2 else 0.0)
+
+
+def test_derivative_dtw_matches_dtw_on_derivatives() -> None:
+    """Test that derivative DTW is DTW on the derivative features."""
+    target, subject = _sequences()
+    kernel = cost_kernels.DerivativeKernel()
+
+    metrics = similarity_functions.kernel_dynamic_time_warping(
+        target, subject, kernel, window_size=5
+    )
+    expected = similarity_functions.dynamic_time_warping(
+        _with_placeholders(kernel.features(target)),
+        _with_placeholders(kernel.features(subject)),
+        window_size=5,
+    )
+
+    assert metrics.method == "DerivativeDTW"
+    assert metrics.metrics["distance"] == pytest.approx(expected.metrics["distance"])
+
+
+def test_cosine_cost_matrix() -> None:
+    """Test the cosine cost of scaled, identical and opposite segment directions."""
+    target, _ = _sequences()
+    kernel = cost_kernels.CosineKernel()
+    scaled = target.copy()
+    scaled[:, 1:] *= 3
+    features = kernel.features(np.vstack((target[:1], scaled[:1], -target[:1])))
+
+    cost = kernel.cost_matrix(features, features[:1])
+
+    assert np.allclose(cost[:, 0], [0.0, 0.0, 2.0])
+
+
+def test_cosine_zero_length_segment() -> None:
+    """Test that a segment without direction costs 1 against any direction."""
+    kernel = cost_kernels.CosineKernel(
+        joint_index_list.SkeletonTopology.from_segments([[(1, 4), (2, 5), (3, 6)]])
+    )
+    frames = np.zeros((2, 61))
+    frames[1, 4] = 1.0
+
+    features = kernel.features(frames)
+
+    assert kernel.cost_matrix(features[:1], features[1:])[0, 0] == 1.0
+
+
+@pytest.mark.parametrize("window_size", [None, 3])
+def test_cosine_dtw_matches_reference(window_size: int) -> None:
+    """Test cosine DTW against a cell by cell accumulation of its cost matrix."""
+    target, subject = _sequences()
+    kernel = cost_kernels.CosineKernel()
+    cost = kernel.cost_matrix(kernel.features(subject), kernel.features(target))
+    if window_size is not None:
+        rows, columns = np.indices(cost.shape)
+        cost[np.abs(rows - columns) > max(window_size, 6)] = float("inf")
+
+    metrics = similarity_functions.kernel_dynamic_time_warping(
+        target, subject, kernel, window_size=window_size
+    )
+    distance_only = similarity_functions.kernel_dynamic_time_warping(
+        target, subject, kernel, window_size=window_size, distance_only=True
+    )
+
+    assert metrics.method == "CosineDTW"
+    assert metrics.metrics["distance"] == pytest.approx(_reference_dtw(cost))
+    assert distance_only.metrics == {"distance": metrics.metrics["distance"]}
+    path = np.column_stack(
+        (metrics.metrics["target_path"], metrics.metrics["experimental_path"])
+    )
+    assert cost[path[1:, 0] - 1, path[1:, 1] - 1].sum() == pytest.approx(
+        metrics.metrics["distance"]
+    )
+
+
+def test_build_kernel() -> None:
+    """Test that every kernel algorithm builds its kernel."""
+    kernels = [cost_kernels.build_kernel(name) for name in cost_kernels.KERNEL_LIST]
+
+    assert [kernel.method for kernel in kernels] == [
+        "WeightedDTW",
+        "DerivativeDTW",
+        "CosineDTW",
+    ]
+    with pytest.raises(ValueError, match="Unsupported cost kernel selected."):
+        cost_kernels.build_kernel("dtw")
@@ -0,0 +1,114 @@
+"""Test frame_store.py functions."""
+
+import pathlib
+
+import numpy as np
+import pytest
+
+from mobi_motion_tracking.core import orchestrator
+from mobi_motion_tracking.io.readers import frame_store, readers
+
+WORKBOOKS = [
+    pathlib.Path("tests/sample_data/100.xlsx"),
+    pathlib.Path("tests/sample_data/101.xlsx"),
+]
+
+
+def test_build_matches_read_participant_data(tmp_path: pathlib.Path) -> None:
+    """Test that stored frames equal the frames read from the workbooks."""
+    store = frame_store.FrameStore.build(tmp_path / "store", WORKBOOKS)
+
+    assert len(store) == 2
+    assert store.keys() == [("100", 1), ("101", 1)]
+    for workbook in WORKBOOKS:
+        expected = readers.read_participant_data(workbook, 1)
+        stored = store.get(workbook.stem, 1)
+        assert stored.participant_ID == expected.participant_ID
+        assert stored.sequence_sheetname == expected.sequence_sheetname
+        assert np.array_equal(stored.data, expected.data, equal_nan=True)
+
+
+def test_get_is_read_only_view(tmp_path: pathlib.Path) -> None:
+    """Test that participant data is a read-only view into the mapped frames."""
+    frame_store.FrameStore.build(tmp_path, WORKBOOKS)
+    store = frame_store.FrameStore(tmp_path)
+
+    data = store.get("101", 1).data
+
+    assert isinstance(data.base, np.memmap)
+    assert not data.flags.writeable
+    with pytest.raises(ValueError):
+        data[0, 0] = 0.0
+
+
+def test_build_float32(tmp_path: pathlib.Path) -> None:
+    """Test that float32 stores halve the frames file and keep the values."""
+    store64 = frame_store.FrameStore.build(tmp_path / "float64", WORKBOOKS)
+    store32 = frame_store.FrameStore.build(
+        tmp_path / "float32", WORKBOOKS, dtype="float32"
+    )
+
+    assert store32.get("100", 1).data.dtype == np.float32
+    assert (tmp_path / "float32" / frame_store.FRAMES_FILE).stat().st_size * 2 == (
+        tmp_path / "float64" / frame_store.FRAMES_FILE
+    ).stat().st_size
+    assert np.allclose(
+        store32.get("100", 1).data, store64.get("100", 1).data, equal_nan=True
+    )
+
+
+def test_build_skips_missing_sequences(tmp_path: pathlib.Path) -> None:
+    """Test that sequences without a sheet are left out of the store."""
+    store = frame_store.FrameStore.build(tmp_path, WORKBOOKS, sequences=[1, 4])
+
+    assert ("100", 1) in store
+    assert ("100", 4) not in store
+    with pytest.raises(KeyError):
+        store.get("100", 4)
+
+
+def test_build_empty(tmp_path: pathlib.Path) -> None:
+    """Test that a store without workbooks can be opened."""
+    store = frame_store.FrameStore.build(tmp_path, [])
+
+    assert len(store) == 0
+    assert store.keys() == []
+
+
+def test_build_replaces_store(tmp_path: pathlib.Path) -> None:
+    """Test that building into an existing store replaces it atomically."""
+    frame_store.FrameStore.build(tmp_path, WORKBOOKS)
+    store = frame_store.FrameStore.build(tmp_path, WORKBOOKS[1:])
+
+    assert store.keys() == [("101", 1)]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        frame_store.FRAMES_FILE,
+        frame_store.INDEX_FILE,
+    ]
+
+
+def test_build_bad_dtype(tmp_path: pathlib.Path) -> None:
+    """Test that an unsupported dtype raises an error."""
+    with pytest.raises(ValueError, match="Unsupported dtype selected."):
+        frame_store.FrameStore.build(tmp_path, WORKBOOKS, dtype="int8")  # type: ignore[arg-type]
+
+
+def test_open_missing_store(tmp_path: pathlib.Path) -> None:
+    """Test that opening a missing store raises an error."""
+    with pytest.raises(FileNotFoundError, match="Frame store does not exist"):
+        frame_store.FrameStore(tmp_path)
+
+
+def test_build_store_directory(tmp_path: pathlib.Path) -> None:
+    """Test that build_store ingests the workbooks of a directory."""
+    store = orchestrator.build_store(
+        pathlib.Path("tests/sample_data/sample_directory"), tmp_path
+    )
+
+    assert store.keys() == [("100", 1), ("Gold", 1)]
+
+
+def test_build_store_missing_path(tmp_path: pathlib.Path) -> None:
+    """Test that build_store raises an error for a missing input path."""
+    with pytest.raises(FileNotFoundError, match="Input path does not exist."):
+        orchestrator.build_store(tmp_path / "missing", tmp_path)
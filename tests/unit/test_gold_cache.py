@@ -0,0 +1,71 @@
+"""Test gold_cache.py functions."""
+
+import os
+import pathlib
+import shutil
+
+import numpy as np
+
+from mobi_motion_tracking.core import gold_cache, orchestrator
+from mobi_motion_tracking.io.readers import readers
+from mobi_motion_tracking.preprocessing import preprocessing
+
+
+def test_gold_cache_hits_and_misses() -> None:
+    """Test that a sequence is read once and then served from the cache."""
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    cache = gold_cache.GoldCache()
+
+    first = cache.get(gold_path, 1)
+    second = cache.get(gold_path, 1)
+
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_gold_cache_matches_preprocessing() -> None:
+    """Test that cached data equals the uncached preprocessing steps."""
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    expected_data = preprocessing.center_joints_to_hip(
+        readers.read_participant_data(gold_path, 1).data
+    )
+
+    reference = gold_cache.GoldCache().get(gold_path, 1)
+
+    assert reference.gold.participant_ID == "Gold"
+    assert np.array_equal(reference.gold.data, expected_data)
+    assert np.array_equal(
+        reference.average_lengths, preprocessing.get_average_length(expected_data)
+    )
+
+
+def test_gold_cache_modified_file(tmp_path: pathlib.Path) -> None:
+    """Test that a gold file modified on disk is read again."""
+    gold_path = tmp_path / "Gold.xlsx"
+    shutil.copy("tests/sample_data/Gold.xlsx", gold_path)
+    cache = gold_cache.GoldCache()
+
+    cache.get(gold_path, 1)
+    stat = gold_path.stat()
+    os.utime(gold_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    cache.get(gold_path, 1)
+
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_run_file_shares_cache(tmp_path: pathlib.Path) -> None:
+    """Test that run_file reuses gold data across subject files."""
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+    cache = gold_cache.GoldCache()
+
+    for file_name in ("100.xlsx", "101.xlsx"):
+        orchestrator.run_file(
+            pathlib.Path("tests/sample_data") / file_name,
+            gold_path,
+            tmp_path,
+            [1],
+            "dtw",
+            cache=cache,
+        )
+
+    assert (cache.hits, cache.misses) == (1, 1)
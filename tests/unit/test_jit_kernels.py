@@ -0,0 +1,121 @@
+"""Test jit_kernels.py functions against the NumPy implementations."""
+
+import numpy as np
+import pytest
+import pytest_mock
+
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import jit_kernels, similarity_functions
+
+requires_numba = pytest.mark.skipif(
+    not jit_kernels.AVAILABLE, reason="The 'fast' extra is not installed."
+)
+
+
+def _sequences() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(45, 61)), rng.normal(size=(38, 61))
+
+
+@requires_numba
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_fill_wavefronts_matches_numpy(
+    dtype: type, mocker: pytest_mock.MockerFixture
+) -> None:
+    """Test that compiled accumulation gives bit-identical costs, NaN included."""
+    rng = np.random.default_rng(1)
+    cost_matrices: np.ndarray = np.full((2, 9, 7), float("inf"), dtype=dtype)
+    cost_matrices[:, 1:, 1:] = rng.random((2, 8, 6))
+    cost_matrices[:, 0, 0] = 0
+    cost_matrices[0, 2, 5] = float("inf")
+    cost_matrices[1, 4, 3] = float("nan")
+    expected = cost_matrices.copy()
+
+    similarity_functions._fill_wavefronts(cost_matrices)
+    mocker.patch.object(jit_kernels, "AVAILABLE", False)
+    similarity_functions._fill_wavefronts(expected)
+
+    assert cost_matrices.dtype == dtype
+    assert np.array_equal(cost_matrices, expected, equal_nan=True)
+
+
+@requires_numba
+@pytest.mark.parametrize("window_size", [None, 4])
+def test_dtw_matches_reference_engine(window_size: int | None) -> None:
+    """Test that compiled DTW matches the cell by cell reference engine."""
+    target_data, subject_data = _sequences()
+
+    compiled = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size
+    )
+    reference = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, engine="reference"
+    )
+
+    assert np.isclose(compiled.metrics["distance"], reference.metrics["distance"])
+    assert np.array_equal(
+        compiled.metrics["target_path"], reference.metrics["target_path"]
+    )
+    assert np.array_equal(
+        compiled.metrics["experimental_path"], reference.metrics["experimental_path"]
+    )
+
+
+@requires_numba
+def test_fastdtw_matches_numpy(mocker: pytest_mock.MockerFixture) -> None:
+    """Test that compiled banded accumulation and traceback match NumPy."""
+    target_data, subject_data = _sequences()
+
+    compiled = similarity_functions.fast_dynamic_time_warping(
+        target_data, subject_data, radius=2
+    )
+    mocker.patch.object(jit_kernels, "AVAILABLE", False)
+    expected = similarity_functions.fast_dynamic_time_warping(
+        target_data, subject_data, radius=2
+    )
+
+    assert np.isclose(compiled.metrics["distance"], expected.metrics["distance"])
+    assert np.array_equal(
+        compiled.metrics["target_path"], expected.metrics["target_path"]
+    )
+    assert compiled.metrics["target_path"].dtype == np.int32
+
+
+@requires_numba
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_normalize_segments_matches_numpy(
+    dtype: type, mocker: pytest_mock.MockerFixture
+) -> None:
+    """Test compiled normalization, with zero-length segments and missing frames."""
+    target_data, subject_data = _sequences()
+    centered = preprocessing.center_joints_to_hip(subject_data.astype(dtype))
+    centered[3, 7:10] = centered[3, 4:7]
+    centered[5, 4] = float("nan")
+    average_lengths = preprocessing.get_average_length(
+        preprocessing.center_joints_to_hip(target_data)
+    )
+
+    compiled = preprocessing.normalize_segments(centered, average_lengths)
+    mocker.patch.object(jit_kernels, "AVAILABLE", False)
+    expected = preprocessing.normalize_segments(centered, average_lengths)
+
+    assert compiled.dtype == dtype
+    assert np.allclose(compiled, expected, rtol=1e-5, atol=1e-5, equal_nan=True)
+
+
+def test_numpy_fallback(mocker: pytest_mock.MockerFixture) -> None:
+    """Test that DTW without the compiled kernels still matches the reference."""
+    mocker.patch.object(jit_kernels, "AVAILABLE", False)
+    target_data, subject_data = _sequences()
+
+    vectorized = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size=4
+    )
+    reference = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size=4, engine="reference"
+    )
+
+    assert np.isclose(vectorized.metrics["distance"], reference.metrics["distance"])
+    assert np.array_equal(
+        vectorized.metrics["target_path"], reference.metrics["target_path"]
+    )
@@ -0,0 +1,101 @@
+"""Test joint_index_list.py functions."""
+
+import numpy as np
+import pytest
+
+from mobi_motion_tracking.preprocessing import joint_index_list, preprocessing
+
+
+def test_skeleton_topology_from_segments() -> None:
+    """Test that a segment list compiles to the expected index arrays."""
+    segment_list = [
+        [(1, 4), (2, 5), (3, 6)],
+        [(4, 7), (5, 8), (6, 9)],
+        [(1, 10), (2, 11), (3, 12)],
+    ]
+
+    topology = joint_index_list.SkeletonTopology.from_segments(segment_list)
+
+    assert np.array_equal(topology.start_indices, [[1, 2, 3], [4, 5, 6], [1, 2, 3]])
+    assert np.array_equal(topology.end_indices, [[4, 5, 6], [7, 8, 9], [10, 11, 12]])
+    assert np.array_equal(topology.parents, [-1, 0, -1])
+    assert np.array_equal(topology.order, [0, 1, 2])
+    assert topology.num_segments == 3
+    assert topology.max_index == 12
+
+
+def test_default_skeleton_topology() -> None:
+    """Test that the default topology matches the default segment list."""
+    topology = joint_index_list.DEFAULT_SKELETON_TOPOLOGY
+
+    assert topology.num_segments == len(joint_index_list.DEFAULT_JOINT_SEGMENTS)
+    assert topology.max_index == 60
+    assert np.all(topology.parents < np.arange(topology.num_segments))
+    assert np.array_equal(topology.order, np.arange(topology.num_segments))
+
+
+def test_skeleton_topology_unordered_segments() -> None:
+    """Test that children listed before their parents are processed after them."""
+    segment_list = [
+        [(7, 10), (8, 11), (9, 12)],
+        [(4, 7), (5, 8), (6, 9)],
+        [(1, 4), (2, 5), (3, 6)],
+    ]
+
+    topology = joint_index_list.SkeletonTopology.from_segments(segment_list)
+
+    assert np.array_equal(topology.parents, [1, 2, -1])
+    assert np.array_equal(topology.order, [2, 1, 0])
+
+
+def test_preprocessing_reversed_segments() -> None:
+    """Test that a reversed segment list normalizes like the default one."""
+    data = np.random.default_rng(0).normal(size=(5, 61))
+    gold = np.random.default_rng(1).normal(size=(5, 61))
+    reversed_list = joint_index_list.DEFAULT_JOINT_SEGMENTS[::-1]
+
+    lengths = preprocessing.get_average_length(gold)
+    reversed_lengths = preprocessing.get_average_length(gold, reversed_list)
+
+    assert np.array_equal(reversed_lengths, lengths[::-1])
+    assert np.allclose(
+        preprocessing.normalize_segments(data, reversed_lengths, reversed_list),
+        preprocessing.normalize_segments(data, lengths),
+    )
+
+
+@pytest.mark.parametrize(
+    "segment_list, message",
+    [
+        ([[(1, 4), (2, 5)]], "Each segment must contain three"),
+        ([[(-1, 4), (2, 5), (3, 6)]], "Joint indices in segment_list"),
+        (
+            [[(1, 4), (2, 5), (3, 6)], [(7, 4), (8, 5), (9, 6)]],
+            "A joint can only end one segment.",
+        ),
+        (
+            [[(4, 7), (5, 8), (6, 9)], [(7, 4), (8, 5), (9, 6)]],
+            "Segments must not form a cycle.",
+        ),
+    ],
+)
+def test_skeleton_topology_invalid(segment_list: list, message: str) -> None:
+    """Test that invalid segment lists are rejected."""
+    with pytest.raises(ValueError, match=message):
+        joint_index_list.SkeletonTopology.from_segments(segment_list)
+
+
+def test_preprocessing_accepts_topology() -> None:
+    """Test that a compiled topology and its segment list give the same output."""
+    data = np.random.default_rng(0).normal(size=(5, 61))
+    segment_list = joint_index_list.DEFAULT_JOINT_SEGMENTS
+    topology = joint_index_list.SkeletonTopology.from_segments(segment_list)
+
+    lengths_from_list = preprocessing.get_average_length(data, segment_list)
+    lengths_from_topology = preprocessing.get_average_length(data, topology)
+
+    assert np.array_equal(lengths_from_list, lengths_from_topology)
+    assert np.array_equal(
+        preprocessing.normalize_segments(data, lengths_from_list, segment_list),
+        preprocessing.normalize_segments(data, lengths_from_topology, topology),
+    )
@@ -48,3 +48,11 @@ def test_from_dtw_good(
     assert isinstance(
         similaritymetrics.method, str
     ), "Returned method should be a string."
+
+
+def test_from_dtw_distance_only() -> None:
+    """Test from_dtw without a warping path only stores the distance."""
+    similaritymetrics = models.SimilarityMetrics.from_dtw(distance=1.5)
+
+    assert similaritymetrics.method == "DTW"
+    assert similaritymetrics.metrics == {"distance": 1.5}
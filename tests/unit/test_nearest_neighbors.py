@@ -0,0 +1,140 @@
+"""Test nearest_neighbors.py functions."""
+
+import numpy as np
+import pytest
+
+from mobi_motion_tracking.processing import nearest_neighbors, similarity_functions
+
+
+def _random_sequences(
+    num_sequences: int, seed: int = 0
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Random walks of varying length with 4 leading placeholder columns."""
+    rng = np.random.default_rng(seed)
+
+    def walk(num_frames: int) -> np.ndarray:
+        data = np.zeros((num_frames, 10))
+        data[:, 4:] = np.cumsum(rng.normal(size=(num_frames, 6)), axis=0)
+        return data
+
+    subject = walk(40)
+    candidates = {
+        f"candidate_{index}": walk(int(rng.integers(30, 50)))
+        for index in range(num_sequences)
+    }
+    return subject, candidates
+
+
+@pytest.mark.parametrize("window_size", [None, 3, 12])
+def test_lower_bounds_below_dtw(window_size: int) -> None:
+    """Test that LB_Kim and LB_Keogh never exceed the DTW distance."""
+    subject, candidates = _random_sequences(20)
+
+    for candidate in candidates.values():
+        distance = similarity_functions.dynamic_time_warping(
+            candidate, subject, window_size=window_size, distance_only=True
+        ).metrics["distance"]
+
+        assert nearest_neighbors.lb_kim(candidate, subject) <= distance
+        assert (
+            nearest_neighbors.lb_keogh(candidate, subject, window_size)
+            <= distance + 1e-9
+        )
+
+
+@pytest.mark.parametrize("k", [1, 3])
+@pytest.mark.parametrize("window_size", [None, 5])
+def test_nearest_neighbors_matches_brute_force(k: int, window_size: int) -> None:
+    """Test that pruning does not change the nearest neighbours."""
+    subject, candidates = _random_sequences(30, seed=1)
+    brute_force = sorted(
+        (
+            similarity_functions.dynamic_time_warping(
+                data, subject, window_size=window_size, distance_only=True
+            ).metrics["distance"],
+            label,
+        )
+        for label, data in candidates.items()
+    )[:k]
+
+    output = nearest_neighbors.nearest_neighbors(
+        subject, candidates, k=k, window_size=window_size
+    )
+
+    assert [label for label, _ in output.neighbors] == [
+        label for _, label in brute_force
+    ]
+    assert np.allclose(
+        [distance for _, distance in output.neighbors],
+        [distance for distance, _ in brute_force],
+    )
+    assert (
+        output.pruned_by_kim
+        + output.pruned_by_keogh
+        + output.abandoned
+        + output.computed
+        == len(candidates)
+    )
+
+
+@pytest.mark.parametrize("window_size", [None, 5])
+def test_nearest_neighbors_stage_counts(window_size: int) -> None:
+    """Test the stage counts against the cascade replayed with exact distances."""
+    subject, candidates = _random_sequences(30, seed=3)
+    k = 3
+    expected = {"kim": 0, "keogh": 0, "abandoned": 0, "computed": 0}
+    best: list[float] = []
+    kim_bounds = sorted(
+        (nearest_neighbors.lb_kim(data, subject), label)
+        for label, data in candidates.items()
+    )
+    for position, (kim_bound, label) in enumerate(kim_bounds):
+        kth_best = best[k - 1] if len(best) == k else float("inf")
+        if kim_bound >= kth_best:
+            expected["kim"] = len(kim_bounds) - position
+            break
+        if (
+            nearest_neighbors.lb_keogh(candidates[label], subject, window_size)
+            >= kth_best
+        ):
+            expected["keogh"] += 1
+            continue
+        distance = similarity_functions.dynamic_time_warping(
+            candidates[label], subject, window_size=window_size, distance_only=True
+        ).metrics["distance"]
+        if distance > kth_best:
+            expected["abandoned"] += 1
+            continue
+        expected["computed"] += 1
+        best = sorted(best + [distance])[:k]
+
+    output = nearest_neighbors.nearest_neighbors(
+        subject, candidates, k=k, window_size=window_size
+    )
+
+    assert expected["abandoned"] > 0
+    assert {
+        "kim": output.pruned_by_kim,
+        "keogh": output.pruned_by_keogh,
+        "abandoned": output.abandoned,
+        "computed": output.computed,
+    } == expected
+
+
+def test_nearest_neighbors_prunes_exact_copy() -> None:
+    """Test that an exact copy of the subject prunes every other candidate."""
+    subject, candidates = _random_sequences(10, seed=2)
+    candidates["copy"] = subject.copy()
+
+    output = nearest_neighbors.nearest_neighbors(subject, candidates)
+
+    assert output.neighbors == [("copy", 0.0)]
+    assert output.computed == 1
+
+
+def test_nearest_neighbors_bad_k() -> None:
+    """Test that a non-positive k raises an error."""
+    subject, candidates = _random_sequences(2)
+
+    with pytest.raises(ValueError, match="k must be a positive integer."):
+        nearest_neighbors.nearest_neighbors(subject, candidates, k=0)
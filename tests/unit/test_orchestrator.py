@@ -3,6 +3,7 @@
 import pathlib
 
 import pytest
+import pytest_mock
 
 from mobi_motion_tracking.core import orchestrator
 
@@ -27,6 +28,49 @@ def test_run_bad_algorithm() -> None:
         orchestrator.run(file_path, gold_path, sequence, "fake_alg")  # type: ignore[arg-type] # Failing on purpose to test ValueError
 
 
+def test_run_bad_joint_weights() -> None:
+    """Tests that invalid joint weights are rejected before any file is read."""
+    file_path = pathlib.Path("tests/sample_data/100.xlsx")
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+
+    with pytest.raises(ValueError, match="Unknown joint name: Tail"):
+        orchestrator.run(
+            file_path, gold_path, [1], "weighted_dtw", joint_weights={"Tail": 1.0}
+        )
+    with pytest.raises(ValueError, match="only supported by weighted_dtw"):
+        orchestrator.run(file_path, gold_path, [1], "dtw", joint_weights={"Head": 2.0})
+    with pytest.raises(ValueError, match="only supported by weighted_dtw"):
+        orchestrator.pairwise_distances(
+            file_path.parent, [1], algorithm="fastdtw", joint_weights={"Head": 2.0}
+        )
+
+
+def test_run_bad_metric(mocker: pytest_mock.MockerFixture) -> None:
+    """Tests that misspelled metrics are rejected before any file is read."""
+    read = mocker.patch.object(orchestrator.readers, "read_participant_sequences")
+    directory = pathlib.Path("tests/sample_data/sample_directory")
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+
+    with pytest.raises(ValueError, match="Unsupported metric selected: distnace"):
+        orchestrator.run(
+            directory, gold_path, [1], "dtw", selected_metrics=["distnace"]
+        )
+    with pytest.raises(ValueError, match="Unsupported metric selected: path"):
+        orchestrator.run_file(
+            directory / "100.xlsx", gold_path, directory, [1], selected_metrics=["path"]
+        )
+    read.assert_not_called()
+
+
+def test_run_bad_dtype() -> None:
+    """Tests the run function with an unsupported dtype."""
+    file_path = pathlib.Path("tests/sample_data/100.xlsx")
+    gold_path = pathlib.Path("tests/sample_data/Gold.xlsx")
+
+    with pytest.raises(ValueError, match="Unsupported dtype selected."):
+        orchestrator.run(file_path, gold_path, [1], dtype="float16")  # type: ignore[arg-type] # Failing on purpose to test ValueError
+
+
 def test_run_file_bad_algorithm() -> None:
     """Tests run_file with an unsupported algorithm."""
     file_path = pathlib.Path("tests/sample_data/100.xlsx")
@@ -0,0 +1,186 @@
+"""Test pairwise.py functions."""
+
+import functools
+import pathlib
+
+import numpy as np
+import pytest
+import pytest_mock
+
+from mobi_motion_tracking.core import models, pairwise
+from mobi_motion_tracking.preprocessing import preprocessing
+from mobi_motion_tracking.processing import similarity_functions
+
+
+def _participants(num_participants: int) -> list[models.ParticipantData]:
+    rng = np.random.default_rng(0)
+    return [
+        models.ParticipantData(
+            participant_ID=str(100 + index),
+            sequence_sheetname="seq1",
+            data=rng.normal(size=(20 + 3 * index, 61)),
+        )
+        for index in range(num_participants)
+    ]
+
+
+def test_preprocess_cohort_shared_lengths() -> None:
+    """Test that every participant is normalized to the given segment lengths."""
+    participants = _participants(3)
+    average_lengths = preprocessing.get_average_length(
+        preprocessing.center_joints_to_hip(participants[0].data)
+    )
+
+    preprocessed = pairwise.preprocess_cohort(participants, average_lengths)
+
+    for participant, result in zip(participants, preprocessed):
+        assert result.participant_ID == participant.participant_ID
+        assert np.allclose(
+            result.data,
+            preprocessing.normalize_segments(
+                preprocessing.center_joints_to_hip(participant.data), average_lengths
+            ),
+        )
+
+
+def test_preprocess_cohort_mean_lengths() -> None:
+    """Test that the cohort mean lengths are used without reference lengths."""
+    participants = _participants(3)
+    mean_lengths = np.mean(
+        [
+            preprocessing.get_average_length(
+                preprocessing.center_joints_to_hip(participant.data)
+            )
+            for participant in participants
+        ],
+        axis=0,
+    )
+
+    preprocessed = pairwise.preprocess_cohort(participants)
+
+    assert np.allclose(
+        preprocessed[1].data,
+        pairwise.preprocess_cohort(participants[1:2], mean_lengths)[0].data,
+    )
+
+
+def test_distance_matrix_matches_dtw(tmp_path: pathlib.Path) -> None:
+    """Test that the saved matrix holds the DTW distance of every pair."""
+    participants = _participants(4)
+    output_path = tmp_path / "matrix.npz"
+
+    distances = pairwise.distance_matrix(participants, output_path, "key")
+
+    for row in range(4):
+        for column in range(4):
+            expected = similarity_functions.dynamic_time_warping(
+                participants[min(row, column)].data,
+                participants[max(row, column)].data,
+                distance_only=True,
+            ).metrics["distance"]
+            assert distances[row, column] == pytest.approx(
+                0.0 if row == column else expected
+            )
+    with np.load(output_path) as archive:
+        assert np.array_equal(archive["distances"], distances)
+        assert list(archive["labels"]) == ["100", "101", "102", "103"]
+    assert list(tmp_path.iterdir()) == [output_path]
+
+
+def test_distance_matrix_workers_float32(tmp_path: pathlib.Path) -> None:
+    """Test that worker processes keep float32 data in float32, like serial runs."""
+    participants = [
+        models.ParticipantData(
+            participant.participant_ID,
+            participant.sequence_sheetname,
+            participant.data.astype(np.float32),
+        )
+        for participant in _participants(4)
+    ]
+
+    serial = pairwise.distance_matrix(participants, tmp_path / "serial.npz", "key")
+    parallel = pairwise.distance_matrix(
+        participants, tmp_path / "parallel.npz", "key", workers=2
+    )
+
+    assert np.array_equal(serial, parallel)
+
+
+def test_distance_matrix_fastdtw(tmp_path: pathlib.Path) -> None:
+    """Test that fastdtw matrices are symmetric with a zero diagonal."""
+    distances = pairwise.distance_matrix(
+        _participants(3),
+        tmp_path / "matrix.npz",
+        "key",
+        similarity_function=functools.partial(
+            similarity_functions.fast_dynamic_time_warping, radius=1
+        ),
+    )
+
+    assert np.array_equal(distances, distances.T)
+    assert np.all(np.diag(distances) == 0)
+    assert np.all(distances[np.triu_indices(3, 1)] > 0)
+
+
+def test_distance_matrix_resumes_checkpoint(
+    tmp_path: pathlib.Path, mocker: pytest_mock.MockerFixture
+) -> None:
+    """Test that an interrupted matrix resumes from the rows it checkpointed."""
+    participants = _participants(4)
+    output_path = tmp_path / "matrix.npz"
+    expected = pairwise.distance_matrix(participants, tmp_path / "full.npz", "key")
+    row_distances = pairwise._row_distances
+    first_row = row_distances(
+        [participant.data for participant in participants], 0, None, None
+    )
+    mock_row_distances = mocker.patch.object(
+        pairwise, "_row_distances", side_effect=[first_row, KeyboardInterrupt()]
+    )
+
+    with pytest.raises(KeyboardInterrupt):
+        pairwise.distance_matrix(
+            participants, output_path, "key", checkpoint_seconds=3600
+        )
+
+    checkpoint_path = tmp_path / f"matrix{pairwise.CHECKPOINT_SUFFIX}"
+    assert not output_path.exists()
+    with np.load(checkpoint_path) as checkpoint:
+        assert list(checkpoint["done"]) == [True, False, False]
+
+    mock_row_distances.side_effect = row_distances
+    mock_row_distances.reset_mock()
+    distances = pairwise.distance_matrix(participants, output_path, "key")
+
+    assert [call.args[1] for call in mock_row_distances.call_args_list] == [1, 2]
+    assert np.allclose(distances, expected)
+    assert not checkpoint_path.exists()
+
+
+def test_distance_matrix_ignores_other_checkpoint(
+    tmp_path: pathlib.Path, mocker: pytest_mock.MockerFixture
+) -> None:
+    """Test that a checkpoint of other options is not resumed."""
+    participants = _participants(3)
+    output_path = tmp_path / "matrix.npz"
+    pairwise._save_checkpoint(
+        tmp_path / f"matrix{pairwise.CHECKPOINT_SUFFIX}",
+        np.ones((3, 3)),
+        np.array([True, True]),
+        np.array(["100", "101", "102"]),
+        "other key",
+    )
+    spy = mocker.spy(pairwise, "_row_distances")
+
+    distances = pairwise.distance_matrix(participants, output_path, "key")
+
+    assert spy.call_count == 2
+    assert np.all(np.diag(distances) == 0)
+
+
+def test_distance_matrix_single_participant(tmp_path: pathlib.Path) -> None:
+    """Test that a single participant gives a 1 x 1 zero matrix."""
+    distances = pairwise.distance_matrix(
+        _participants(1), tmp_path / "matrix.npz", "key"
+    )
+
+    assert np.array_equal(distances, np.zeros((1, 1)))
@@ -172,3 +172,51 @@ def test_normalize_segments_dimension_error() -> None:
         match="The shape of centered_data does not match the expected dimensions.",
     ):
         preprocessing.normalize_segments(data, average_lengths)
+
+
+def test_normalize_segments_zero_length_segment() -> None:
+    """Test that a zero-length segment collapses onto its start instead of NaN."""
+    data = np.array(
+        [
+            [1.0, 0, 0, 0, 0, 0, 0, 2.0, 0, 0],
+            [2.0, 0, 0, 0, 1.0, 0, 0, 2.0, 0, 0],
+        ]
+    )
+    segment_list = [
+        [(1, 4), (2, 5), (3, 6)],
+        [(4, 7), (5, 8), (6, 9)],
+    ]
+    average_lengths = np.array([[1.5], [2.0]])
+    expected_output = np.array(
+        [
+            [1.0, 0, 0, 0, 0, 0, 0, 2.0, 0, 0],
+            [2.0, 0, 0, 0, 1.5, 0, 0, 3.5, 0, 0],
+        ]
+    )
+
+    normalized_data = preprocessing.normalize_segments(
+        data, average_lengths, segment_list
+    )
+
+    assert not np.isnan(normalized_data).any()
+    assert np.array_equal(normalized_data, expected_output)
+
+
+def test_preprocessing_keeps_float32() -> None:
+    """Test that float32 data stays float32 and segment lengths are float64."""
+    data = np.random.default_rng(0).normal(size=(50, 61))
+    centered = preprocessing.center_joints_to_hip(data.astype(np.float32))
+    average_lengths = preprocessing.get_average_length(centered)
+
+    normalized = preprocessing.normalize_segments(centered, average_lengths)
+
+    assert centered.dtype == np.float32
+    assert average_lengths.dtype == np.float64
+    assert normalized.dtype == np.float32
+    assert np.allclose(
+        normalized,
+        preprocessing.normalize_segments(
+            preprocessing.center_joints_to_hip(data), average_lengths
+        ),
+        atol=1e-5,
+    )
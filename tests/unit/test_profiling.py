@@ -0,0 +1,69 @@
+"""Test profiling.py functions."""
+
+import json
+import pathlib
+
+import numpy as np
+
+from mobi_motion_tracking.core import profiling
+
+
+def test_stage_records_time_frames_and_memory() -> None:
+    """Test that a stage records its wall time, frames and peak memory."""
+    with profiling.StageProfiler() as profiler:
+        with profiler.stage("normalize", "100", "seq1") as record:
+            data = np.ones((1000, 61))
+            record.frames = len(data)
+
+    (record,) = profiler.records
+    assert record.stage == "normalize"
+    assert record.sequence_sheetname == "seq1"
+    assert record.frames == 1000
+    assert record.seconds > 0
+    assert record.peak_memory is not None
+    assert record.peak_memory >= data.nbytes
+
+
+def test_nested_stage_peak_counts_for_outer_stage() -> None:
+    """Test that memory peaking in an inner stage is reported by the outer one."""
+    with profiling.StageProfiler() as profiler:
+        with profiler.stage("read", "100"):
+            with profiler.stage("clean", "100", "seq1"):
+                np.ones((1000, 61))
+
+    inner, outer = profiler.records
+    assert inner.peak_memory is not None and outer.peak_memory is not None
+    assert outer.peak_memory >= inner.peak_memory >= 1000 * 61 * 8
+
+
+def test_stage_without_profiler() -> None:
+    """Test that the module level stage does nothing without a profiler."""
+    with profiling.stage(None, "read", "100") as record:
+        record.frames = 3
+
+    assert record.seconds == 0.0
+
+
+def test_summary_and_trace(tmp_path: pathlib.Path) -> None:
+    """Test that the summary totals stages in order and the trace has every record."""
+    profiler = profiling.StageProfiler(trace_memory=False)
+    profiler.records = [
+        profiling.StageRecord("100", "seq1", "similarity", 3.0, 10),
+        profiling.StageRecord("100", None, "read", 1.0),
+        profiling.StageRecord("101", "seq1", "similarity", 4.0, 20),
+    ]
+
+    summary = profiler.summary()
+    trace = profiler.write_trace(tmp_path / "trace.ndjson").read_text().splitlines()
+
+    assert [row["stage"] for row in summary] == ["read", "similarity"]
+    assert summary[1]["seconds"] == 7.0
+    assert summary[1]["frames"] == 30
+    assert summary[1]["share"] == 7.0 / 8.0
+    assert summary[1]["peak_memory"] is None
+    assert "similarity" in profiler.format_summary()
+    assert [json.loads(line)["participant_ID"] for line in trace] == [
+        "100",
+        "100",
+        "101",
+    ]
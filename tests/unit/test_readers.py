@@ -1,8 +1,10 @@
 """test readers.py functions."""
 
 import pathlib
+from typing import Literal
 
 import numpy as np
+import openpyxl
 import pandas as pd
 import pytest
 
@@ -146,3 +148,191 @@ def test_read_participant_data_exact_output() -> None:
     assert np.allclose(
         result, expected, equal_nan=True
     ), "Cleaned data does not match expected output"
+
+
+def test_read_participant_sequences_matches_single_reads() -> None:
+    """Test that reading several sheets at once equals reading them one by one."""
+    path = pathlib.Path("tests/sample_data/100.xlsx")
+    sequences = [2, 1, 4]
+
+    participant_data = readers.read_participant_sequences(path, sequences)
+
+    assert list(participant_data) == sequences
+    for sequence in sequences:
+        expected = readers.read_participant_data(path, sequence)
+        assert participant_data[sequence].participant_ID == "100"
+        assert (
+            participant_data[sequence].sequence_sheetname == expected.sequence_sheetname
+        )
+        assert np.array_equal(participant_data[sequence].data, expected.data)
+    assert participant_data[4].data.size == 0
+
+
+@pytest.mark.parametrize("reader", ["pandas", "fast"])
+def test_read_participant_sequences_empty_sheet(
+    reader: Literal["pandas", "fast"],
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test that only missing sheets are reported, not sheets without frames."""
+    path = tmp_path / "100.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "seq1"
+    workbook.active.append(["frame", "x_Hip"] + [f"col{i}" for i in range(59)])
+    workbook.save(path)
+
+    for _ in range(2):
+        participant_data = readers.read_participant_sequences(
+            path, [1, 2], reader, cache_dir=tmp_path / "cache"
+        )
+
+        assert participant_data[1].data.shape == (0, 61)
+        assert participant_data[2].data.size == 0
+        assert capsys.readouterr().out == (
+            "Sheet doesn't exist: Worksheet named 'seq2' not found\n"
+        )
+
+
+@pytest.mark.parametrize("file_name", ["100.xlsx", "101.xlsx", "Gold.xlsx"])
+def test_fast_reader_matches_pandas(file_name: str) -> None:
+    """Test that the streaming reader returns the same data as data_cleaner."""
+    path = pathlib.Path("tests/sample_data") / file_name
+
+    expected = readers.read_participant_data(path, 1, reader="pandas")
+    result = readers.read_participant_data(path, 1, reader="fast")
+
+    assert result.participant_ID == expected.participant_ID
+    assert result.sequence_sheetname == expected.sequence_sheetname
+    assert np.array_equal(result.data, expected.data, equal_nan=True)
+
+
+def test_fast_reader_irregular_sheet(tmp_path: pathlib.Path) -> None:
+    """Test the streaming reader on blank rows, short rows and missing values."""
+    path = tmp_path / "100.xlsx"
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "seq1"
+    worksheet.append(["junk"])
+    worksheet.append(["frame", " x_Hip "] + [f"col{i}" for i in range(60)])
+    worksheet.append(list(range(62)))
+    worksheet.append([])
+    worksheet.append([1, "NA", None, "2.5"])
+    worksheet.append(list(range(100, 162)))
+    worksheet.append([None, ""])
+    workbook.save(path)
+
+    expected = readers.read_participant_data(path, 1, reader="pandas")
+    result = readers.read_participant_data(path, 1, reader="fast")
+
+    assert result.data.shape == (4, 61)
+    assert np.array_equal(result.data, expected.data, equal_nan=True)
+
+
+def test_fast_reader_multiple_x_hip(tmp_path: pathlib.Path) -> None:
+    """Test that the streaming reader rejects duplicate x_Hip headers."""
+    path = tmp_path / "100.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "seq1"
+    workbook.active.append(["frame", "x_Hip"])
+    workbook.active.append(["frame", "x_Hip"])
+    workbook.save(path)
+
+    with pytest.raises(ValueError, match="Multiple x_Hip entries found"):
+        readers.read_participant_data(path, 1, reader="fast")
+
+
+def test_read_participant_data_bad_reader() -> None:
+    """Test that an unsupported reader raises an error."""
+    with pytest.raises(ValueError, match="Unsupported reader selected."):
+        readers.read_participant_data(
+            pathlib.Path("tests/sample_data/100.xlsx"),
+            1,
+            reader="fake",  # type: ignore[arg-type] # Failing on purpose to test ValueError
+        )
+
+
+_HEADER = ["frame", "x_Hip"] + [f"col{i}" for i in range(59)]
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [["meta"] * 3 + _HEADER + ["note"] * 5]
+        + [["m"] * 3 + list(range(61)) + ["n"] * 5] * 3,
+        [["junk"]] * 4 + [_HEADER, list(range(61))],
+        [_HEADER] + [[1, "NA", "2.5"]] * 3,
+        [_HEADER],
+        [[], _HEADER, list(range(61)), [None] * 70 + ["tail"]],
+        [[]] * 5 + [_HEADER] + [list(range(61))] * 2,
+        [["meta"]] + [[]] * 4 + [_HEADER, list(range(61))],
+    ],
+    ids=[
+        "metadata_columns",
+        "header_below_scan",
+        "short_rows",
+        "no_frames",
+        "tail",
+        "blank_leading_rows",
+        "blank_rows_after_metadata",
+    ],
+)
+def test_read_joint_columns_matches_data_cleaner(
+    tmp_path: pathlib.Path, rows: list
+) -> None:
+    """Test that selective column loading gives the data_cleaner result."""
+    path = tmp_path / "100.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "seq1"
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+    expected = readers.data_cleaner(pd.read_excel(path, "seq1", header=None))
+    result = readers.read_joint_columns(pd.ExcelFile(path), "seq1", header_scan_rows=3)
+
+    assert result.shape[1] == readers.NUM_COLUMNS
+    assert np.array_equal(result.to_numpy(dtype=np.float64), expected, equal_nan=True)
+
+
+def test_read_joint_columns_errors(tmp_path: pathlib.Path) -> None:
+    """Test that selective column loading raises the data_cleaner errors."""
+    path = tmp_path / "100.xlsx"
+    workbook = openpyxl.Workbook()
+    for title, rows in [
+        ("duplicate", [_HEADER, list(range(61)), ["x_Hip"] + [1] * 60]),
+        ("first_column", [["x_Hip"] + ["a"] * 61, list(range(62))]),
+        ("missing", [["a", "b"], [1, 2]]),
+    ]:
+        worksheet = workbook.create_sheet(title)
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(path)
+    excel_file = pd.ExcelFile(path)
+
+    with pytest.raises(ValueError, match="Multiple x_Hip entries found"):
+        readers.read_joint_columns(excel_file, "duplicate")
+    with pytest.raises(IndexError, match="Column index out of range."):
+        readers.read_joint_columns(excel_file, "first_column")
+    with pytest.raises(ValueError, match="x_Hip not found in DataFrame."):
+        readers.read_joint_columns(excel_file, "missing")
+
+
+def test_read_participant_data_float32() -> None:
+    """Test that float32 data is the float64 data rounded to float32."""
+    path = pathlib.Path("tests/sample_data/100.xlsx")
+
+    data32 = readers.read_participant_data(path, 1, dtype="float32").data
+    data64 = readers.read_participant_data(path, 1).data
+
+    assert data32.dtype == np.float32
+    assert np.array_equal(data32, data64.astype(np.float32), equal_nan=True)
+
+
+def test_read_participant_data_bad_dtype() -> None:
+    """Test that an unsupported dtype raises an error."""
+    with pytest.raises(ValueError, match="Unsupported dtype selected."):
+        readers.read_participant_data(
+            pathlib.Path("tests/sample_data/100.xlsx"),
+            1,
+            dtype="float16",  # type: ignore[arg-type] # Failing on purpose to test ValueError
+        )
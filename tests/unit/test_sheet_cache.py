@@ -0,0 +1,72 @@
+"""Test sheet_cache.py functions."""
+
+import os
+import pathlib
+import shutil
+
+import numpy as np
+import pytest_mock
+
+from mobi_motion_tracking.core import orchestrator
+from mobi_motion_tracking.io.readers import readers, sheet_cache
+
+
+def test_store_and_load_sequences(tmp_path: pathlib.Path) -> None:
+    """Test that stored sequences are loaded back and merged."""
+    workbook_path = pathlib.Path("tests/sample_data/100.xlsx")
+    first = np.arange(6, dtype=np.float64).reshape(2, 3)
+
+    sheet_cache.store_sequences(tmp_path, workbook_path, {1: first})
+    sheet_cache.store_sequences(tmp_path, workbook_path, {4: np.array([])})
+    loaded = sheet_cache.load_sequences(tmp_path, workbook_path)
+
+    assert sorted(loaded) == [1, 4]
+    assert np.array_equal(loaded[1], first)
+    assert loaded[4].size == 0
+
+
+def test_load_sequences_modified_workbook(tmp_path: pathlib.Path) -> None:
+    """Test that the cache of a modified workbook is ignored."""
+    workbook_path = tmp_path / "100.xlsx"
+    shutil.copy("tests/sample_data/100.xlsx", workbook_path)
+    sheet_cache.store_sequences(tmp_path, workbook_path, {1: np.zeros((2, 61))})
+
+    stat = workbook_path.stat()
+    os.utime(workbook_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert sheet_cache.load_sequences(tmp_path, workbook_path) == {}
+
+
+def test_read_participant_sequences_uses_cache(
+    tmp_path: pathlib.Path, mocker: pytest_mock.MockerFixture
+) -> None:
+    """Test that cached sequences are not read from the workbook again."""
+    workbook_path = pathlib.Path("tests/sample_data/100.xlsx")
+    expected = readers.read_participant_sequences(workbook_path, [1, 4])
+    readers.read_participant_sequences(workbook_path, [1, 4], cache_dir=tmp_path)
+    spy = mocker.spy(readers, "_read_workbook_sequences")
+
+    cached = readers.read_participant_sequences(
+        workbook_path, [1, 4], cache_dir=tmp_path
+    )
+
+    spy.assert_not_called()
+    for sequence in (1, 4):
+        assert cached[sequence].participant_ID == "100"
+        assert cached[sequence].sequence_sheetname == f"seq{sequence}"
+        assert np.array_equal(cached[sequence].data, expected[sequence].data)
+
+
+def test_convert_directory(tmp_path: pathlib.Path) -> None:
+    """Test that convert caches every sequence of every workbook."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    shutil.copy("tests/sample_data/100.xlsx", data_dir / "100.xlsx")
+    shutil.copy("tests/sample_data/csv_file.csv", data_dir / "csv_file.csv")
+    cache_dir = tmp_path / "cache"
+
+    converted = orchestrator.convert(data_dir, cache_dir, reader="fast")
+    cached = sheet_cache.load_sequences(cache_dir, data_dir / "100.xlsx")
+
+    assert converted == [data_dir / "100.xlsx"]
+    assert sorted(cached) == readers.list_sequences(data_dir / "100.xlsx")
@@ -1,7 +1,10 @@
 """Test similarity_functions.py functions."""
 
+import tracemalloc
+
 import numpy as np
 import pytest
+import pytest_mock
 
 from mobi_motion_tracking.processing import similarity_functions
 
@@ -138,3 +141,399 @@ def test_dtw_different_length_inputs() -> None:
     assert (
         len(result.metrics["experimental_path"]) > 0
     ), "Experimental path returned empty. Returned path should not be empty."
+
+
+@pytest.mark.parametrize(
+    "num_frames_target, num_frames_subject, window_size",
+    [(12, 12, None), (15, 9, None), (9, 15, 3), (20, 20, 0), (1, 6, None)],
+)
+def test_dtw_vectorized_matches_reference(
+    num_frames_target: int, num_frames_subject: int, window_size: int | None
+) -> None:
+    """Test that the vectorized engine reproduces the reference engine."""
+    rng = np.random.default_rng(42)
+    target_data = rng.normal(size=(num_frames_target, 61))
+    subject_data = rng.normal(size=(num_frames_subject, 61))
+
+    reference = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, engine="reference"
+    )
+    vectorized = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, engine="vectorized"
+    )
+
+    assert np.isclose(
+        vectorized.metrics["distance"], reference.metrics["distance"], rtol=1e-12
+    ), "Vectorized distance does not match reference distance."
+    assert np.array_equal(
+        vectorized.metrics["target_path"], reference.metrics["target_path"]
+    ), "Vectorized target path does not match reference target path."
+    assert np.array_equal(
+        vectorized.metrics["experimental_path"],
+        reference.metrics["experimental_path"],
+    ), "Vectorized experimental path does not match reference experimental path."
+
+
+def test_dtw_vectorized_identical_long_sequences() -> None:
+    """Test that identical frames keep an exact zero distance when vectorized."""
+    data = np.random.default_rng(0).normal(size=(50, 61)) * 100
+
+    output = similarity_functions.dynamic_time_warping(data, data)
+
+    assert output.metrics["distance"] == 0.0, "Identical sequences should match."
+
+
+@pytest.mark.parametrize(
+    "num_frames_target, num_frames_subject, window_size",
+    [(30, 30, 0), (30, 30, 4), (25, 40, 2), (40, 25, 20), (8, 3, 1)],
+)
+def test_dtw_banded_matches_reference(
+    num_frames_target: int, num_frames_subject: int, window_size: int
+) -> None:
+    """Test that the banded vectorized engine reproduces the reference engine."""
+    rng = np.random.default_rng(7)
+    target_data = rng.normal(size=(num_frames_target, 61))
+    subject_data = rng.normal(size=(num_frames_subject, 61))
+
+    reference = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, engine="reference"
+    )
+    banded = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, engine="vectorized"
+    )
+
+    assert np.isclose(
+        banded.metrics["distance"], reference.metrics["distance"], rtol=1e-12
+    ), "Banded distance does not match reference distance."
+    assert np.array_equal(
+        banded.metrics["target_path"], reference.metrics["target_path"]
+    ), "Banded target path does not match reference target path."
+    assert np.array_equal(
+        banded.metrics["experimental_path"], reference.metrics["experimental_path"]
+    ), "Banded experimental path does not match reference experimental path."
+
+
+def test_dtw_banded_storage_scales_with_window() -> None:
+    """Test that banded storage holds O(frames * window) cells."""
+    num_frames, window_size = 500, 5
+    first_columns, last_columns = similarity_functions._sakoe_chiba_bounds(
+        num_frames, num_frames, window_size
+    )
+    data = np.random.default_rng(3).normal(size=(num_frames, 57))
+
+    cost_matrix = similarity_functions._accumulate_cost_banded(
+        data, data, first_columns, last_columns
+    )
+
+    assert cost_matrix.values.size < 2 * num_frames * (2 * window_size + 3)
+    assert cost_matrix.shape == (num_frames + 1, num_frames + 1)
+    assert cost_matrix[num_frames, num_frames] == 0.0
+    assert cost_matrix[1, 2 + window_size] == float("inf")
+
+
+@pytest.mark.parametrize("window_size", [None, 3])
+def test_dtw_distance_only_matches_full(window_size: int | None) -> None:
+    """Test that distance-only DTW returns the full distance and no paths."""
+    rng = np.random.default_rng(11)
+    target_data = rng.normal(size=(40, 61))
+    subject_data = rng.normal(size=(35, 61))
+
+    full = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size
+    )
+    distance_only = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, distance_only=True
+    )
+
+    assert distance_only.metrics.keys() == {"distance"}
+    assert np.isclose(distance_only.metrics["distance"], full.metrics["distance"])
+
+
+def test_dtw_distance_only_upper_bound() -> None:
+    """Test that distance-only DTW abandons when the upper bound is exceeded."""
+    rng = np.random.default_rng(12)
+    target_data = rng.normal(size=(20, 61))
+    subject_data = rng.normal(size=(20, 61))
+    distance = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, distance_only=True
+    ).metrics["distance"]
+
+    abandoned = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, distance_only=True, upper_bound=distance / 2
+    )
+    kept = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, distance_only=True, upper_bound=distance * 2
+    )
+
+    assert abandoned.metrics["distance"] == float("inf")
+    assert np.isclose(kept.metrics["distance"], distance)
+
+
+def test_dtw_upper_bound_below_final_cost() -> None:
+    """Test that a bound above the last row minimum still abandons a larger cost."""
+    rng = np.random.default_rng(17)
+    target_data = rng.normal(size=(20, 61))
+    subject_data = rng.normal(size=(20, 61))
+    cost_matrix = similarity_functions._accumulate_cost_vectorized(
+        subject_data[:, 4:], target_data[:, 4:]
+    )
+    last_row_minimum = cost_matrix[-1, 1:].min()
+    assert last_row_minimum < cost_matrix[-1, -1]
+    upper_bound = (last_row_minimum + cost_matrix[-1, -1]) / 2
+
+    distances = [
+        similarity_functions.dynamic_time_warping(
+            target_data,
+            subject_data,
+            engine=engine,
+            distance_only=True,
+            upper_bound=upper_bound,
+        ).metrics["distance"]
+        for engine in ("vectorized", "reference")
+    ]
+
+    assert distances == [float("inf"), float("inf")]
+
+
+def test_dtw_upper_bound_requires_distance_only() -> None:
+    """Test that an upper bound without distance_only raises ValueError."""
+    data = np.random.rand(5, 7)
+
+    with pytest.raises(ValueError, match="upper_bound can only be used"):
+        similarity_functions.dynamic_time_warping(data, data, upper_bound=1.0)
+
+
+def test_dtw_unsupported_engine() -> None:
+    """Test that DTW raises ValueError for an unsupported engine."""
+    data = np.random.rand(5, 7)
+
+    with pytest.raises(ValueError, match="Unsupported DTW engine selected."):
+        similarity_functions.dynamic_time_warping(data, data, engine="fake_engine")  # type: ignore[arg-type] # Failing on purpose to test ValueError
+
+
+def test_fastdtw_large_radius_matches_dtw() -> None:
+    """Test that FastDTW is exact when the radius covers the whole sequence."""
+    rng = np.random.default_rng(21)
+    target_data = np.cumsum(rng.normal(size=(30, 61)), axis=0)
+    subject_data = np.cumsum(rng.normal(size=(24, 61)), axis=0)
+
+    exact = similarity_functions.dynamic_time_warping(target_data, subject_data)
+    approximate = similarity_functions.fast_dynamic_time_warping(
+        target_data, subject_data, radius=30
+    )
+
+    assert approximate.method == "FastDTW"
+    assert np.isclose(approximate.metrics["distance"], exact.metrics["distance"])
+    assert np.array_equal(
+        approximate.metrics["target_path"], exact.metrics["target_path"]
+    )
+
+
+@pytest.mark.parametrize("radius", [0, 1, 3])
+def test_fastdtw_upper_bounds_dtw(radius: int) -> None:
+    """Test that FastDTW never underestimates DTW and returns a complete path."""
+    rng = np.random.default_rng(22)
+    target_data = np.cumsum(rng.normal(size=(70, 61)), axis=0)
+    subject_data = np.cumsum(rng.normal(size=(55, 61)), axis=0)
+
+    exact = similarity_functions.dynamic_time_warping(target_data, subject_data)
+    approximate = similarity_functions.fast_dynamic_time_warping(
+        target_data, subject_data, radius=radius
+    )
+    distance_only = similarity_functions.fast_dynamic_time_warping(
+        target_data, subject_data, radius=radius, distance_only=True
+    )
+
+    assert approximate.metrics["distance"] >= exact.metrics["distance"] * (1 - 1e-12)
+    assert np.isclose(
+        distance_only.metrics["distance"], approximate.metrics["distance"]
+    )
+    assert approximate.metrics["target_path"][0] == 0
+    assert approximate.metrics["target_path"][-1] == 55
+    assert approximate.metrics["experimental_path"][-1] == 70
+
+
+def test_fastdtw_negative_radius() -> None:
+    """Test that FastDTW raises ValueError for a negative radius."""
+    data = np.random.rand(5, 7)
+
+    with pytest.raises(ValueError, match="radius must be a non-negative integer"):
+        similarity_functions.fast_dynamic_time_warping(data, data, radius=-1)
+
+
+@pytest.mark.parametrize("distance_only", [False, True])
+@pytest.mark.parametrize("window_size", [None, 5])
+def test_batch_dtw_matches_single(distance_only: bool, window_size: int) -> None:
+    """Test that batched DTW equals DTW of every subject on its own."""
+    rng = np.random.default_rng(0)
+    target = rng.normal(size=(30, 10))
+    subjects = [rng.normal(size=(num_frames, 10)) for num_frames in (12, 40, 28, 30)]
+
+    batched = similarity_functions.batch_dynamic_time_warping(
+        target, subjects, window_size=window_size, distance_only=distance_only
+    )
+
+    for subject, metrics in zip(subjects, batched):
+        expected = similarity_functions.dynamic_time_warping(
+            target, subject, window_size=window_size, distance_only=distance_only
+        )
+        assert metrics.metrics.keys() == expected.metrics.keys()
+        assert np.isclose(
+            metrics.metrics["distance"], expected.metrics["distance"], rtol=1e-12
+        )
+        if not distance_only:
+            assert np.array_equal(
+                metrics.metrics["target_path"], expected.metrics["target_path"]
+            )
+            assert np.array_equal(
+                metrics.metrics["experimental_path"],
+                expected.metrics["experimental_path"],
+            )
+
+
+def test_batch_dtw_distance_only_memory(mocker: pytest_mock.MockerFixture) -> None:
+    """Test that distance-only batches too large to stack keep within the strips."""
+    mocker.patch.object(similarity_functions, "_STRIP_ELEMENTS", 2**14)
+    mocker.patch.object(similarity_functions, "_BATCH_ELEMENTS", 2**14)
+    rng = np.random.default_rng(16)
+    target = rng.normal(size=(1000, 10))
+    subjects = [rng.normal(size=(num_frames, 10)) for num_frames in (1000, 990)]
+    expected = [
+        similarity_functions.dynamic_time_warping(target, subject, distance_only=True)
+        for subject in subjects
+    ]
+
+    tracemalloc.start()
+    batched = similarity_functions.batch_dynamic_time_warping(
+        target, subjects, distance_only=True
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < 16 * 2**14 * 8
+    assert [metrics.metrics for metrics in batched] == [
+        metrics.metrics for metrics in expected
+    ]
+
+
+def test_batch_dtw_dimension_error() -> None:
+    """Test that batched DTW rejects subjects with other dimensions."""
+    with pytest.raises(ValueError, match="dimensions of the two input signals"):
+        similarity_functions.batch_dynamic_time_warping(
+            np.zeros((5, 10)), [np.zeros((5, 10)), np.zeros((5, 9))]
+        )
+
+
+def test_traceback_returns_int32_view() -> None:
+    """Test that the traceback fills a preallocated int32 (L, 2) array."""
+    cost_matrix = np.full((4, 3), np.inf)
+    cost_matrix[0, 0] = 0.0
+    cost_matrix[1:, 1:] = [[1.0, 2.0], [3.0, 1.0], [4.0, 2.0]]
+
+    path = similarity_functions._traceback(cost_matrix)
+
+    assert path.dtype == np.int32
+    assert path.base is not None
+    assert len(path.base) == 4 + 3 - 1
+    assert path.tolist() == [[0, 0], [1, 1], [2, 2], [3, 2]]
+
+
+def test_dtw_path_metrics_are_views() -> None:
+    """Test that the stored path metrics are views of one warping path array."""
+    rng = np.random.default_rng(3)
+
+    output = similarity_functions.dynamic_time_warping(
+        rng.normal(size=(6, 61)), rng.normal(size=(9, 61))
+    )
+
+    assert output.metrics["target_path"].dtype == np.int32
+    assert output.metrics["target_path"].base is not None
+    assert (
+        output.metrics["target_path"].base is output.metrics["experimental_path"].base
+    )
+
+
+@pytest.mark.parametrize("distance_only", [False, True])
+@pytest.mark.parametrize("window_size", [None, 3])
+def test_dtw_float32_matches_float64(
+    distance_only: bool, window_size: int | None
+) -> None:
+    """Test that float32 sequences are aligned in float32 like in float64."""
+    rng = np.random.default_rng(13)
+    target_data = rng.normal(size=(40, 61))
+    subject_data = rng.normal(size=(35, 61))
+
+    expected = similarity_functions.dynamic_time_warping(
+        target_data, subject_data, window_size, distance_only=distance_only
+    )
+    output = similarity_functions.dynamic_time_warping(
+        target_data.astype(np.float32),
+        subject_data.astype(np.float32),
+        window_size,
+        distance_only=distance_only,
+    )
+
+    assert np.isclose(
+        output.metrics["distance"], expected.metrics["distance"], rtol=1e-5
+    )
+    if not distance_only:
+        assert np.array_equal(
+            output.metrics["target_path"], expected.metrics["target_path"]
+        )
+
+
+def test_float32_cost_matrix() -> None:
+    """Test that float32 frames give float32 local and accumulated costs."""
+    rng = np.random.default_rng(14)
+    subject_data = rng.normal(size=(8, 5)).astype(np.float32)
+    target_data = rng.normal(size=(6, 5)).astype(np.float32)
+
+    cost_matrix = similarity_functions._accumulate_cost_vectorized(
+        subject_data, target_data
+    )
+
+    assert cost_matrix.dtype == np.float32
+    assert np.allclose(
+        cost_matrix,
+        similarity_functions._accumulate_cost_vectorized(
+            subject_data.astype(np.float64), target_data.astype(np.float64)
+        ),
+        rtol=1e-5,
+    )
+
+
+def test_cost_dtype_promotes_on_overflow() -> None:
+    """Test that float32 frames whose costs could overflow are compared in float64."""
+    frames = np.ones((10, 57), dtype=np.float32)
+
+    assert similarity_functions._cost_dtype(frames, frames) == np.float32
+    assert similarity_functions._cost_dtype(frames * 1e19, frames) == np.float64
+    assert similarity_functions._cost_dtype(frames, frames.astype(int)) == np.float64
+    assert np.isfinite(
+        similarity_functions.dynamic_time_warping(
+            np.hstack((frames[:, :4], frames * 1e19)),
+            np.hstack((frames[:, :4], -frames * 1e19)),
+            distance_only=True,
+        ).metrics["distance"]
+    )
+
+
+def test_batch_dtw_float32() -> None:
+    """Test that batched DTW of float32 subjects matches float64 distances."""
+    rng = np.random.default_rng(15)
+    target = rng.normal(size=(30, 10))
+    subjects = [rng.normal(size=(num_frames, 10)) for num_frames in (12, 28, 30)]
+
+    batched = similarity_functions.batch_dynamic_time_warping(
+        target.astype(np.float32),
+        [subject.astype(np.float32) for subject in subjects],
+        distance_only=True,
+    )
+
+    for subject, metrics in zip(subjects, batched):
+        expected = similarity_functions.dynamic_time_warping(
+            target, subject, distance_only=True
+        )
+        assert np.isclose(
+            metrics.metrics["distance"], expected.metrics["distance"], rtol=1e-5
+        )
@@ -1,6 +1,7 @@
 """Test writers.py functions."""
 
 import datetime
+import json
 import pathlib
 from typing import List, Optional
 
@@ -11,10 +12,10 @@ from mobi_motion_tracking.core import models
 from mobi_motion_tracking.io.writers import writers
 
 
-def test_generate_output_filename_good() -> None:
+def test_generate_output_filename_good(tmp_path: pathlib.Path) -> None:
     """Test that the generated filename follows the expected format and is created."""
     gold_id = "Gold"
-    output_dir = pathlib.Path("tests/sample_data")
+    output_dir = tmp_path
     date_str = datetime.datetime.now().strftime("%m%d%Y")
     expected_file = output_dir / f"results_Gold_{date_str}.ndjson"
 
@@ -34,7 +35,7 @@ def test_generate_output_filename_good() -> None:
     ],
 )
 def test_save_results_good(
-    selected_metrics: Optional[List[str]], expected_keys: set
+    selected_metrics: Optional[List[str]], expected_keys: set, tmp_path: pathlib.Path
 ) -> None:
     """Test that a single entry is correctly written to the NDJSON file."""
     gold = models.ParticipantData("Gold", "seq1", np.array([]))
@@ -42,7 +43,7 @@ def test_save_results_good(
     similarity_metrics = models.SimilarityMetrics(
         "fake_method", {"metric1": 1, "metric2": 2}
     )
-    output_dir = pathlib.Path("tests/sample_data")
+    output_dir = tmp_path
     date_str = datetime.datetime.now().strftime("%m%d%Y")
     expected_output_path = output_dir / f"results_Gold_{date_str}.ndjson"
 
@@ -58,14 +59,14 @@ def test_save_results_good(
         expected metrics."
 
 
-def test_save_results_wrong_metric() -> None:
+def test_save_results_wrong_metric(tmp_path: pathlib.Path) -> None:
     """Test save_results when an incorrect metric is selected."""
     gold = models.ParticipantData("Gold", "seq1", np.array([]))
     subject = models.ParticipantData("123", "seq1", np.array([]))
     similarity_metrics = models.SimilarityMetrics(
         "fake_method", {"metric1": 1, "metric2": 2}
     )
-    output_dir = pathlib.Path("tests/sample_data")
+    output_dir = tmp_path
     selected_metrics = ["metric1", "false_metric"]
 
     with pytest.raises(
@@ -79,3 +80,220 @@ def test_save_results_wrong_metric() -> None:
             output_dir,
             selected_metrics=selected_metrics,
         )
+
+
+def test_result_sink_matches_save_results(tmp_path: pathlib.Path) -> None:
+    """Test that the sink writes the same lines as save_results_to_ndjson."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    subjects = [models.ParticipantData(str(i), "seq1", np.array([])) for i in range(5)]
+    similarity_metrics = models.SimilarityMetrics(
+        "fake_method", {"metric1": 1, "metric2": 2}
+    )
+    date_str = datetime.datetime.now().strftime("%m%d%Y")
+    expected_dir = tmp_path / "expected"
+    sink_dir = tmp_path / "sink"
+
+    for subject in subjects:
+        writers.save_results_to_ndjson(gold, subject, similarity_metrics, expected_dir)
+    with writers.ResultSink(sink_dir, flush_every=2) as sink:
+        entries = [
+            sink.write(gold, subject, similarity_metrics) for subject in subjects
+        ]
+
+    file_name = f"results_Gold_{date_str}.ndjson"
+    assert (sink_dir / file_name).read_text() == (expected_dir / file_name).read_text()
+    assert [entry["participant_ID"] for entry in entries] == ["0", "1", "2", "3", "4"]
+
+
+def test_result_sink_serializes_array_paths(tmp_path: pathlib.Path) -> None:
+    """Test that array path metrics are converted to lists when written."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    subject = models.ParticipantData("123", "seq1", np.array([]))
+    similarity_metrics = models.SimilarityMetrics.from_dtw(
+        1.5, np.array([[0, 0], [1, 1], [2, 1]], dtype=np.int32)
+    )
+
+    with writers.ResultSink(tmp_path) as sink:
+        entry = sink.write(gold, subject, similarity_metrics)
+    row = json.loads(next(tmp_path.glob("*.ndjson")).read_text())
+
+    assert entry["target_path"] == [0, 1, 2]
+    assert row["experimental_path"] == [0, 1, 1]
+
+
+def test_result_sink_one_file_per_gold(tmp_path: pathlib.Path) -> None:
+    """Test that entries of different gold participants go to their own files."""
+    subject = models.ParticipantData("123", "seq1", np.array([]))
+    similarity_metrics = models.SimilarityMetrics("fake_method", {"metric1": 1})
+
+    with writers.ResultSink(tmp_path) as sink:
+        for gold_ID in ("GoldA", "GoldB", "GoldA"):
+            gold = models.ParticipantData(gold_ID, "seq1", np.array([]))
+            sink.write(gold, subject, similarity_metrics)
+
+    line_counts = {
+        path.name.split("_")[1]: len(path.read_text().splitlines())
+        for path in tmp_path.glob("results_*.ndjson")
+    }
+    assert line_counts == {"GoldA": 2, "GoldB": 1}
+
+
+def test_result_sink_bad_metric(tmp_path: pathlib.Path) -> None:
+    """Test that the sink rejects metrics missing from the results."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    subject = models.ParticipantData("123", "seq1", np.array([]))
+    similarity_metrics = models.SimilarityMetrics("fake_method", {"metric1": 1})
+
+    with writers.ResultSink(tmp_path) as sink:
+        with pytest.raises(
+            ValueError, match="Selected metrics are not eligible for selected method."
+        ):
+            sink.write(gold, subject, similarity_metrics, ["metric2"])
+
+
+def test_result_sink_npz_paths(tmp_path: pathlib.Path) -> None:
+    """Test that npz path format links int32 arrays from the NDJSON rows."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    similarity_metrics = models.SimilarityMetrics.from_dtw(
+        1.5, warping_path=[(0, 0), (1, 1), (1, 2)]
+    )
+
+    with writers.ResultSink(tmp_path, path_format="npz") as sink:
+        for participant_ID in ("100", "101"):
+            subject = models.ParticipantData(participant_ID, "seq1", np.array([]))
+            sink.write(gold, subject, similarity_metrics)
+
+    (output_file,) = tmp_path.glob("results_*.ndjson")
+    rows = [json.loads(line) for line in output_file.read_text().splitlines()]
+    target_paths = [
+        writers.read_linked_array(tmp_path, row["target_path"]) for row in rows
+    ]
+    experimental_path = writers.read_linked_array(
+        tmp_path, rows[1]["experimental_path"]
+    )
+
+    assert (
+        rows[0]["target_path"]["file"] == output_file.with_suffix(".paths.0.npz").name
+    )
+    assert rows[0]["target_path"]["key"] != rows[1]["target_path"]["key"]
+    assert rows[0]["distance"] == 1.5
+    assert all(path.dtype == np.int32 for path in target_paths)
+    assert all(np.array_equal(path, [0, 1, 1]) for path in target_paths)
+    assert np.array_equal(experimental_path, [0, 1, 2])
+
+
+def test_result_sink_npz_interrupted(tmp_path: pathlib.Path) -> None:
+    """Test that flushed rows of a run killed before close link to saved arrays."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    similarity_metrics = models.SimilarityMetrics.from_dtw(
+        1.5, warping_path=[(0, 0), (1, 1), (1, 2)]
+    )
+    subjects = [models.ParticipantData(str(i), "seq1", np.array([])) for i in range(5)]
+
+    interrupted = writers.ResultSink(tmp_path, flush_every=2, path_format="npz")
+    for subject in subjects[:3]:
+        interrupted.write(gold, subject, similarity_metrics)
+    (output_file,) = tmp_path.glob("results_*.ndjson")
+    flushed_rows = [json.loads(line) for line in output_file.read_text().splitlines()]
+    with writers.ResultSink(tmp_path, path_format="npz") as sink:
+        for subject in subjects[3:]:
+            sink.write(gold, subject, similarity_metrics)
+    rows = [json.loads(line) for line in output_file.read_text().splitlines()]
+
+    assert [row["participant_ID"] for row in flushed_rows] == ["0", "1"]
+    assert [row["participant_ID"] for row in rows] == ["0", "1", "3", "4"]
+    assert {row["target_path"]["file"] for row in rows} == {
+        output_file.with_suffix(".paths.0.npz").name,
+        output_file.with_suffix(".paths.1.npz").name,
+    }
+    for row in rows:
+        assert np.array_equal(
+            writers.read_linked_array(tmp_path, row["experimental_path"]), [0, 1, 2]
+        )
+
+
+def test_result_sink_bad_path_format(tmp_path: pathlib.Path) -> None:
+    """Test that an unsupported path format raises an error."""
+    with pytest.raises(ValueError, match="Unsupported path format selected."):
+        writers.ResultSink(tmp_path, path_format="csv")  # type: ignore[arg-type] # Failing on purpose to test ValueError
+
+
+def test_result_sink_row_fields(tmp_path: pathlib.Path) -> None:
+    """Test that row fields are appended to the entries of their participant."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    subjects = [models.ParticipantData(str(i), "seq1", np.array([])) for i in (1, 2)]
+    similarity_metrics = models.SimilarityMetrics("DTW", {"distance": 1.0})
+
+    with writers.ResultSink(
+        tmp_path, row_fields={"1": {"subject_fingerprint": "10-20"}}
+    ) as sink:
+        entries = [
+            sink.write(gold, subject, similarity_metrics) for subject in subjects
+        ]
+
+    assert entries[0]["subject_fingerprint"] == "10-20"
+    assert "subject_fingerprint" not in entries[1]
+
+
+def test_result_sink_drops_partial_line(tmp_path: pathlib.Path) -> None:
+    """Test that an incomplete last line of an interrupted run is removed."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    subject = models.ParticipantData("1", "seq1", np.array([]))
+    output_file = writers.generate_output_filename("Gold", tmp_path)
+    output_file.write_text('{"participant_ID": "0"}\n{"participant_ID": "1", "sh')
+
+    with writers.ResultSink(tmp_path) as sink:
+        sink.write(gold, subject, models.SimilarityMetrics("DTW", {"distance": 1.0}))
+
+    rows = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [row["participant_ID"] for row in rows] == ["0", "1"]
+
+
+def test_result_index(tmp_path: pathlib.Path) -> None:
+    """Test that the index reads all results files of a gold and checks fingerprints."""
+    rows = [
+        {"participant_ID": "1", "sheetname": "seq1", "method": "DTW"},
+        {
+            "participant_ID": "2",
+            "sheetname": "seq1",
+            "method": "DTW",
+            "subject_fingerprint": "10-20",
+        },
+    ]
+    (tmp_path / "results_Gold_01012025.ndjson").write_text(
+        json.dumps(rows[0]) + "\n" + '{"participant_ID": "3"'
+    )
+    (tmp_path / "results_Gold_01022025.ndjson").write_text(json.dumps(rows[1]) + "\n")
+    (tmp_path / "results_Other_01022025.ndjson").write_text(
+        json.dumps({"participant_ID": "4", "sheetname": "seq1", "method": "DTW"}) + "\n"
+    )
+
+    index = writers.ResultIndex.load(tmp_path, "Gold")
+
+    assert len(index.rows) == 2
+    assert index.is_done("1", "seq1", "DTW", {"subject_fingerprint": "99-99"})
+    assert index.is_done("2", "seq1", "DTW", {"subject_fingerprint": "10-20"})
+    assert not index.is_done("2", "seq1", "DTW", {"subject_fingerprint": "11-20"})
+    assert not index.is_done("1", "seq1", "FastDTW")
+    assert not index.is_done("4", "seq1", "DTW")
+    assert index.is_done("1", "seq1", "DTW", {"options": "a"}, {"options": "a"})
+    assert not index.is_done("1", "seq1", "DTW", {"options": "b"}, {"options": "a"})
+
+
+def test_result_index_checks_linked_arrays(tmp_path: pathlib.Path) -> None:
+    """Test that results whose linked warping paths are lost are not done."""
+    gold = models.ParticipantData("Gold", "seq1", np.array([]))
+    similarity_metrics = models.SimilarityMetrics.from_dtw(
+        1.5, warping_path=[(0, 0), (1, 1)]
+    )
+    with writers.ResultSink(tmp_path, flush_every=1, path_format="npz") as sink:
+        for participant_ID in ("1", "2"):
+            subject = models.ParticipantData(participant_ID, "seq1", np.array([]))
+            sink.write(gold, subject, similarity_metrics)
+    (output_file,) = tmp_path.glob("results_*.ndjson")
+    output_file.with_suffix(".paths.1.npz").unlink()
+
+    index = writers.ResultIndex.load(tmp_path, "Gold")
+
+    assert index.is_done("1", "seq1", "DTW")
+    assert not index.is_done("2", "seq1", "DTW")